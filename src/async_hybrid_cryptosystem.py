@@ -0,0 +1,236 @@
+import asyncio
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class AsyncHybridCryptosystem:
+    """
+    asyncio front-end for a HybridCryptosystem.
+
+    Messages are split into segments of chunk_size characters and each segment is
+    encrypted or decrypted in an executor (HybridCryptosystem.encrypt_segment and
+    decrypt_segment), so the event loop is never blocked and no single task holds
+    a worker for long. At most max_pending segments are in flight at a time; when
+    reading from an asyncio.StreamReader the stream is not read any further until
+    a slot frees up.
+
+    The executor can be any concurrent.futures.Executor. With the default (None)
+    the event loop's default thread pool is used. With a ProcessPoolExecutor the
+    cryptosystem is pickled with every segment.
+
+    encrypt and decrypt apply the cryptosystem's compression to the whole
+    message, as HybridCryptosystem does. A compressed frame cannot be produced
+    or read one segment at a time, so iter_encrypt and iter_decrypt refuse a
+    cryptosystem with compression.
+    """
+
+    def __init__(
+        self,
+        cryptosystem: HybridCryptosystem = None,
+        executor=None,
+        chunk_size: int = 65536,
+        max_pending: int = 4,
+    ):
+        if cryptosystem is None:
+            cryptosystem = HybridCryptosystem()
+        self.cryptosystem = cryptosystem
+        self.executor = executor
+
+        # The final segment must hold every byte the padding check can look at
+        self.min_chunk_size = cryptosystem.min_segment_size()
+        if (
+            chunk_size % cryptosystem.block_bytes != 0
+            or chunk_size < self.min_chunk_size
+        ):
+            raise ValueError(
+                f"Chunk size mismatch: expected a multiple of {cryptosystem.block_bytes} of at least {self.min_chunk_size}, got {chunk_size}."
+            )
+        if max_pending < 1:
+            raise ValueError(f"max_pending must be at least 1, got {max_pending}.")
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+
+    async def encrypt(self, M: str) -> str:
+        """Encrypts the given plaintext without blocking the event loop.
+
+        Args:
+            M (str): The plaintext to encrypt.
+
+        Returns:
+            str: The encrypted ciphertext, identical to HybridCryptosystem.encrypt.
+        """
+        compression = self.cryptosystem.compression
+        if compression is not None:
+            M = compression.compress(M)
+        segments = self._pipeline(self._split(M), self.cryptosystem.encrypt_segment)
+        return "".join([segment async for segment in segments])
+
+    async def decrypt(self, M: str) -> str:
+        """Decrypts the given ciphertext without blocking the event loop.
+
+        Args:
+            M (str): The ciphertext to decrypt.
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks.
+
+        Returns:
+            str: The decrypted plaintext, identical to HybridCryptosystem.decrypt.
+        """
+        block_bytes = self.cryptosystem.block_bytes
+        if len(M) % block_bytes != 0:
+            raise ValueError(
+                f"Ciphertext size mismatch: expected a multiple of {block_bytes} characters, got {len(M)} characters."
+            )
+        segments = self._pipeline(self._split(M), self.cryptosystem.decrypt_segment)
+        D2 = "".join([segment async for segment in segments])
+        compression = self.cryptosystem.compression
+        if compression is not None:
+            D2 = compression.decompress(D2)
+        return D2
+
+    def iter_encrypt(self, reader: asyncio.StreamReader):
+        """Encrypts everything read from a stream, for use with async for.
+
+        The bytes read are taken as latin-1 characters.
+
+        Args:
+            reader (asyncio.StreamReader): The plaintext stream.
+
+        Raises:
+            ValueError: If the cryptosystem has compression.
+
+        Returns:
+            AsyncIterator[str]: The ciphertext, one segment at a time.
+        """
+        self._check_streamable()
+        return self._pipeline(
+            self._read_segments(reader), self.cryptosystem.encrypt_segment
+        )
+
+    def iter_decrypt(self, reader: asyncio.StreamReader):
+        """Decrypts everything read from a stream, for use with async for.
+
+        Args:
+            reader (asyncio.StreamReader): The ciphertext stream.
+
+        Raises:
+            ValueError: If the cryptosystem has compression.
+
+        Returns:
+            AsyncIterator[str]: The plaintext, one segment at a time.
+        """
+        self._check_streamable()
+        return self._pipeline(
+            self._read_segments(reader), self.cryptosystem.decrypt_segment
+        )
+
+    def _check_streamable(self):
+        """Rejects a cryptosystem whose compression needs the whole message.
+
+        Raises:
+            ValueError: If the cryptosystem has compression.
+        """
+        if self.cryptosystem.compression is not None:
+            raise ValueError(
+                "Streaming is not supported with compression: use encrypt or decrypt on the whole message."
+            )
+
+    async def _split(self, M: str):
+        """Splits a message into (segment, start, final) tuples with HybridCryptosystem.split_segments.
+
+        Args:
+            M (str): The message to split.
+
+        Yields:
+            tuple[str, int, bool]: The segment, its start index and whether it is the last one.
+        """
+        for segment in self.cryptosystem.split_segments(M, self.chunk_size):
+            yield segment
+
+    async def _read_segments(self, reader: asyncio.StreamReader):
+        """Reads a stream into (segment, start, final) tuples, like _split.
+
+        One chunk is read ahead so the final segment is known, and a short last
+        chunk is merged into the one before it.
+
+        Args:
+            reader (asyncio.StreamReader): The stream to read.
+
+        Yields:
+            tuple[str, int, bool]: The segment, its start index and whether it is the last one.
+        """
+        start = 0
+        current = await self._read_chunk(reader)
+        while len(current) == self.chunk_size:
+            following = await self._read_chunk(reader)
+            if len(following) < self.min_chunk_size:
+                current += following
+                break
+            yield current, start, False
+            start += len(current)
+            current = following
+        yield current, start, True
+
+    async def _read_chunk(self, reader: asyncio.StreamReader) -> str:
+        """Reads up to chunk_size bytes, fewer only at the end of the stream.
+
+        Args:
+            reader (asyncio.StreamReader): The stream to read.
+
+        Returns:
+            str: The bytes read as latin-1 characters.
+        """
+        try:
+            chunk = await reader.readexactly(self.chunk_size)
+        except asyncio.IncompleteReadError as error:
+            chunk = error.partial
+        return chunk.decode("latin-1")
+
+    async def _pipeline(self, segments, crypt_segment):
+        """Runs crypt_segment on every segment in the executor, yielding results in order.
+
+        A producer task submits segments while a semaphore allows; the slot is
+        only released once the consumer has taken the result, which bounds the
+        work in flight and applies backpressure to the segment source.
+
+        Args:
+            segments (AsyncIterator[tuple[str, int, bool]]): The segments to process.
+            crypt_segment (Callable[[str, int, bool], str]): encrypt_segment or decrypt_segment.
+
+        Yields:
+            str: The processed segments, in order.
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_pending)
+        futures = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for segment, start, final in segments:
+                    await slots.acquire()
+                    futures.put_nowait(
+                        loop.run_in_executor(
+                            self.executor, crypt_segment, segment, start, final
+                        )
+                    )
+            finally:
+                futures.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                future = await futures.get()
+                if future is None:
+                    break
+                result = await future
+                slots.release()
+                yield result
+            # Raises any error from reading the segments
+            await producer
+        finally:
+            producer.cancel()
+            while not futures.empty():
+                future = futures.get_nowait()
+                if future is not None:
+                    future.cancel()
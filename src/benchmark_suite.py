@@ -0,0 +1,477 @@
+import argparse
+import json
+import platform
+import random
+import struct
+import sys
+import time
+import tracemalloc
+
+from des_bit_converter import DESBitConverter
+from des_parser import DESParser
+from hybrid_cryptosystem import HybridCryptosystem
+from stage_memory_profiler import StageMemoryProfiler
+
+
+class BenchmarkSuite:
+    """
+    Benchmarks every component on its own and the hybrid pipeline end to end.
+
+    Sized components (conversions, parsing, rotor and DES encryption, the
+    hybrid pipeline) are swept over the payload sizes; fixed-size components
+    (permutations, single blocks, the key schedule, single characters) run once
+    at their own size. Every measurement records operations per second, MB/s,
+    latency percentiles and the peak memory of one traced run.
+
+    Each operation is repeated until min_time has passed. A size is skipped
+    when the previous size of the same component predicts more than
+    max_seconds per operation, or a peak of more than max_memory bytes for the
+    operation or for preparing its input. The slow reference paths and the
+    bit-string stages (8 characters per byte) thus stop early instead of
+    running for hours or exhausting memory at 100 MB.
+
+    With stage_memory, every size also runs the StageMemoryProfiler on
+    encryption and decryption, adding the peak and retained bytes of each
+    reference pipeline stage to the report under memory.<operation>.<stage>,
+    and those of the default fused path under memory.<operation>.fused.
+
+    compare checks a report against a stored baseline and lists every
+    measurement that got slower, or used more memory, beyond a threshold.
+    """
+
+    SIZES = [8, 64, 1024, 65536, 1024 * 1024, 100 * 1024 * 1024]
+
+    def __init__(
+        self,
+        sizes: list[int] = None,
+        components: list[str] = None,
+        min_time: float = 0.2,
+        max_seconds: float = 10.0,
+        max_memory: int = 1 << 30,
+        memory: bool = True,
+        seed: int = 0,
+        stage_memory: bool = False,
+    ):
+        self.sizes = sizes if sizes is not None else self.SIZES
+        self.min_time = min_time
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.memory = memory
+        self.seed = seed
+        self.stage_memory = stage_memory
+        self.rng = random.Random(seed)
+        self.cryptosystem = HybridCryptosystem(seed=seed)
+        self.cryptosystem.precompute()
+        available = self.components()
+        if components is None:
+            components = list(available)
+        unknown = [name for name in components if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown components: {', '.join(unknown)}.")
+        self.selected = components
+
+    def components(self) -> dict:
+        """Returns the benchmarked components.
+
+        Returns:
+            dict[str, tuple[Callable[[int], Callable[[], object]], int | None]]: Per name,
+            a setup function that takes the payload size and returns the operation to
+            time, and the fixed size in bytes of components that are not swept.
+        """
+        converter = DESBitConverter()
+        parser = DESParser()
+        des = self.cryptosystem.des
+        permutation = des.permutation
+        rotor_machine = self.cryptosystem.rotor_machine
+        key_context = self.cryptosystem.key_context()
+
+        def sized(function, prepare=lambda M: M):
+            def setup(size):
+                argument = prepare(self._payload(size))
+                return lambda: function(argument)
+
+            return setup
+
+        def fixed(function, bits):
+            def setup(size):
+                argument = format(self.rng.getrandbits(bits), f"0{bits}b")
+                return lambda: function(argument)
+
+            return setup
+
+        def reset_rotors(function):
+            def run(text):
+                rotor_machine.reset_rotors()
+                return function(text)
+
+            return run
+
+        return {
+            "bit_converter.str_to_binary": (sized(converter.str_to_binary), None),
+            "bit_converter.binary_to_str": (
+                sized(converter.binary_to_str, converter.str_to_binary),
+                None,
+            ),
+            "parser.parse": (sized(parser.parse, converter.str_to_binary), None),
+            "parser.deparse": (
+                sized(
+                    parser.deparse,
+                    lambda M: parser.parse(converter.str_to_binary(M)),
+                ),
+                None,
+            ),
+            "permutation.initial_permutation": (
+                fixed(permutation.initial_permutation, 64),
+                8,
+            ),
+            "permutation.inverse_initial_permutation": (
+                fixed(permutation.inverse_initial_permutation, 64),
+                8,
+            ),
+            "permutation.expansion": (fixed(permutation.expansion, 32), 4),
+            "permutation.p_box": (fixed(permutation.p_box, 32), 4),
+            "permutation.permuted_choice_1": (
+                fixed(permutation.permuted_choice_1, 64),
+                8,
+            ),
+            "permutation.permuted_choice_2": (
+                fixed(permutation.permuted_choice_2, 56),
+                7,
+            ),
+            "des.key_schedule": (lambda size: des._generate_subkeys, 8),
+            "des.encrypt_block": (fixed(des.encrypt_block, 64), 8),
+            "des.decrypt_block": (fixed(des.decrypt_block, 64), 8),
+            "des.encrypt": (sized(des.encrypt), None),
+            "des.encrypt_blocks": (sized(des.encrypt_blocks, self._int_blocks), None),
+            "rotor.encrypt_char": (
+                lambda size: lambda: rotor_machine.encrypt_char("a"),
+                1,
+            ),
+            "rotor.encrypt": (sized(reset_rotors(rotor_machine.encrypt)), None),
+            "rotor.encrypt_segment": (
+                sized(lambda M: rotor_machine.encrypt_segment(M, 0)),
+                None,
+            ),
+            "hybrid.encrypt": (sized(self.cryptosystem.encrypt), None),
+            "hybrid.decrypt": (
+                sized(self.cryptosystem.decrypt, key_context.encrypt),
+                None,
+            ),
+            "key_context.encrypt": (sized(key_context.encrypt), None),
+            "key_context.decrypt": (
+                sized(key_context.decrypt, key_context.encrypt),
+                None,
+            ),
+        }
+
+    def run(self) -> dict:
+        """Runs the selected components over the sizes.
+
+        Returns:
+            dict: The Python version, settings and one result per component and size
+            with ops_per_s, mb_per_s, latency percentiles in seconds and
+            peak_memory_bytes, or the reason it was skipped.
+        """
+        available = self.components()
+        results = []
+        for name in self.selected:
+            setup, fixed_size = available[name]
+            sizes = [fixed_size] if fixed_size is not None else self.sizes
+            previous = None
+            for size in sizes:
+                reason = self._skip_reason(previous, size)
+                if reason is not None:
+                    results.append({"component": name, "size": size, "skipped": reason})
+                    continue
+                previous = self._measure(name, setup, size)
+                results.append(previous)
+        if self.stage_memory:
+            results += self._profile_stages()
+        return {
+            "python": platform.python_version(),
+            "min_time": self.min_time,
+            "seed": self.seed,
+            "results": results,
+        }
+
+    @staticmethod
+    def compare(report: dict, baseline: dict, threshold: float = 0.1) -> list[dict]:
+        """Lists the regressions of a report against a baseline report.
+
+        A measurement regresses when its operations per second fall, or its peak
+        or retained memory grows, by more than threshold relative to the baseline.
+
+        Args:
+            report (dict): The current report from run.
+            baseline (dict): The stored baseline report.
+            threshold (float): The tolerated relative change, e.g. 0.1 for 10%.
+
+        Returns:
+            list[dict]: The component, size, metric, baseline and current value and
+            relative change of every regression.
+        """
+        baseline_results = {
+            (result["component"], result["size"]): result
+            for result in baseline["results"]
+            if "skipped" not in result
+        }
+        regressions = []
+        for result in report["results"]:
+            reference = baseline_results.get((result["component"], result["size"]))
+            if reference is None or "skipped" in result:
+                continue
+            for metric, sign in [
+                ("ops_per_s", -1),
+                ("peak_memory_bytes", 1),
+                ("retained_memory_bytes", 1),
+            ]:
+                if result.get(metric) is None or not reference.get(metric):
+                    continue
+                change = result[metric] / reference[metric] - 1
+                if sign * change > threshold:
+                    regressions.append(
+                        {
+                            "component": result["component"],
+                            "size": result["size"],
+                            "metric": metric,
+                            "baseline": reference[metric],
+                            "current": result[metric],
+                            "change": change,
+                        }
+                    )
+        return regressions
+
+    def _skip_reason(self, previous: dict, size: int):
+        """Extrapolates the previous measurement of a component to a larger size.
+
+        Args:
+            previous (dict | None): The measurement at the previous size.
+            size (int): The next size.
+
+        Returns:
+            str | None: Why the size is skipped, or None to run it.
+        """
+        if previous is None:
+            return None
+        scale = size / previous["size"]
+        seconds = previous.get("latency_p50", previous.get("seconds")) * scale
+        if seconds > self.max_seconds:
+            return f"estimated {seconds:.1f} s per operation exceeds max_seconds"
+        peak = max(
+            previous["peak_memory_bytes"] or 0,
+            previous.get("setup_peak_memory_bytes") or 0,
+        )
+        if peak * scale > self.max_memory:
+            return f"estimated peak of {peak * scale / 1e6:.0f} MB exceeds max_memory"
+        return None
+
+    def _measure(self, name: str, setup, size: int) -> dict:
+        """Times an operation until min_time has passed, then traces one more run for its peak memory.
+
+        Args:
+            name (str): The component name.
+            setup (Callable[[int], Callable[[], object]]): Prepares the operation for a size.
+            size (int): The payload size in bytes.
+
+        Returns:
+            dict: The measurement.
+        """
+        setup_peak = None
+        if self.memory:
+            # The inputs of later stages (bit strings, block lists) can dwarf the payload
+            tracemalloc.start()
+            try:
+                operation = setup(size)
+                setup_peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        else:
+            operation = setup(size)
+        # Warm up the lazily built tables
+        operation()
+        latencies = []
+        clock = time.perf_counter
+        began = clock()
+        while not latencies or clock() - began < self.min_time:
+            start = clock()
+            operation()
+            latencies.append(clock() - start)
+        latencies.sort()
+        total = sum(latencies)
+        result = {
+            "component": name,
+            "size": size,
+            "runs": len(latencies),
+            "ops_per_s": len(latencies) / total if total else float("inf"),
+            "mb_per_s": size * len(latencies) / total / 1e6 if total else float("inf"),
+            "latency_p50": self._percentile(latencies, 50),
+            "latency_p90": self._percentile(latencies, 90),
+            "latency_p99": self._percentile(latencies, 99),
+            "peak_memory_bytes": None,
+            "setup_peak_memory_bytes": setup_peak,
+        }
+        if self.memory:
+            tracemalloc.start()
+            try:
+                operation()
+                result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return result
+
+    def _profile_stages(self) -> list[dict]:
+        """Runs the StageMemoryProfiler on both operations over the sizes.
+
+        Returns:
+            list[dict]: The stage results, or the skipped sizes, in the run format.
+        """
+        profiler = StageMemoryProfiler(self.cryptosystem, self.seed)
+        results = []
+        for operation in ["encrypt", "decrypt"]:
+            previous = None
+            for size in self.sizes:
+                reason = self._skip_reason(previous, size)
+                if reason is not None:
+                    results.append(
+                        {
+                            "component": f"memory.{operation}.pipeline",
+                            "size": size,
+                            "skipped": reason,
+                        }
+                    )
+                    continue
+                stages = profiler.profile(size, operation)
+                # The reference pipeline result covers every stage
+                previous = next(
+                    stage
+                    for stage in stages
+                    if stage["component"] == f"memory.{operation}.pipeline"
+                )
+                results += stages
+        return results
+
+    def _payload(self, size: int) -> str:
+        """Returns a reproducible random ASCII payload.
+
+        Args:
+            size (int): The payload size in characters.
+
+        Returns:
+            str: The payload.
+        """
+        return (
+            self.rng.randbytes(size).translate(bytes(range(128)) * 2).decode("latin-1")
+        )
+
+    def _int_blocks(self, M: str) -> list[int]:
+        """Pads a payload and splits it into 64-bit integer blocks.
+
+        Args:
+            M (str): The payload.
+
+        Returns:
+            list[int]: The blocks.
+        """
+        data = self.cryptosystem.des.parser.pad_bytes(M.encode("latin-1"))
+        return list(struct.unpack(f">{len(data) // 8}Q", data))
+
+    @staticmethod
+    def _percentile(values: list[float], percent: int) -> float:
+        """Returns the nearest-rank percentile of sorted values.
+
+        Args:
+            values (list[float]): The sorted values.
+            percent (int): The percentile.
+
+        Returns:
+            float: The value at that percentile.
+        """
+        rank = max(-(-percent * len(values) // 100), 1)
+        return values[rank - 1]
+
+
+def main():
+    """Command-line entry point: runs the suite, prints a table and optionally writes or compares JSON."""
+    parser = argparse.ArgumentParser(description="Component benchmark suite.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=BenchmarkSuite.SIZES,
+        help="Payload sizes.",
+    )
+    parser.add_argument(
+        "--components", nargs="+", help="Components to run (default: all)."
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Seconds to repeat each operation."
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=10.0,
+        help="Skip sizes predicted to take longer per operation.",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        default=1 << 30,
+        help="Skip sizes predicted to need a larger peak in bytes.",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run.")
+    parser.add_argument(
+        "--stage-memory",
+        action="store_true",
+        help="Also trace the peak and retained memory of each pipeline stage.",
+    )
+    parser.add_argument("--output", help="JSON file to write the report to.")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Tolerated relative regression."
+    )
+    args = parser.parse_args()
+
+    report = BenchmarkSuite(
+        args.sizes,
+        args.components,
+        args.min_time,
+        args.max_seconds,
+        args.max_memory,
+        not args.no_memory,
+        stage_memory=args.stage_memory,
+    ).run()
+    print(
+        f"{'component':<40} {'size':>10} {'ops/s':>12} {'MB/s':>9} {'p50 s':>10} {'p99 s':>10} {'peak B':>11}"
+    )
+    for result in report["results"]:
+        if "skipped" in result:
+            print(
+                f"{result['component']:<40} {result['size']:>10} skipped: {result['skipped']}"
+            )
+            continue
+        peak = result["peak_memory_bytes"]
+        if "ops_per_s" not in result:
+            print(
+                f"{result['component']:<40} {result['size']:>10} {'-':>12} {'-':>9} {result['seconds']:>10.6f} {'-':>10} {peak:>11} retained {result['retained_memory_bytes']} ({result['peak_bytes_per_input_byte']:.1f} peak B/B)"
+            )
+            continue
+        print(
+            f"{result['component']:<40} {result['size']:>10} {result['ops_per_s']:>12.1f} {result['mb_per_s']:>9.3f} {result['latency_p50']:>10.6f} {result['latency_p99']:>10.6f} {'-' if peak is None else peak:>11}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = BenchmarkSuite.compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['component']} size {regression['size']}: {regression['metric']} {regression['baseline']:.6g} -> {regression['current']:.6g} ({regression['change']:+.1%})"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
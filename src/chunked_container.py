@@ -0,0 +1,504 @@
+import bisect
+import hashlib
+import io
+import itertools
+import random
+import struct
+import zlib
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class ChunkedContainer:
+    """
+    Framed ciphertext container with a chunk index for random access.
+
+    The message is split into chunks, each encrypted with
+    HybridCryptosystem.encrypt_segment from its own rotor start, so every chunk
+    can be decrypted on its own. Layout:
+
+    header:       magic b"HCCC" | version (1 byte) | flags (1 byte) |
+                  chunk size (4 bytes) | message length (8 bytes) | chunk count (4 bytes)
+    index:        one entry per chunk: body offset (8 bytes) | rotor start (8 bytes) |
+                  plaintext length (4 bytes) | ciphertext length (4 bytes) | CRC-32 (4 bytes)
+    fingerprints: with the FINGERPRINTS flag, 16 bytes per chunk
+    body:         the encrypted chunks
+
+    The rotor start is the character index the chunk was encrypted at;
+    RotorMachine.positions_at gives the three rotor positions at that point.
+    Chunks are decrypted without removing the padding and cut to their recorded
+    plaintext length, so the padding check never strips message bytes.
+
+    By default chunks are chunk_size characters long and start at their own
+    index, so the body is exactly encrypt(message). With content_defined=True
+    the boundaries are chosen by a rolling hash of the content (chunk_size is
+    then the target average), every chunk stores a keyed fingerprint of its
+    plaintext, and reencrypt only encrypts the chunks of a new version whose
+    fingerprint is not in the old container.
+
+    Sources and destinations are bytes or seekable binary files, so read_range
+    only reads the header, the index and the chunks it touches.
+
+    Chunks are encrypted and read independently, so the cryptosystem must not
+    have compression, which works on the whole message.
+    """
+
+    MAGIC = b"HCCC"
+    VERSION = 1
+    CHECKSUMS = 1
+    FINGERPRINTS = 2
+    HEADER = struct.Struct(">4sBBIQI")
+    ENTRY = struct.Struct(">QQIII")
+    FINGERPRINT_BYTES = 16
+
+    # Gear table of the rolling hash; fixed so boundaries are stable across runs
+    GEAR = [random.Random(i).getrandbits(64) for i in range(256)]
+
+    def __init__(
+        self,
+        cryptosystem: HybridCryptosystem = None,
+        chunk_size: int = 65536,
+        checksums: bool = True,
+        content_defined: bool = False,
+    ):
+        if cryptosystem is None:
+            cryptosystem = HybridCryptosystem()
+        if cryptosystem.compression is not None:
+            raise ValueError(
+                "Chunked containers do not support compression: chunks are encrypted independently."
+            )
+        block_bytes = cryptosystem.block_bytes
+        if chunk_size <= 0 or chunk_size % block_bytes != 0:
+            raise ValueError(
+                f"Chunk size mismatch: expected a positive multiple of {block_bytes}, got {chunk_size}."
+            )
+        self.cryptosystem = cryptosystem
+        self.chunk_size = chunk_size
+        self.checksums = checksums
+        self.content_defined = content_defined
+        self.stats = None
+        self._fingerprint_key = None
+
+    def encrypt(self, M: str, executor=None) -> bytes:
+        """Encrypts a message into a container.
+
+        Args:
+            M (str): The plaintext to encrypt.
+            executor (concurrent.futures.Executor, optional): Encrypts the chunks in parallel.
+
+        Returns:
+            bytes: The container.
+        """
+        destination = io.BytesIO()
+        self.write(M, destination, executor)
+        return destination.getvalue()
+
+    def write(self, M: str, destination, executor=None) -> int:
+        """Encrypts a message into a container written to a seekable binary file.
+
+        Args:
+            M (str): The plaintext to encrypt.
+            destination (BinaryIO): The file, positioned where the container starts (the start of the file for read_range).
+            executor (concurrent.futures.Executor, optional): Encrypts the chunks in parallel.
+
+        Returns:
+            int: The container size in bytes.
+        """
+        chunks = self._split(M, self.chunk_size)
+        encrypted = self._encrypt_chunks(chunks, executor)
+        return self._write_container(
+            destination,
+            len(M),
+            self.chunk_size,
+            [(chunk, start, None) for chunk, start in chunks],
+            encrypted,
+        )
+
+    def reencrypt(self, source, M: str, destination=None, executor=None):
+        """Encrypts a new version of a content-defined container's message, reusing unchanged chunks.
+
+        The new version is chunked with the old container's chunk size. Chunks
+        whose fingerprint appears in the old container are copied with their
+        ciphertext and rotor start; only the others are encrypted. Checksums
+        follow this container's checksums setting, not the old one's.
+        Afterwards stats holds the number of chunks, reused chunks, encrypted
+        chunks and encrypted characters.
+
+        Args:
+            source (bytes | BinaryIO): The old container, written with content_defined=True by the same key.
+            M (str): The new plaintext.
+            destination (BinaryIO, optional): A seekable file for the new container. Returned as bytes if None.
+            executor (concurrent.futures.Executor, optional): Encrypts the changed chunks in parallel.
+
+        Raises:
+            ValueError: If the old container is not valid or has no fingerprints.
+
+        Returns:
+            bytes | int: The new container, or its size in bytes when written to destination.
+        """
+        header, entries = self.read_index(source)
+        if not header["fingerprints"]:
+            raise ValueError("Container has no chunk fingerprints.")
+        reusable = {entry["fingerprint"]: entry for entry in entries}
+
+        chunks = []
+        changed = []
+        for chunk, start in self._split(M, header["chunk_size"], True):
+            entry = reusable.get(self._fingerprint(chunk))
+            if entry is None:
+                changed.append((chunk, start))
+            else:
+                start = entry["start"]
+            chunks.append((chunk, start, entry))
+        encrypted_changed = self._encrypt_chunks(changed, executor)
+
+        def encrypted():
+            for _, _, entry in chunks:
+                if entry is None:
+                    yield next(encrypted_changed)
+                else:
+                    yield self._read_at(
+                        source, header["body_start"] + entry["offset"], entry["size"]
+                    ).decode("latin-1")
+
+        self.stats = {
+            "chunks": len(chunks),
+            "reused": len(chunks) - len(changed),
+            "encrypted": len(changed),
+            "encrypted_characters": sum(len(chunk) for chunk, _ in changed),
+        }
+        target = io.BytesIO() if destination is None else destination
+        size = self._write_container(
+            target, len(M), header["chunk_size"], chunks, encrypted(), True
+        )
+        return target.getvalue() if destination is None else size
+
+    def decrypt(self, source, executor=None) -> str:
+        """Decrypts a whole container.
+
+        Args:
+            source (bytes | BinaryIO): The container.
+            executor (concurrent.futures.Executor, optional): Decrypts the chunks in parallel.
+
+        Raises:
+            ValueError: If the container is not valid or a checksum does not match.
+
+        Returns:
+            str: The plaintext.
+        """
+        header, entries = self.read_index(source)
+        return self._decrypt_chunks(source, header, entries, executor)
+
+    def read_range(self, source, start: int, length: int, executor=None) -> str:
+        """Decrypts length characters of the message starting at start, reading only the chunks involved.
+
+        A range that runs past the end of the message is cut at the end.
+
+        Args:
+            source (bytes | BinaryIO): The container.
+            start (int): The index of the first character to read.
+            length (int): The number of characters to read.
+            executor (concurrent.futures.Executor, optional): Decrypts the chunks in parallel.
+
+        Raises:
+            ValueError: If the range is negative, the container is not valid or a checksum does not match.
+
+        Returns:
+            str: The plaintext characters.
+        """
+        if start < 0 or length < 0:
+            raise ValueError(
+                f"Range mismatch: expected a non-negative start and length, got {start} and {length}."
+            )
+        header, entries = self.read_index(source)
+        end = min(start + length, header["message_length"])
+        if start >= end:
+            return ""
+        positions = [entry["position"] for entry in entries]
+        first = bisect.bisect_right(positions, start) - 1
+        last = bisect.bisect_right(positions, end - 1) - 1
+        plaintext = self._decrypt_chunks(
+            source, header, entries[first : last + 1], executor
+        )
+        skip = start - positions[first]
+        return plaintext[skip : skip + end - start]
+
+    def read_index(self, source) -> tuple[dict, list[dict]]:
+        """Reads and validates the header and chunk index of a container.
+
+        Args:
+            source (bytes | BinaryIO): The container.
+
+        Raises:
+            ValueError: If the container is not valid or has another version.
+
+        Returns:
+            tuple[dict, list[dict]]: The header fields and one entry per chunk, including
+            the chunk's position in the message and its fingerprint (None without fingerprints).
+        """
+        magic, version, flags, chunk_size, message_length, count = self.HEADER.unpack(
+            self._read_at(source, 0, self.HEADER.size)
+        )
+        if magic != self.MAGIC:
+            raise ValueError("Not a chunked container.")
+        if version != self.VERSION:
+            raise ValueError(
+                f"Container version mismatch: expected {self.VERSION}, got {version}."
+            )
+        fingerprints = bool(flags & self.FINGERPRINTS)
+        index_size = count * self.ENTRY.size
+        fingerprints_size = count * self.FINGERPRINT_BYTES if fingerprints else 0
+        header = {
+            "checksums": bool(flags & self.CHECKSUMS),
+            "fingerprints": fingerprints,
+            "chunk_size": chunk_size,
+            "message_length": message_length,
+            "chunk_count": count,
+            "body_start": self.HEADER.size + index_size + fingerprints_size,
+        }
+        index = self._read_at(source, self.HEADER.size, index_size)
+        table = self._read_at(source, self.HEADER.size + index_size, fingerprints_size)
+        entries = []
+        position = 0
+        for i, entry in enumerate(self.ENTRY.iter_unpack(index)):
+            entry = dict(zip(["offset", "start", "length", "size", "checksum"], entry))
+            entry["position"] = position
+            entry["fingerprint"] = (
+                table[i * self.FINGERPRINT_BYTES : (i + 1) * self.FINGERPRINT_BYTES]
+                if fingerprints
+                else None
+            )
+            entries.append(entry)
+            position += entry["length"]
+        return header, entries
+
+    def _split(
+        self, M: str, chunk_size: int, content_defined: bool = None
+    ) -> list[tuple[str, int]]:
+        """Splits a message into chunks and assigns their rotor starts.
+
+        Args:
+            M (str): The message.
+            chunk_size (int): The chunk size, or the target average for content-defined chunks.
+            content_defined (bool, optional): Defaults to the container's setting.
+
+        Returns:
+            list[tuple[str, int]]: Each chunk and its rotor start, its index rounded down to a whole block.
+        """
+        if content_defined is None:
+            content_defined = self.content_defined
+        if content_defined:
+            ends = self._content_defined_ends(M.encode("latin-1"), chunk_size)
+        else:
+            ends = list(range(chunk_size, len(M), chunk_size)) + [len(M)]
+        block_bytes = self.cryptosystem.block_bytes
+        chunks = []
+        start = 0
+        for end in ends:
+            if end > start:
+                chunks.append((M[start:end], start - start % block_bytes))
+            start = end
+        return chunks
+
+    def _content_defined_ends(self, data: bytes, chunk_size: int) -> list[int]:
+        """Finds content-defined chunk boundaries with a gear rolling hash.
+
+        A boundary follows the first byte, at least chunk_size / 4 bytes into
+        the chunk, where the hash is below 2**64 / (chunk_size - chunk_size / 4),
+        so the expected chunk size is chunk_size; chunks are cut at
+        4 * chunk_size at the latest. The hash depends on the last 64
+        bytes only, so an edit moves the boundaries near it and no others.
+
+        Args:
+            data (bytes): The message as bytes.
+            chunk_size (int): The target average chunk size.
+
+        Returns:
+            list[int]: The end index of each chunk.
+        """
+        minimum, maximum = chunk_size // 4, chunk_size * 4
+        # Past the minimum a byte ends the chunk with probability 1 / (chunk_size - minimum)
+        threshold = (1 << 64) // max(chunk_size - minimum, 1)
+        gear = self.GEAR
+        ends = []
+        start = 0
+        while start < len(data):
+            end = min(start + maximum, len(data))
+            cut_from = start + minimum
+            rolling_hash = 0
+            # Warm the hash up on the 64 bytes before the first allowed boundary
+            for i in range(max(start, cut_from - 64), end):
+                rolling_hash = (
+                    (rolling_hash << 1) + gear[data[i]]
+                ) & 0xFFFFFFFFFFFFFFFF
+                if i >= cut_from and rolling_hash < threshold:
+                    end = i + 1
+                    break
+            ends.append(end)
+            start = end
+        return ends
+
+    def _fingerprint(self, chunk: str) -> bytes:
+        """Returns the fingerprint of a plaintext chunk.
+
+        The hash is keyed with the cryptosystem's key bundle, so fingerprints
+        cannot be matched against guessed plaintexts without the key.
+
+        Args:
+            chunk (str): The plaintext chunk.
+
+        Returns:
+            bytes: FINGERPRINT_BYTES bytes.
+        """
+        if self._fingerprint_key is None:
+            self._fingerprint_key = hashlib.sha256(
+                self.cryptosystem.to_key_bundle()
+            ).digest()
+        return hashlib.blake2b(
+            chunk.encode("latin-1"),
+            digest_size=self.FINGERPRINT_BYTES,
+            key=self._fingerprint_key,
+        ).digest()
+
+    def _encrypt_chunks(self, chunks: list[tuple[str, int]], executor=None):
+        """Encrypts chunks from their rotor starts, padding each one to a whole block.
+
+        Args:
+            chunks (list[tuple[str, int]]): Each chunk and its rotor start.
+            executor (concurrent.futures.Executor, optional): Encrypts the chunks in parallel.
+
+        Returns:
+            Iterator[str]: The encrypted chunks, in order.
+        """
+        texts = [chunk for chunk, _ in chunks]
+        starts = [start for _, start in chunks]
+        finals = itertools.repeat(True, len(chunks))
+        encrypt_segment = self.cryptosystem.encrypt_segment
+        if executor is None:
+            return map(encrypt_segment, texts, starts, finals)
+        return executor.map(encrypt_segment, texts, starts, finals)
+
+    def _write_container(
+        self,
+        destination,
+        message_length: int,
+        chunk_size: int,
+        chunks: list,
+        encrypted,
+        fingerprints: bool = None,
+    ) -> int:
+        """Writes a container, streaming the chunks before filling in the index.
+
+        Args:
+            destination (BinaryIO): The seekable file.
+            message_length (int): The message length.
+            chunk_size (int): The chunk size recorded in the header.
+            chunks (list[tuple[str, int, dict]]): Each plaintext chunk, its rotor start and the old index entry it is copied from, if any.
+            encrypted (Iterable[str]): The encrypted chunks, in order.
+            fingerprints (bool, optional): Whether to store fingerprints. Defaults to content_defined.
+
+        Returns:
+            int: The container size in bytes.
+        """
+        if fingerprints is None:
+            fingerprints = self.content_defined
+        index_size = len(chunks) * self.ENTRY.size
+        fingerprints_size = len(chunks) * self.FINGERPRINT_BYTES if fingerprints else 0
+        container_start = destination.tell()
+        destination.seek(
+            container_start + self.HEADER.size + index_size + fingerprints_size
+        )
+        entries = []
+        table = []
+        offset = 0
+        for (chunk, start, old_entry), encrypted_chunk in zip(chunks, encrypted):
+            data = encrypted_chunk.encode("latin-1")
+            checksum = zlib.crc32(data) if self.checksums else 0
+            if old_entry is not None:
+                fingerprint = old_entry["fingerprint"]
+            else:
+                fingerprint = self._fingerprint(chunk) if fingerprints else b""
+            entries.append((offset, start, len(chunk), len(data), checksum))
+            table.append(fingerprint)
+            destination.write(data)
+            offset += len(data)
+        end = destination.tell()
+
+        destination.seek(container_start)
+        flags = self.CHECKSUMS if self.checksums else 0
+        if fingerprints:
+            flags |= self.FINGERPRINTS
+        destination.write(
+            self.HEADER.pack(
+                self.MAGIC, self.VERSION, flags, chunk_size, message_length, len(chunks)
+            )
+        )
+        for entry in entries:
+            destination.write(self.ENTRY.pack(*entry))
+        destination.write(b"".join(table))
+        destination.seek(end)
+        return end - container_start
+
+    def _decrypt_chunks(
+        self, source, header: dict, entries: list[dict], executor=None
+    ) -> str:
+        """Reads, verifies and decrypts consecutive chunks.
+
+        Args:
+            source (bytes | BinaryIO): The container.
+            header (dict): The header fields from read_index.
+            entries (list[dict]): The index entries of the chunks.
+            executor (concurrent.futures.Executor, optional): Decrypts the chunks in parallel.
+
+        Raises:
+            ValueError: If a checksum does not match.
+
+        Returns:
+            str: The plaintext of the chunks.
+        """
+        chunks = []
+        for entry in entries:
+            data = self._read_at(
+                source, header["body_start"] + entry["offset"], entry["size"]
+            )
+            if header["checksums"] and zlib.crc32(data) != entry["checksum"]:
+                raise ValueError(
+                    f"Chunk checksum mismatch: expected {entry['checksum']:08x}, got {zlib.crc32(data):08x} at {entry['position']}."
+                )
+            chunks.append(data.decode("latin-1"))
+        starts = [entry["start"] for entry in entries]
+        # Padding is cut by length below rather than by the padding check
+        finals = [False] * len(entries)
+        decrypt_segment = self.cryptosystem.decrypt_segment
+        if executor is None:
+            decrypted = map(decrypt_segment, chunks, starts, finals)
+        else:
+            decrypted = executor.map(decrypt_segment, chunks, starts, finals)
+        return "".join(
+            [chunk[: entry["length"]] for chunk, entry in zip(decrypted, entries)]
+        )
+
+    def _read_at(self, source, offset: int, size: int) -> bytes:
+        """Reads size bytes at offset of a container.
+
+        Args:
+            source (bytes | BinaryIO): The container; a file is read relative to position 0.
+            offset (int): The byte offset.
+            size (int): The number of bytes.
+
+        Raises:
+            ValueError: If the container ends before offset + size.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = bytes(source[offset : offset + size])
+        else:
+            source.seek(offset)
+            data = source.read(size)
+        if len(data) != size:
+            raise ValueError(
+                f"Container size mismatch: expected {size} bytes at {offset}, got {len(data)} bytes."
+            )
+        return data
@@ -0,0 +1,111 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CiphertextCache:
+    """
+    Content-addressed memo cache for HybridCryptosystem.encrypt/decrypt.
+
+    Encryption is deterministic for a given key (the rotors are reset for every
+    message and DES uses ECB with fixed subkeys), so results can be reused for
+    repeated messages. Entries are keyed by (instance fingerprint, operation,
+    message hash); the fingerprint identifies the key material, so one cache
+    can be shared by every instance and thread. The cached results are limited
+    to max_bytes characters in total (latin-1, one byte each), evicting the
+    least recently used first. Results longer than max_entry_bytes are not
+    cached.
+    """
+
+    ENCRYPT = 0
+    DECRYPT = 1
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = None):
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be at least 1, got {max_bytes}.")
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes if max_entry_bytes is None else max_entry_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, fingerprint: bytes, operation: int, M: str) -> tuple:
+        """Returns the cache key of a message.
+
+        Args:
+            fingerprint (bytes): The instance fingerprint (HybridCryptosystem.fingerprint).
+            operation (int): ENCRYPT or DECRYPT.
+            M (str): The message.
+
+        Returns:
+            tuple[bytes, int, bytes]: The cache key.
+        """
+        digest = hashlib.blake2b(
+            M.encode("utf-8", "surrogatepass"), digest_size=32
+        ).digest()
+        return fingerprint, operation, digest
+
+    def get(self, key: tuple):
+        """Returns the cached result for key and marks it as recently used.
+
+        Args:
+            key (tuple): A key from key().
+
+        Returns:
+            str | None: The cached result, or None on a miss.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: tuple, result: str):
+        """Caches a result, evicting least recently used entries to stay within max_bytes.
+
+        Args:
+            key (tuple): A key from key().
+            result (str): The encrypt or decrypt result.
+        """
+        size = len(result)
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = result
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every entry. The statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Returns the cache metrics.
+
+        Returns:
+            dict: Entry count, cached bytes, hits, misses, hit rate and evictions.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
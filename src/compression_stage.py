@@ -0,0 +1,153 @@
+import lzma
+import zlib
+
+
+class CompressionStage:
+    """
+    Optional compress-before-encrypt stage of a HybridCryptosystem.
+
+    The text is encoded as latin-1 (UTF-8 if it has characters above 255) and
+    compressed with zlib or lzma at the given level, so DES has fewer blocks to
+    encrypt. The result is framed as:
+
+    codec (1 byte: STORED, ZLIB or LZMA, plus UTF8) | payload | trailer b"\\x80\\xff"
+
+    and carried through the cipher as latin-1 characters. The trailer bytes are
+    outside the rotor alphabet, so they reach DES unchanged and the decryption
+    padding check can never mistake the end of the frame for padding.
+
+    Data that would not shrink is stored instead: texts under min_size bytes,
+    and texts whose samples (the start, middle and end, sample_size bytes in
+    total) do not compress below max_ratio with a fast zlib pass.
+    """
+
+    STORED = 0
+    ZLIB = 1
+    LZMA = 2
+    UTF8 = 0x80
+    CODECS = {"zlib": ZLIB, "lzma": LZMA}
+    TRAILER = b"\x80\xff"
+
+    def __init__(
+        self,
+        codec: str = "zlib",
+        level: int = 6,
+        min_size: int = 64,
+        sample_size: int = 4096,
+        max_ratio: float = 0.9,
+    ):
+        if codec not in self.CODECS:
+            raise ValueError(
+                f"Unknown codec: expected one of {sorted(self.CODECS)}, got {codec!r}."
+            )
+        if not 0 <= level <= 9:
+            raise ValueError(f"Compression level must be from 0 to 9, got {level}.")
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+        self.sample_size = sample_size
+        self.max_ratio = max_ratio
+
+    def compress(self, M: str) -> str:
+        """Compresses a text into a frame, or stores it if it would not shrink.
+
+        Args:
+            M (str): The text.
+
+        Returns:
+            str: The frame as latin-1 characters.
+        """
+        try:
+            data, encoding = M.encode("latin-1"), 0
+        except UnicodeEncodeError:
+            data, encoding = M.encode("utf-8", "surrogatepass"), self.UTF8
+        if self._worth_compressing(data):
+            codec = self.CODECS[self.codec]
+            if codec == self.ZLIB:
+                payload = zlib.compress(data, self.level)
+            else:
+                payload = lzma.compress(data, preset=self.level)
+        else:
+            codec, payload = self.STORED, data
+        return (bytes([codec | encoding]) + payload + self.TRAILER).decode("latin-1")
+
+    def decompress(self, frame: str) -> str:
+        """Restores the text of a frame.
+
+        Args:
+            frame (str): The frame as latin-1 characters.
+
+        Raises:
+            ValueError: If the frame is not valid.
+
+        Returns:
+            str: The text.
+        """
+        data = frame.encode("latin-1")
+        if len(data) < 1 + len(self.TRAILER) or not data.endswith(self.TRAILER):
+            raise ValueError("Not a compression frame.")
+        codec, payload = data[0] & ~self.UTF8, data[1 : -len(self.TRAILER)]
+        try:
+            if codec == self.ZLIB:
+                payload = zlib.decompress(payload)
+            elif codec == self.LZMA:
+                payload = lzma.decompress(payload)
+            elif codec != self.STORED:
+                raise ValueError(f"Unknown compression codec: {codec}.")
+        except (zlib.error, lzma.LZMAError) as error:
+            raise ValueError(f"Compression frame is corrupt: {error}.") from error
+        if data[0] & self.UTF8:
+            return payload.decode("utf-8", "surrogatepass")
+        return payload.decode("latin-1")
+
+    def settings(self) -> bytes:
+        """Returns the settings that determine the frames, for cache keys.
+
+        Returns:
+            bytes: The codec, level and heuristic parameters.
+        """
+        return (
+            f"{self.codec}:{self.level}:{self.min_size}:{self.sample_size}:{self.max_ratio}"
+        ).encode("ascii")
+
+    @classmethod
+    def from_settings(cls, settings: bytes):
+        """Rebuilds a stage from the output of settings.
+
+        Args:
+            settings (bytes): The codec, level and heuristic parameters.
+
+        Raises:
+            ValueError: If settings is not valid.
+
+        Returns:
+            CompressionStage: A stage producing the same frames.
+        """
+        try:
+            codec, level, min_size, sample_size, max_ratio = settings.decode(
+                "ascii"
+            ).split(":")
+            return cls(
+                codec, int(level), int(min_size), int(sample_size), float(max_ratio)
+            )
+        except (UnicodeDecodeError, ValueError):
+            raise ValueError(f"Invalid compression settings: {settings!r}.") from None
+
+    def _worth_compressing(self, data: bytes) -> bool:
+        """Estimates from samples whether compressing data would pay off.
+
+        Args:
+            data (bytes): The encoded text.
+
+        Returns:
+            bool: True if the samples compress below max_ratio.
+        """
+        if len(data) < self.min_size:
+            return False
+        if len(data) <= self.sample_size:
+            sample = data
+        else:
+            part = self.sample_size // 3
+            middle = (len(data) - part) // 2
+            sample = data[:part] + data[middle : middle + part] + data[-part:]
+        return len(zlib.compress(sample, 1)) < self.max_ratio * len(sample)
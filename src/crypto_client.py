@@ -0,0 +1,263 @@
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from daemon_protocol import DaemonProtocol
+
+
+class CryptoClient:
+    """
+    Client library for CryptoDaemon.
+
+    Keeps a pool of up to pool_size open connections, checked out by one call at
+    a time. encrypt_many/decrypt_many pipeline their requests over a single
+    connection and pack small texts into batches of about batch_bytes so they
+    travel as one ENCRYPT_MANY/DECRYPT_MANY request.
+    """
+
+    def __init__(self, address, pool_size: int = 4, batch_bytes: int = 4096):
+        self.address = address
+        self.pool_size = pool_size
+        self.batch_bytes = batch_bytes
+        self.protocol = DaemonProtocol()
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+    def new_key(self) -> str:
+        """Asks the daemon to create a new engine.
+
+        Returns:
+            str: The key id of the new engine.
+        """
+        (result,) = self._call([(DaemonProtocol.NEW_KEY, "", b"")])
+        return result.decode("ascii")
+
+    def drop_key(self, key_id: str):
+        """Asks the daemon to drop the engine of a key.
+
+        Args:
+            key_id (str): The key id.
+        """
+        self._call([(DaemonProtocol.DROP_KEY, key_id, b"")])
+
+    def encrypt(self, key_id: str, M: str) -> str:
+        """Encrypts a plaintext with the daemon's engine for key_id.
+
+        Args:
+            key_id (str): The key id.
+            M (str): The plaintext to encrypt.
+
+        Returns:
+            str: The encrypted ciphertext.
+        """
+        (result,) = self._call([(DaemonProtocol.ENCRYPT, key_id, M.encode("latin-1"))])
+        return result.decode("latin-1")
+
+    def decrypt(self, key_id: str, M: str) -> str:
+        """Decrypts a ciphertext with the daemon's engine for key_id.
+
+        Args:
+            key_id (str): The key id.
+            M (str): The ciphertext to decrypt.
+
+        Returns:
+            str: The decrypted plaintext.
+        """
+        (result,) = self._call([(DaemonProtocol.DECRYPT, key_id, M.encode("latin-1"))])
+        return result.decode("latin-1")
+
+    def encrypt_many(self, key_id: str, messages: list[str]) -> list[str]:
+        """Encrypts many plaintexts, batching the small ones and pipelining all requests.
+
+        Args:
+            key_id (str): The key id.
+            messages (list[str]): The plaintexts to encrypt.
+
+        Returns:
+            list[str]: The ciphertexts, in the same order.
+        """
+        return self._crypt_many(
+            key_id, messages, DaemonProtocol.ENCRYPT, DaemonProtocol.ENCRYPT_MANY
+        )
+
+    def decrypt_many(self, key_id: str, ciphertexts: list[str]) -> list[str]:
+        """Decrypts many ciphertexts, batching the small ones and pipelining all requests.
+
+        Args:
+            key_id (str): The key id.
+            ciphertexts (list[str]): The ciphertexts to decrypt.
+
+        Returns:
+            list[str]: The plaintexts, in the same order.
+        """
+        return self._crypt_many(
+            key_id, ciphertexts, DaemonProtocol.DECRYPT, DaemonProtocol.DECRYPT_MANY
+        )
+
+    def close(self):
+        """Closes every idle connection in the pool."""
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+            with self._lock:
+                self._opened -= 1
+
+    def _crypt_many(
+        self, key_id: str, texts: list[str], single_op: int, many_op: int
+    ) -> list[str]:
+        """Groups texts into requests, runs them pipelined and restores the original order.
+
+        Args:
+            key_id (str): The key id.
+            texts (list[str]): The texts to process.
+            single_op (int): The operation for a text sent on its own.
+            many_op (int): The operation for a batch of small texts.
+
+        Returns:
+            list[str]: The processed texts, in the same order.
+        """
+        requests = []
+        groups = []
+        batch, batch_size = [], 0
+        for i, text in enumerate(texts):
+            if len(text) >= self.batch_bytes:
+                requests.append((single_op, key_id, text.encode("latin-1")))
+                groups.append([i])
+                continue
+            if batch and batch_size + len(text) > self.batch_bytes:
+                requests.append((many_op, key_id, self._pack_batch(texts, batch)))
+                groups.append(batch)
+                batch, batch_size = [], 0
+            batch.append(i)
+            batch_size += len(text)
+        if batch:
+            requests.append((many_op, key_id, self._pack_batch(texts, batch)))
+            groups.append(batch)
+
+        results = [None] * len(texts)
+        for (op, _, _), group, result in zip(requests, groups, self._call(requests)):
+            if op == single_op:
+                results[group[0]] = result.decode("latin-1")
+            else:
+                for i, text in zip(group, self.protocol.unpack_texts(result)):
+                    results[i] = text
+        return results
+
+    def _pack_batch(self, texts: list[str], indexes: list[int]) -> bytes:
+        """Packs the texts at the given indexes into a batch payload.
+
+        Args:
+            texts (list[str]): All texts.
+            indexes (list[int]): The indexes of the texts in the batch.
+
+        Returns:
+            bytes: The packed payload.
+        """
+        return self.protocol.pack_texts([texts[i] for i in indexes])
+
+    def _call(self, requests: list[tuple[int, str, bytes]]) -> list[bytes]:
+        """Sends requests over one pooled connection and returns their results in order.
+
+        Requests are written in windows of DaemonProtocol.MAX_PIPELINE before
+        the responses of the window are read, so the daemon never waits on a
+        client that is still writing.
+
+        Args:
+            requests (list[tuple[int, str, bytes]]): (op, key id, payload) for each request.
+
+        Raises:
+            RuntimeError: If the daemon reports an error for any request.
+
+        Returns:
+            list[bytes]: The response payloads, in request order.
+        """
+        results = []
+        errors = []
+        with self._connection() as sock:
+            for start in range(0, len(requests), DaemonProtocol.MAX_PIPELINE):
+                window = requests[start : start + DaemonProtocol.MAX_PIPELINE]
+                request_ids = [self._next_request_id() for _ in window]
+                sock.sendall(
+                    b"".join(
+                        self.protocol.pack_request(op, request_id, key_id, payload)
+                        for (op, key_id, payload), request_id in zip(
+                            window, request_ids
+                        )
+                    )
+                )
+                # Responses may arrive in any order
+                responses = {}
+                while len(responses) < len(window):
+                    status, request_id, payload = self.protocol.unpack_response(
+                        self.protocol.read_frame(sock)
+                    )
+                    responses[request_id] = (status, payload)
+                for request_id in request_ids:
+                    status, payload = responses[request_id]
+                    if status != DaemonProtocol.OK:
+                        errors.append(payload.decode("utf-8"))
+                    results.append(payload)
+        if errors:
+            raise RuntimeError(f"Daemon error: {errors[0]}")
+        return results
+
+    def _next_request_id(self) -> int:
+        """Returns a new request id.
+
+        Returns:
+            int: The request id.
+        """
+        with self._lock:
+            self._request_id = (self._request_id + 1) % 2**32
+            return self._request_id
+
+    @contextmanager
+    def _connection(self):
+        """Checks a connection out of the pool, opening one if the pool is not full.
+
+        A connection that fails during the call is closed instead of being returned.
+
+        Yields:
+            socket.socket: The connected socket.
+        """
+        sock = None
+        with self._lock:
+            if self._idle.empty() and self._opened < self.pool_size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+        if open_new:
+            try:
+                sock = self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        else:
+            sock = self._idle.get()
+
+        try:
+            yield sock
+        except Exception:
+            sock.close()
+            with self._lock:
+                self._opened -= 1
+            raise
+        self._idle.put(sock)
+
+    def _open(self):
+        """Opens a new connection to the daemon.
+
+        Returns:
+            socket.socket: The connected socket.
+        """
+        if isinstance(self.address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.connect(self.address)
+        return sock
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import secrets
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from daemon_protocol import DaemonProtocol
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class CryptoDaemon:
+    """
+    Long-running local encryption daemon.
+
+    Keeps one warm HybridCryptosystem per key id and serves the DaemonProtocol
+    over a Unix domain socket (address is a path) or localhost TCP (address is
+    a (host, port) tuple). Requests run in a worker thread pool; a connection
+    can pipeline up to DaemonProtocol.MAX_PIPELINE requests and the responses
+    are sent as soon as each one is ready.
+
+    Engines are only used through encrypt_segment/decrypt_segment and
+    encrypt_many/decrypt_many, which never touch the rotor state, so one
+    engine can serve several workers at once. Engines are created without
+    compression, so ENCRYPT and ENCRYPT_MANY produce the same ciphertext.
+    """
+
+    def __init__(self, address, max_workers: int = None):
+        self.address = address
+        self.protocol = DaemonProtocol()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.engines = {}
+        self.engines_lock = threading.Lock()
+        # Requests handed to the worker pool that no worker has started yet
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def serve(self, ready: threading.Event = None):
+        """Serves connections until the daemon is stopped.
+
+        Args:
+            ready (threading.Event, optional): Set once the daemon accepts connections.
+        """
+        self._loop = asyncio.get_running_loop()
+        if isinstance(self.address, str):
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=self.address
+            )
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(
+                self._handle_connection, host=host, port=port
+            )
+            # Report the bound port when port 0 was requested
+            self.address = self._server.sockets[0].getsockname()[:2]
+        if ready is not None:
+            ready.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def start(self):
+        """Runs the daemon in a background thread and waits until it accepts connections.
+
+        Returns:
+            str | tuple[str, int]: The address the daemon listens on.
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self.serve(ready),), daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+        return self.address
+
+    def stop(self):
+        """Stops a daemon started with start and shuts down the worker pool."""
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join()
+        self.executor.shutdown()
+
+    def stats(self) -> dict:
+        """Returns the daemon metrics.
+
+        Returns:
+            dict: Requests waiting for a worker and engines held.
+        """
+        with self._queued_lock:
+            queued = self._queued
+        with self.engines_lock:
+            engines = len(self.engines)
+        return {"queued": queued, "engines": engines}
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Reads request frames from a connection and answers each one as soon as it completes.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's reader.
+            writer (asyncio.StreamWriter): The connection's writer.
+        """
+        write_lock = asyncio.Lock()
+        slots = asyncio.Semaphore(DaemonProtocol.MAX_PIPELINE)
+        tasks = set()
+        try:
+            while True:
+                try:
+                    (length,) = struct.unpack(">I", await reader.readexactly(4))
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                await slots.acquire()
+                task = asyncio.create_task(
+                    self._respond(body, writer, write_lock, slots)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _respond(
+        self,
+        body: bytes,
+        writer: asyncio.StreamWriter,
+        write_lock: asyncio.Lock,
+        slots: asyncio.Semaphore,
+    ):
+        """Runs one request in the worker pool and writes its response.
+
+        Args:
+            body (bytes): The request frame body.
+            writer (asyncio.StreamWriter): The connection's writer.
+            write_lock (asyncio.Lock): Keeps response frames from interleaving.
+            slots (asyncio.Semaphore): The connection's pipeline slots.
+        """
+        try:
+            op, request_id, key_id, payload = self.protocol.unpack_request(body)
+            with self._queued_lock:
+                self._queued += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._execute, op, key_id, payload
+                )
+                response = self.protocol.pack_response(
+                    DaemonProtocol.OK, request_id, result
+                )
+            except Exception as error:
+                response = self.protocol.pack_response(
+                    DaemonProtocol.ERROR, request_id, str(error).encode("utf-8")
+                )
+            async with write_lock:
+                writer.write(response)
+                await writer.drain()
+        finally:
+            slots.release()
+
+    def _execute(self, op: int, key_id: str, payload: bytes) -> bytes:
+        """Executes one request in a worker thread.
+
+        Args:
+            op (int): The operation code.
+            key_id (str): The key to use.
+            payload (bytes): The operation data.
+
+        Raises:
+            ValueError: If the key id or the operation is unknown.
+
+        Returns:
+            bytes: The response payload.
+        """
+        with self._queued_lock:
+            self._queued -= 1
+        if op == DaemonProtocol.NEW_KEY:
+            engine = HybridCryptosystem()
+            new_key_id = secrets.token_hex(8)
+            with self.engines_lock:
+                self.engines[new_key_id] = engine
+            return new_key_id.encode("ascii")
+
+        if op == DaemonProtocol.DROP_KEY:
+            with self.engines_lock:
+                self.engines.pop(key_id, None)
+            return b""
+
+        engine = self.engines.get(key_id)
+        if engine is None:
+            raise ValueError(f"Unknown key id: {key_id!r}.")
+        if op == DaemonProtocol.ENCRYPT:
+            text = payload.decode("latin-1")
+            return engine.encrypt_segment(text, 0, True).encode("latin-1")
+        if op == DaemonProtocol.DECRYPT:
+            text = payload.decode("latin-1")
+            return engine.decrypt_segment(text, 0, True).encode("latin-1")
+        if op == DaemonProtocol.ENCRYPT_MANY:
+            texts = self.protocol.unpack_texts(payload)
+            return self.protocol.pack_texts(engine.encrypt_many(texts))
+        if op == DaemonProtocol.DECRYPT_MANY:
+            texts = self.protocol.unpack_texts(payload)
+            return self.protocol.pack_texts(engine.decrypt_many(texts))
+        raise ValueError(f"Unknown operation: {op}.")
+
+
+def main():
+    """Command-line entry point: runs the daemon until interrupted."""
+    parser = argparse.ArgumentParser(description="Local hybrid encryption daemon.")
+    parser.add_argument("--socket", help="Unix domain socket path to listen on.")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host to listen on.")
+    parser.add_argument("--port", type=int, default=7878, help="TCP port to listen on.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads.")
+    args = parser.parse_args()
+
+    address = args.socket if args.socket else (args.host, args.port)
+    daemon = CryptoDaemon(address, max_workers=args.workers)
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import struct
+
+
+class DaemonProtocol:
+    """
+    Length-prefixed wire format shared by CryptoDaemon and CryptoClient.
+
+    Every frame is a 4-byte big-endian length followed by the body.
+    Request body:  op (1 byte) | request id (4 bytes) | key id length (1 byte) | key id | payload
+    Response body: status (1 byte) | request id (4 bytes) | payload
+
+    Texts travel as latin-1 bytes. On an error status the payload is the UTF-8
+    error message. Lists of texts (ENCRYPT_MANY, DECRYPT_MANY) are packed as a
+    4-byte count followed by one 4-byte length and the bytes of each text.
+    """
+
+    NEW_KEY = 1
+    DROP_KEY = 2
+    ENCRYPT = 3
+    DECRYPT = 4
+    ENCRYPT_MANY = 5
+    DECRYPT_MANY = 6
+
+    OK = 0
+    ERROR = 1
+
+    # Requests a client may send before reading responses, and the number the
+    # daemon runs at once per connection
+    MAX_PIPELINE = 32
+
+    def pack_request(
+        self, op: int, request_id: int, key_id: str, payload: bytes
+    ) -> bytes:
+        """Packs a request frame.
+
+        Args:
+            op (int): The operation code.
+            request_id (int): The id echoed back in the response.
+            key_id (str): The key to use, or "" for NEW_KEY.
+            payload (bytes): The operation data.
+
+        Returns:
+            bytes: The length-prefixed frame.
+        """
+        key_bytes = key_id.encode("ascii")
+        body = struct.pack(">BIB", op, request_id, len(key_bytes)) + key_bytes + payload
+        return struct.pack(">I", len(body)) + body
+
+    def unpack_request(self, body: bytes) -> tuple[int, int, str, bytes]:
+        """Unpacks a request frame body (without the length prefix).
+
+        Args:
+            body (bytes): The frame body.
+
+        Returns:
+            tuple[int, int, str, bytes]: The op, request id, key id and payload.
+        """
+        op, request_id, key_length = struct.unpack_from(">BIB", body)
+        key_id = body[6 : 6 + key_length].decode("ascii")
+        return op, request_id, key_id, body[6 + key_length :]
+
+    def pack_response(self, status: int, request_id: int, payload: bytes) -> bytes:
+        """Packs a response frame.
+
+        Args:
+            status (int): OK or ERROR.
+            request_id (int): The id of the request being answered.
+            payload (bytes): The result, or the error message.
+
+        Returns:
+            bytes: The length-prefixed frame.
+        """
+        body = struct.pack(">BI", status, request_id) + payload
+        return struct.pack(">I", len(body)) + body
+
+    def unpack_response(self, body: bytes) -> tuple[int, int, bytes]:
+        """Unpacks a response frame body (without the length prefix).
+
+        Args:
+            body (bytes): The frame body.
+
+        Returns:
+            tuple[int, int, bytes]: The status, request id and payload.
+        """
+        status, request_id = struct.unpack_from(">BI", body)
+        return status, request_id, body[5:]
+
+    def pack_texts(self, texts: list[str]) -> bytes:
+        """Packs a list of texts into a payload.
+
+        Args:
+            texts (list[str]): The texts to pack.
+
+        Returns:
+            bytes: The packed payload.
+        """
+        parts = [struct.pack(">I", len(texts))]
+        for text in texts:
+            data = text.encode("latin-1")
+            parts.append(struct.pack(">I", len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    def unpack_texts(self, payload: bytes) -> list[str]:
+        """Unpacks a payload created by pack_texts.
+
+        Args:
+            payload (bytes): The packed payload.
+
+        Returns:
+            list[str]: The texts.
+        """
+        (count,) = struct.unpack_from(">I", payload)
+        position = 4
+        texts = []
+        for _ in range(count):
+            (length,) = struct.unpack_from(">I", payload, position)
+            position += 4
+            texts.append(payload[position : position + length].decode("latin-1"))
+            position += length
+        return texts
+
+    def read_frame(self, sock) -> bytes:
+        """Reads one frame body from a blocking socket.
+
+        Args:
+            sock (socket.socket): The connected socket.
+
+        Raises:
+            ConnectionError: If the connection closes in the middle of a frame.
+
+        Returns:
+            bytes: The frame body.
+        """
+        (length,) = struct.unpack(">I", self._read_exactly(sock, 4))
+        return self._read_exactly(sock, length)
+
+    def _read_exactly(self, sock, size: int) -> bytes:
+        """Reads exactly size bytes from a blocking socket.
+
+        Args:
+            sock (socket.socket): The connected socket.
+            size (int): The number of bytes to read.
+
+        Raises:
+            ConnectionError: If the connection closes first.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed by the daemon.")
+            data += chunk
+        return bytes(data)
@@ -0,0 +1,112 @@
+import threading
+
+
+class DESBlockCache:
+    """
+    Bounded memo cache of 64-bit DES blocks for one key and direction.
+
+    Maps an input block (as an int) to its output block. Holds at most
+    max_entries blocks and evicts the oldest insertion first, which keeps
+    lookups to a single dict access. The lock is taken once per batch, so
+    caches can be shared by threads using the same DESEncryption.
+    """
+
+    def __init__(self, max_entries: int = 65536):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}.")
+        self.max_entries = max_entries
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, block: int):
+        """Returns the cached output of a block.
+
+        Args:
+            block (int): The 64-bit input block.
+
+        Returns:
+            int | None: The output block, or None on a miss.
+        """
+        with self._lock:
+            result = self._blocks.get(block)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, block: int, result: int):
+        """Caches the output of a block.
+
+        Args:
+            block (int): The 64-bit input block.
+            result (int): The 64-bit output block.
+        """
+        with self._lock:
+            self._insert(block, result)
+
+    def crypt_blocks(self, blocks: list[int], crypt_blocks) -> list[int]:
+        """Processes blocks, running crypt_blocks only on the distinct blocks that are not cached.
+
+        Args:
+            blocks (list[int]): The 64-bit input blocks.
+            crypt_blocks (Callable[[list[int]], list[int]]): Computes the output of uncached blocks.
+
+        Returns:
+            list[int]: The output blocks, in order.
+        """
+        with self._lock:
+            cached = self._blocks
+            results = [cached.get(block) for block in blocks]
+        missing = list(
+            {block: None for block, result in zip(blocks, results) if result is None}
+        )
+        computed = dict(zip(missing, crypt_blocks(missing))) if missing else {}
+        with self._lock:
+            self.hits += len(blocks) - len(missing)
+            self.misses += len(missing)
+            for block, result in computed.items():
+                self._insert(block, result)
+        if not computed:
+            return results
+        return [
+            computed[block] if result is None else result
+            for block, result in zip(blocks, results)
+        ]
+
+    def clear(self):
+        """Removes every entry. The statistics are kept."""
+        with self._lock:
+            self._blocks.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache metrics.
+
+        Returns:
+            dict: Entry count, hits, misses, hit rate and evictions.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._blocks),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def _insert(self, block: int, result: int):
+        """Inserts a block, evicting the oldest one when full. Called with the lock held.
+
+        Args:
+            block (int): The 64-bit input block.
+            result (int): The 64-bit output block.
+        """
+        blocks = self._blocks
+        if block not in blocks and len(blocks) >= self.max_entries:
+            del blocks[next(iter(blocks))]
+            self.evictions += 1
+        blocks[block] = result
@@ -1,27 +1,189 @@
+import copy
+import os
+import struct
+import threading
+
 from des_generator import DesGenerator
 from des_permutation import DESPermutation
 from des_bit_converter import DESBitConverter
 from des_parser import DESParser
+from des_block_cache import DESBlockCache
 
 
 class DESEncryption:
-    def __init__(self, key_64bits: str = None, rounds: int = 16):
+    # Blocks unpacked and packed at once by encrypt_into/decrypt_into
+    INTO_WINDOW_BLOCKS = 1024
+    _into_window = struct.Struct(f">{INTO_WINDOW_BLOCKS}Q")
+
+    def __init__(
+        self,
+        key_64bits: str = None,
+        rounds: int = 16,
+        permutation: DESPermutation = None,
+        sbox_tables: list[list[int]] = None,
+        seed=None,
+        block_cache_size: int = 0,
+    ):
         self.rounds = rounds
-        self.permutation = DESPermutation()
         self.bit_converter = DESBitConverter()
         self.parser = DESParser()
-        self.generator = DesGenerator()
-        if key_64bits:
-            if len(key_64bits) != 64:
-                raise ValueError(
-                    f"Key size mismatch: expected 64 bits, got {len(key_64bits)} bits."
-                )
-            self.key_64bits = key_64bits
-        else:
-            self.key_64bits = self._generate_key()
+        if seed is None:
+            # The tables are generated lazily, so an unseeded instance fixes
+            # its entropy now: every thread and forked process sharing it must
+            # see the same tables
+            seed = os.urandom(16).hex()
+        self.generator = DesGenerator(seed)
+        if key_64bits and len(key_64bits) != 64:
+            raise ValueError(
+                f"Key size mismatch: expected 64 bits, got {len(key_64bits)} bits."
+            )
+        # The permutation, key, S-boxes and subkeys that were not supplied are
+        # generated on first use (see _materialize)
+        self._permutation = permutation
+        self._permutation_seed = f"{seed}/permutation"
+        self._key_64bits = key_64bits or None
+        self._sbox_tables = sbox_tables
+        self._subkeys = None
+        self._materialize_lock = threading.Lock()
+        # Incremented whenever key material is assigned, so holders of state
+        # derived from it (fingerprints, key contexts) can tell it changed
+        self.material_version = 0
+        # Integer lookup tables, built on first use by encrypt_blocks/decrypt_blocks
+        self._fast_tables = None
+        # Optional memo caches of blocks seen before, one per direction
+        self.encrypt_cache = None
+        self.decrypt_cache = None
+        if block_cache_size:
+            self.encrypt_cache = DESBlockCache(block_cache_size)
+            self.decrypt_cache = DESBlockCache(block_cache_size)
+
+    @property
+    def permutation(self) -> DESPermutation:
+        """DESPermutation: The permutation tables, generated on first use.
+
+        Assigning new tables derives the subkeys again on next use.
+        """
+        if self._permutation is None:
+            self._materialize()
+        return self._permutation
 
-        self.subkeys = self._generate_subkeys()
-        self.sbox_tables = self._generate_sbox_tables()
+    @permutation.setter
+    def permutation(self, permutation: DESPermutation):
+        with self._materialize_lock:
+            self._permutation = permutation
+            self._invalidate(subkeys=True)
+
+    @property
+    def key_64bits(self) -> str:
+        """str: The 64-bit key in binary format, generated on first use.
+
+        Assigning a new key derives the subkeys again on next use.
+        """
+        if self._key_64bits is None:
+            self._materialize()
+        return self._key_64bits
+
+    @key_64bits.setter
+    def key_64bits(self, key_64bits: str):
+        if key_64bits and len(key_64bits) != 64:
+            raise ValueError(
+                f"Key size mismatch: expected 64 bits, got {len(key_64bits)} bits."
+            )
+        with self._materialize_lock:
+            self._key_64bits = key_64bits or None
+            self._invalidate(subkeys=True)
+
+    @property
+    def sbox_tables(self) -> list[list[int]]:
+        """list[list[int]]: The 8 S-box tables, generated on first use."""
+        if self._sbox_tables is None:
+            self._materialize()
+        return self._sbox_tables
+
+    @sbox_tables.setter
+    def sbox_tables(self, sbox_tables: list[list[int]]):
+        with self._materialize_lock:
+            self._sbox_tables = sbox_tables
+            self._invalidate(subkeys=False)
+
+    @property
+    def subkeys(self) -> list[str]:
+        """list[str]: The 16 subkeys of 48 bits, derived on first use.
+
+        Assigned subkeys are used as given until the key or permutation changes.
+        """
+        if self._subkeys is None:
+            self._materialize()
+        return self._subkeys
+
+    @subkeys.setter
+    def subkeys(self, subkeys: list[str]):
+        with self._materialize_lock:
+            self._subkeys = subkeys
+            self._invalidate(subkeys=False)
+
+    def _materialize(self):
+        """Generates the tables and key that were not supplied, then derives the subkeys.
+
+        The key is drawn before the S-boxes, as it always was, so a seed gives
+        the same material whichever attribute is used first. The lock keeps
+        instances shared between threads from drawing twice.
+        """
+        with self._materialize_lock:
+            if self._permutation is None:
+                self._permutation = DESPermutation(seed=self._permutation_seed)
+            if self._key_64bits is None:
+                self._key_64bits = self._generate_key()
+            if self._sbox_tables is None:
+                self._sbox_tables = self._generate_sbox_tables()
+            if self._subkeys is None:
+                self._subkeys = self._generate_subkeys()
+
+    def _invalidate(self, subkeys: bool):
+        """Drops the state built from the key material after part of it was assigned.
+
+        The integer lookup tables are rebuilt on next use and the block caches
+        start empty. Called with the materialize lock held.
+
+        Args:
+            subkeys (bool): Whether the subkeys are derived again as well.
+        """
+        self.material_version += 1
+        if subkeys:
+            self._subkeys = None
+        self._fast_tables = None
+        # New caches rather than cleared ones: copies may share the old ones
+        if self.encrypt_cache is not None:
+            self.encrypt_cache = DESBlockCache(self.encrypt_cache.max_entries)
+            self.decrypt_cache = DESBlockCache(self.decrypt_cache.max_entries)
+
+    def copy(self):
+        """Returns an independent instance with the same key material.
+
+        The material is generated first if it was not yet, so both instances
+        hold the same tables. The tables, subkeys, integer lookups and block
+        caches are shared; they are never modified in place, and assigning
+        new material to one instance (see the setters) leaves the other as it
+        was. The converter and parser are per instance, so StageTimer can
+        instrument one instance alone.
+
+        Returns:
+            DESEncryption: The new instance.
+        """
+        self._materialize()
+        clone = copy.copy(self)
+        clone.bit_converter = copy.copy(self.bit_converter)
+        clone.parser = copy.copy(self.parser)
+        return clone
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_materialize_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._materialize_lock = threading.Lock()
 
     def _generate_sbox_tables(self) -> list[list[int]]:
         """Returns a list of 8 S-box tables, each containing 64 4-bit integers.
@@ -236,6 +398,15 @@ class DESEncryption:
             str: The encrypted 64-bit block.
         """
 
+        # 0. Look the block up in the block cache
+        cache = self.encrypt_cache
+        cache_key = None
+        if cache is not None and len(block_64bits) == 64:
+            cache_key = int(block_64bits, 2)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return format(cached, "064b")
+
         # 1. Apply initial permutation
         initial_permutation = self.permutation.initial_permutation(block_64bits)
 
@@ -265,8 +436,288 @@ class DESEncryption:
             swapped_block_64bits
         )
 
+        if cache_key is not None:
+            cache.put(cache_key, int(inverse_initial_permutation, 2))
         return inverse_initial_permutation
 
+    def precompute(self):
+        """Builds the integer lookup tables now instead of on first use by encrypt_blocks/decrypt_blocks."""
+        if self._fast_tables is None:
+            self._fast_tables = self._build_fast_tables()
+
+    def _build_fast_tables(self) -> dict:
+        """Precomputes the lookup tables used to encrypt 64-bit integer blocks.
+
+        The permutations become per-byte lookups (see DESPermutation.byte_lookup),
+        and each S-box is combined with the P-box into an SP table that maps a
+        6-bit group straight to its 32-bit contribution after the P-box.
+
+        Raises:
+            ValueError: If the tables or subkeys do not have the standard DES sizes.
+
+        Returns:
+            dict: The lookup tables and the subkeys as integers.
+        """
+        permutation = self.permutation
+        if (
+            len(permutation.initial_permutation_table) != 64
+            or len(permutation.inverse_initial_permutation_table) != 64
+            or len(permutation.expansion_table) != 48
+            or len(permutation.p_box_table) != 32
+        ):
+            raise ValueError("Integer blocks require the standard DES table sizes.")
+        for subkey_48bits in self.subkeys:
+            if len(subkey_48bits) != 48:
+                raise ValueError(
+                    f"Subkey size mismatch: expected 48 bits, got {len(subkey_48bits)} bits."
+                )
+
+        p_box = permutation.byte_lookup(permutation.p_box_table, 32)
+        sp_tables = []
+        for sbox_index, sbox in enumerate(self.sbox_tables):
+            sp_table = []
+            for block_6bits in range(64):
+                # Row from the outer bits, column from the inner four bits
+                row = ((block_6bits >> 4) & 2) | (block_6bits & 1)
+                col = (block_6bits >> 1) & 15
+                sbox_32bits = sbox[row * 16 + col] << (28 - 4 * sbox_index)
+                sp_table.append(
+                    p_box[0][sbox_32bits >> 24]
+                    | p_box[1][(sbox_32bits >> 16) & 255]
+                    | p_box[2][(sbox_32bits >> 8) & 255]
+                    | p_box[3][sbox_32bits & 255]
+                )
+            sp_tables.append(sp_table)
+
+        return {
+            "initial_permutation": permutation.byte_lookup(
+                permutation.initial_permutation_table, 64
+            ),
+            "inverse_initial_permutation": permutation.byte_lookup(
+                permutation.inverse_initial_permutation_table, 64
+            ),
+            "expansion": permutation.byte_lookup(permutation.expansion_table, 32),
+            "sp_tables": sp_tables,
+            "subkeys": [int(subkey_48bits, 2) for subkey_48bits in self.subkeys],
+        }
+
+    def _crypt_blocks(self, blocks: list[int], subkeys: list[int]) -> list[int]:
+        """Runs the DES network over 64-bit integer blocks with the given subkey order.
+
+        This is the integer form of encrypt_block/decrypt_block: the same initial
+        permutation, Feistel rounds, 32-bit swap and inverse initial permutation.
+
+        Args:
+            blocks (list[int]): The 64-bit blocks.
+            subkeys (list[int]): The 48-bit subkeys in the order they are applied.
+
+        Returns:
+            list[int]: The resulting 64-bit blocks.
+        """
+        tables = self._fast_tables
+        ip0, ip1, ip2, ip3, ip4, ip5, ip6, ip7 = tables["initial_permutation"]
+        fp0, fp1, fp2, fp3, fp4, fp5, fp6, fp7 = tables["inverse_initial_permutation"]
+        e0, e1, e2, e3 = tables["expansion"]
+        sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = tables["sp_tables"]
+
+        result = []
+        for block in blocks:
+            # 1. Apply initial permutation
+            block = (
+                ip0[block >> 56]
+                | ip1[(block >> 48) & 255]
+                | ip2[(block >> 40) & 255]
+                | ip3[(block >> 32) & 255]
+                | ip4[(block >> 24) & 255]
+                | ip5[(block >> 16) & 255]
+                | ip6[(block >> 8) & 255]
+                | ip7[block & 255]
+            )
+            # 2. Split into left and right 32 bits
+            left = block >> 32
+            right = block & 0xFFFFFFFF
+
+            # 3. Apply rounds: expansion, XOR with subkey, S-boxes and P-box
+            for subkey in subkeys:
+                xor_48bits = (
+                    e0[right >> 24]
+                    | e1[(right >> 16) & 255]
+                    | e2[(right >> 8) & 255]
+                    | e3[right & 255]
+                ) ^ subkey
+                left, right = right, left ^ (
+                    sp0[xor_48bits >> 42]
+                    | sp1[(xor_48bits >> 36) & 63]
+                    | sp2[(xor_48bits >> 30) & 63]
+                    | sp3[(xor_48bits >> 24) & 63]
+                    | sp4[(xor_48bits >> 18) & 63]
+                    | sp5[(xor_48bits >> 12) & 63]
+                    | sp6[(xor_48bits >> 6) & 63]
+                    | sp7[xor_48bits & 63]
+                )
+
+            # 4. 32-bit swap and inverse initial permutation
+            block = (right << 32) | left
+            result.append(
+                fp0[block >> 56]
+                | fp1[(block >> 48) & 255]
+                | fp2[(block >> 40) & 255]
+                | fp3[(block >> 32) & 255]
+                | fp4[(block >> 24) & 255]
+                | fp5[(block >> 16) & 255]
+                | fp6[(block >> 8) & 255]
+                | fp7[block & 255]
+            )
+        return result
+
+    def encrypt_blocks(self, blocks: list[int]) -> list[int]:
+        """Encrypts many 64-bit blocks given as integers.
+
+        The output is identical to encrypt_block on the equivalent binary strings,
+        but uses precomputed lookup tables instead of bit strings.
+        With block caches (block_cache_size), only blocks that are not cached
+        go through the Feistel network.
+
+        Args:
+            blocks (list[int]): The 64-bit blocks to encrypt.
+
+        Returns:
+            list[int]: The encrypted 64-bit blocks.
+        """
+        if self._fast_tables is None:
+            self._fast_tables = self._build_fast_tables()
+        subkeys = self._fast_tables["subkeys"][: self.rounds]
+        if self.encrypt_cache is not None:
+            return self.encrypt_cache.crypt_blocks(
+                blocks, lambda missing: self._crypt_blocks(missing, subkeys)
+            )
+        return self._crypt_blocks(blocks, subkeys)
+
+    def decrypt_blocks(self, blocks: list[int]) -> list[int]:
+        """Decrypts many 64-bit blocks given as integers, applying the subkeys in reverse order.
+
+        Args:
+            blocks (list[int]): The 64-bit blocks to decrypt.
+
+        Returns:
+            list[int]: The decrypted 64-bit blocks.
+        """
+        if self._fast_tables is None:
+            self._fast_tables = self._build_fast_tables()
+        subkeys = self._fast_tables["subkeys"][self.rounds - 1 :: -1]
+        if self.decrypt_cache is not None:
+            return self.decrypt_cache.crypt_blocks(
+                blocks, lambda missing: self._crypt_blocks(missing, subkeys)
+            )
+        return self._crypt_blocks(blocks, subkeys)
+
+    def encrypt_into(self, src, dst) -> int:
+        """Pads and encrypts bytes into a caller-provided buffer.
+
+        The result is identical to encrypt on the decoded text. The data is
+        copied into dst, padded and then encrypted in place, INTO_WINDOW_BLOCKS
+        blocks at a time, with no per-block bytes or strings. src and dst may
+        be the same buffer.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The plaintext bytes.
+            dst (bytearray | memoryview | mmap.mmap): A writable buffer of at least len(src) bytes rounded up to a whole block.
+
+        Raises:
+            ValueError: If dst is too small.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        source = memoryview(src).cast("B")
+        target = memoryview(dst).cast("B")
+        block_bytes = self.parser.block_size // 8
+        size = len(source)
+        padding_bytes = -size % block_bytes
+        padded_size = size + padding_bytes
+        if len(target) < padded_size:
+            raise ValueError(
+                f"Buffer size mismatch: expected at least {padded_size} bytes, got {len(target)} bytes."
+            )
+        target[:size] = source
+        target[size:padded_size] = bytes([padding_bytes]) * padding_bytes
+        self._crypt_into(target, target, padded_size, self.encrypt_blocks)
+        return padded_size
+
+    def decrypt_into(self, src, dst) -> int:
+        """Decrypts bytes into a caller-provided buffer and removes the padding.
+
+        The result is identical to decrypt on the decoded text. src and dst may
+        be the same buffer.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The ciphertext bytes, a whole number of blocks.
+            dst (bytearray | memoryview | mmap.mmap): A writable buffer of at least len(src) bytes.
+
+        Raises:
+            ValueError: If src is not a whole number of blocks or dst is too small.
+
+        Returns:
+            int: The number of bytes written, without the padding.
+        """
+        source = memoryview(src).cast("B")
+        target = memoryview(dst).cast("B")
+        block_bytes = self.parser.block_size // 8
+        size = len(source)
+        if size % block_bytes != 0:
+            raise ValueError(
+                f"Ciphertext size mismatch: expected a multiple of {block_bytes} bytes, got {size} bytes."
+            )
+        if len(target) < size:
+            raise ValueError(
+                f"Buffer size mismatch: expected at least {size} bytes, got {len(target)} bytes."
+            )
+        self._crypt_into(source, target, size, self.decrypt_blocks)
+        # Same rule as DESParser.remove_padding_bytes
+        padding_value = target[size - 1] if size else 0
+        if (
+            padding_value
+            and padding_value <= size
+            and target[size - padding_value : size]
+            == bytes([padding_value]) * padding_value
+        ):
+            return size - padding_value
+        return size
+
+    def _crypt_into(
+        self, source: memoryview, target: memoryview, size: int, crypt_blocks
+    ):
+        """Runs a block function over the first size bytes of source, writing to target.
+
+        Args:
+            source (memoryview): The input bytes.
+            target (memoryview): The output bytes; may be source.
+            size (int): The number of bytes, a whole number of blocks.
+            crypt_blocks (Callable[[list[int]], list[int]]): encrypt_blocks or decrypt_blocks.
+        """
+        window_bytes = self._into_window.size
+        for begin in range(0, size, window_bytes):
+            if size - begin >= window_bytes:
+                layout = self._into_window
+            else:
+                layout = struct.Struct(f">{(size - begin) // 8}Q")
+            layout.pack_into(
+                target, begin, *crypt_blocks(layout.unpack_from(source, begin))
+            )
+
+    def block_cache_stats(self) -> dict:
+        """Returns the metrics of the block caches.
+
+        Returns:
+            dict: {"encrypt": ..., "decrypt": ...} with DESBlockCache.stats, or empty without block caches.
+        """
+        if self.encrypt_cache is None:
+            return {}
+        return {
+            "encrypt": self.encrypt_cache.stats(),
+            "decrypt": self.decrypt_cache.stats(),
+        }
+
     def encrypt(self, plaintext: str) -> str:
         """Encrypts the given plaintext using DES encryption.
 
@@ -308,6 +759,15 @@ class DESEncryption:
             str: The decrypted 64-bit plaintext block.
         """
 
+        # 0. Look the block up in the block cache
+        cache = self.decrypt_cache
+        cache_key = None
+        if cache is not None and len(block_64bits) == 64:
+            cache_key = int(block_64bits, 2)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return format(cached, "064b")
+
         # 1. Apply initial permutation
         initial_permutation = self.permutation.initial_permutation(block_64bits)
 
@@ -336,6 +796,8 @@ class DESEncryption:
             swapped_block_64bits
         )
 
+        if cache_key is not None:
+            cache.put(cache_key, int(inverse_initial_permutation, 2))
         return inverse_initial_permutation
 
     def decrypt(self, ciphertext: str) -> str:
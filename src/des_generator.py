@@ -1,9 +1,14 @@
+import hashlib
+import os
 from random import Random
 
 
 class DesGenerator:
     def __init__(self, seed=None):
+        self.seed = seed
         self.random_generator = Random(seed)
+        # NumPy generator of the batch functions, created on first use
+        self._bulk_generator = None
 
     def random_all_ascii(self) -> list[str]:
         """Returns all ASCII characters (0-127) shuffled.
@@ -64,3 +69,91 @@ class DesGenerator:
             str: A string of num_bits random bits.
         """
         return format(self.random_generator.getrandbits(num_bits), f"0{num_bits}b")
+
+    def random_keys(self, count: int):
+        """Returns count random 64-bit DES keys at once.
+
+        Without a seed the keys come from os.urandom; with one they are
+        drawn reproducibly from the NumPy generator. format(int(key), "064b")
+        gives the key_64bits of a DESEncryption.
+
+        Args:
+            count (int): The number of keys.
+
+        Returns:
+            numpy.ndarray: A uint64 array of shape (count,).
+        """
+        import numpy as np
+
+        if self.seed is None:
+            return np.frombuffer(bytearray(os.urandom(8 * count)), np.uint64)
+        return self._get_bulk_generator().integers(
+            0, 1 << 64, size=count, dtype=np.uint64
+        )
+
+    def random_sbox_sets(self, count: int):
+        """Returns count sets of 8 S-box tables at once, laid out like DESEncryption._generate_sbox_tables.
+
+        Every table has 4 rows, each a shuffle of 0-15. sets[i].tolist() gives
+        the sbox_tables of a DESEncryption.
+
+        Args:
+            count (int): The number of S-box sets.
+
+        Returns:
+            numpy.ndarray: A uint8 array of shape (count, 8, 64).
+        """
+        return self.random_permutations(count * 8 * 4, 16).reshape(count, 8, 64)
+
+    def random_rotor_wirings(self, count: int, rotors: int = 3):
+        """Returns count sets of rotor wirings at once.
+
+        Every wiring is a shuffle of the ASCII codes 0-127, so
+        [chr(c) for c in wirings[i, r]] is a rotor of a RotorMachine.
+
+        Args:
+            count (int): The number of wiring sets.
+            rotors (int): The number of rotors per set.
+
+        Returns:
+            numpy.ndarray: A uint8 array of shape (count, rotors, 128).
+        """
+        return self.random_permutations(count * rotors, 128).reshape(count, rotors, 128)
+
+    def random_permutations(self, count: int, size: int):
+        """Returns count independent shuffles of range(size) at once.
+
+        Args:
+            count (int): The number of permutations.
+            size (int): The length of each permutation, at most 256.
+
+        Returns:
+            numpy.ndarray: A uint8 array of shape (count, size).
+        """
+        import numpy as np
+
+        if not 0 < size <= 256:
+            raise ValueError(
+                f"Permutation size mismatch: expected 1 to 256, got {size}."
+            )
+        rows = np.broadcast_to(np.arange(size, dtype=np.uint8), (count, size))
+        return self._get_bulk_generator().permuted(rows, axis=1)
+
+    def _get_bulk_generator(self):
+        """Returns the NumPy generator of the batch functions, seeded from this generator's seed.
+
+        NumPy is imported here rather than at module level, so constructing
+        single tables does not pay for it.
+
+        Returns:
+            numpy.random.Generator: The generator.
+        """
+        if self._bulk_generator is None:
+            import numpy as np
+
+            entropy = None
+            if self.seed is not None:
+                digest = hashlib.sha256(str(self.seed).encode("utf-8")).digest()
+                entropy = int.from_bytes(digest, "big")
+            self._bulk_generator = np.random.default_rng(entropy)
+        return self._bulk_generator
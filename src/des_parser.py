@@ -34,8 +34,19 @@ class DESParser:
         blocks_bits = self.split_into_blocks(binary_string)
 
         # 2. Apply padding to last block if needed
-        last_block = blocks_bits[-1]
+        blocks_bits[-1] = self.pad(blocks_bits[-1])
 
+        return blocks_bits
+
+    def pad(self, last_block: str) -> str:
+        """Pads the last block of a message up to self.block_size.
+
+        Args:
+            last_block (str): The (possibly short) last binary block.
+
+        Returns:
+            str: The padded block, or the block unchanged if it is already full.
+        """
         # Calculate missing bits
         missing_bits = self.block_size - len(last_block)
 
@@ -48,9 +59,9 @@ class DESParser:
             padding_byte = format(padding_byte_value, "08b")
             padding = padding_byte * padding_bytes
 
-            blocks_bits[-1] = last_block + padding
+            return last_block + padding
 
-        return blocks_bits
+        return last_block
 
     def deparse(self, blocks_bits: list[str]) -> str:
         """
@@ -77,6 +88,21 @@ class DESParser:
                 )
         # 1. Combine blocks
         combined = "".join(blocks_bits)
+        return self.remove_padding(combined)
+
+    def remove_padding(self, combined: str) -> str:
+        """Removes the padding from the end of a combined binary string.
+
+        Only the last 255 bytes can ever be padding, so callers that stream
+        blocks may pass just that tail of the message.
+
+        Args:
+            combined (str): The combined binary string.
+
+        Returns:
+            str: The binary string with the padding removed, or the original
+                 string if padding is invalid or not present.
+        """
         if len(combined) < 8:
             return combined
 
@@ -94,3 +120,33 @@ class DESParser:
         else:
             # If padding is not correct, return the original string
             return combined
+
+    def pad_bytes(self, data: bytes) -> bytes:
+        """Byte form of parse's padding: pads data up to a whole number of blocks.
+
+        Args:
+            data (bytes): The data to pad.
+
+        Returns:
+            bytes: The padded data, or the data unchanged if it is already a whole
+                   number of blocks.
+        """
+        padding_bytes = -len(data) % (self.block_size // 8)
+        return data + bytes([padding_bytes]) * padding_bytes
+
+    def remove_padding_bytes(self, data: bytes) -> bytes:
+        """Byte form of remove_padding.
+
+        Args:
+            data (bytes): The data to remove the padding from.
+
+        Returns:
+            bytes: The data with the padding removed, or the original data if
+                   padding is invalid or not present.
+        """
+        if not data:
+            return data
+        padding_value = data[-1]
+        if padding_value and data.endswith(bytes([padding_value]) * padding_value):
+            return data[:-padding_value]
+        return data
@@ -13,9 +13,10 @@ class DESPermutation:
         ] = None,  # NOTE I am assuming that first 56 indexes are the key bits and last 8 indexes are parity bits.
         permuted_choice_2_table: list[int] = None,
         p_box_table: list[int] = None,
+        seed=None,
     ):
         # DES Initial Permutation table 0-index tables
-        self.generator = DesGenerator()
+        self.generator = DesGenerator(seed)
 
         # initial_permutation_table: 64
         if initial_permutation_table is not None:
@@ -193,3 +194,30 @@ class DESPermutation:
                 f"Block size mismatch: expected 64 bits, got {len(block_64bits)} bits."
             )
         return self.permutate(block_64bits, self.inverse_initial_permutation_table)
+
+    def byte_lookup(self, table: list[int], input_bits: int) -> list[list[int]]:
+        """Builds per-byte lookup tables to apply a permutation to an integer block.
+
+        The block is read most significant byte first, matching the bit order of
+        the binary strings. For input byte b with value v, lookup[b][v] holds the
+        output bits contributed by v, so permutating an integer is the OR of one
+        lookup per input byte.
+
+        Args:
+            table (list[int]): The permutation table.
+            input_bits (int): The size of the input block in bits (a multiple of 8).
+
+        Returns:
+            list[list[int]]: input_bits // 8 lookup tables of 256 integers each.
+        """
+        output_bits = len(table)
+        lookup = [[0] * 256 for _ in range(input_bits // 8)]
+        for output_position, input_position in enumerate(table):
+            byte_index, bit_index = divmod(input_position, 8)
+            output_bit = 1 << (output_bits - 1 - output_position)
+            input_bit = 1 << (7 - bit_index)
+            byte_lookup = lookup[byte_index]
+            for value in range(256):
+                if value & input_bit:
+                    byte_lookup[value] |= output_bit
+        return lookup
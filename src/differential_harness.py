@@ -0,0 +1,562 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+
+from async_hybrid_cryptosystem import AsyncHybridCryptosystem
+from des_encryption import DESEncryption
+from des_generator import DesGenerator
+from des_permutation import DESPermutation
+from hybrid_cryptosystem import HybridCryptosystem
+from rotor_machine import RotorMachine
+
+
+class DifferentialHarness:
+    """
+    Checks that every engine is bit-identical to the reference implementation.
+
+    The references are RotorMachine.encrypt/decrypt (one encrypt_char call
+    per character), DESEncryption.encrypt/decrypt (bit strings through
+    encrypt_block) and, for the hybrid layer, the two chained. Every
+    registered engine belongs to one layer and is compared with its
+    reference in both directions: encrypting the plaintext and decrypting
+    the reference ciphertext.
+
+    Each case has its own random DESPermutation tables, S-boxes, key and
+    rotor wirings, reproducible from the seed and the case index, and runs
+    payloads of random and edge-case sizes (around the block size, empty)
+    with characters outside the rotor alphabet (128-255) and tails that look
+    like DESParser padding. An engine stops at its first divergence, which is
+    minimized by removing characters from the plaintext while the outputs
+    still differ, and reported with a snippet that reproduces it.
+
+    Every engine, and every reference, also gets a throughput column: the
+    bytes it processed over the time it spent, so speed and correctness are
+    tracked together.
+    """
+
+    LAYERS = ["rotor", "des", "hybrid"]
+
+    # Sizes around the block and padding boundaries, drawn for every other payload
+    EDGE_SIZES = [0, 1, 7, 8, 9, 15, 16, 17, 63, 64, 65, 255, 256, 257]
+
+    # Checks spent minimizing one divergence
+    MAX_MINIMIZE_CHECKS = 200
+
+    def __init__(
+        self,
+        engines: list[str] = None,
+        cases: int = 4,
+        payloads: int = 8,
+        max_size: int = 768,
+        seed: int = 0,
+    ):
+        self.cases = cases
+        self.payloads = payloads
+        self.max_size = max_size
+        self.seed = seed
+        self.registry = self.engines()
+        if engines is None:
+            engines = list(self.registry)
+        unknown = [name for name in engines if name not in self.registry]
+        if unknown:
+            raise ValueError(f"Unknown engines: {', '.join(unknown)}.")
+        self.selected = list(engines)
+
+    def engines(self) -> dict:
+        """Returns the built-in engines.
+
+        Returns:
+            dict[str, tuple[str, Callable | None, Callable, Callable]]: Per name, the
+            layer, a function building the engine's object from a case (None for a
+            plain HybridCryptosystem), and the encrypt and decrypt functions taking
+            that object and a text.
+        """
+
+        def into(crypt, padded):
+            def run(engine, text):
+                src = text.encode("latin-1")
+                dst = bytearray(len(src) + (-len(src) % 8 if padded else 0))
+                size = crypt(engine)(src, dst)
+                return dst[:size].decode("latin-1")
+
+            return run
+
+        def split(crypt, size):
+            def run(engine, text):
+                return "".join(
+                    [
+                        crypt(engine)(text[start : start + size], start)
+                        for start in range(0, len(text), size)
+                    ]
+                )
+
+            return run
+
+        def segments(crypt):
+            def run(engine, text):
+                size = engine.min_segment_size()
+                return "".join(
+                    [
+                        crypt(engine)(*segment)
+                        for segment in engine.split_segments(text, size)
+                    ]
+                )
+
+            return run
+
+        def front_end(engine):
+            return AsyncHybridCryptosystem(engine, chunk_size=engine.min_segment_size())
+
+        return {
+            "rotor.encrypt_segment": (
+                "rotor",
+                None,
+                lambda engine, M: engine.rotor_machine.encrypt_segment(M, 0),
+                lambda engine, M: engine.rotor_machine.decrypt_segment(M, 0),
+            ),
+            # Segments of 7 characters start at every rotor offset
+            "rotor.encrypt_segment.split": (
+                "rotor",
+                None,
+                split(lambda engine: engine.rotor_machine.encrypt_segment, 7),
+                split(lambda engine: engine.rotor_machine.decrypt_segment, 7),
+            ),
+            "rotor.encrypt_many": (
+                "rotor",
+                None,
+                lambda engine, M: engine.rotor_machine.encrypt_many([M])[0],
+                lambda engine, M: engine.rotor_machine.decrypt_many([M])[0],
+            ),
+            "rotor.encrypt_into": (
+                "rotor",
+                None,
+                into(lambda engine: engine.rotor_machine.encrypt_into, False),
+                into(lambda engine: engine.rotor_machine.decrypt_into, False),
+            ),
+            "des.encrypt_into": (
+                "des",
+                None,
+                into(lambda engine: engine.des.encrypt_into, True),
+                into(lambda engine: engine.des.decrypt_into, True),
+            ),
+            "des.encrypt_into.block_cache": (
+                "des",
+                lambda case: self.cryptosystem(case, block_cache_size=64),
+                into(lambda engine: engine.des.encrypt_into, True),
+                into(lambda engine: engine.des.decrypt_into, True),
+            ),
+            "des.segment": (
+                "des",
+                None,
+                lambda engine, M: engine.des_encrypt_segment(M, 0, True),
+                lambda engine, M: engine.des_decrypt_segment(M, 0, True),
+            ),
+            "hybrid.encrypt": (
+                "hybrid",
+                None,
+                lambda engine, M: engine.encrypt(M),
+                lambda engine, M: engine.decrypt(M),
+            ),
+            "hybrid.encrypt_segment.split": (
+                "hybrid",
+                None,
+                segments(lambda engine: engine.encrypt_segment),
+                segments(lambda engine: engine.decrypt_segment),
+            ),
+            "hybrid.encrypt_many": (
+                "hybrid",
+                None,
+                lambda engine, M: engine.encrypt_many([M])[0],
+                lambda engine, M: engine.decrypt_many([M])[0],
+            ),
+            "hybrid.encrypt_into": (
+                "hybrid",
+                None,
+                into(lambda engine: engine.encrypt_into, True),
+                into(lambda engine: engine.decrypt_into, True),
+            ),
+            "hybrid.key_bundle": (
+                "hybrid",
+                lambda case: HybridCryptosystem.from_key_bundle(
+                    self.cryptosystem(case).to_key_bundle()
+                ),
+                lambda engine, M: engine.encrypt(M),
+                lambda engine, M: engine.decrypt(M),
+            ),
+            "key_context.encrypt": (
+                "hybrid",
+                None,
+                lambda engine, M: engine.key_context().encrypt(M),
+                lambda engine, M: engine.key_context().decrypt(M),
+            ),
+            "key_context.encrypt_parallel": (
+                "hybrid",
+                None,
+                lambda engine, M: engine.key_context().encrypt_parallel(
+                    M, chunk_size=engine.min_segment_size()
+                ),
+                lambda engine, M: engine.key_context().decrypt_parallel(
+                    M, chunk_size=engine.min_segment_size()
+                ),
+            ),
+            "async.encrypt": (
+                "hybrid",
+                None,
+                lambda engine, M: asyncio.run(front_end(engine).encrypt(M)),
+                lambda engine, M: asyncio.run(front_end(engine).decrypt(M)),
+            ),
+        }
+
+    def register(self, name: str, layer: str, encrypt, decrypt, build=None):
+        """Adds an engine and selects it.
+
+        Args:
+            name (str): The engine name.
+            layer (str): rotor, des or hybrid: the reference it is compared with.
+            encrypt (Callable[[object, str], str]): Encrypts a text with the engine.
+            decrypt (Callable[[object, str], str]): Decrypts a text with the engine.
+            build (Callable[[dict], object], optional): Builds the engine from a case,
+                a plain HybridCryptosystem (see cryptosystem) if None.
+
+        Raises:
+            ValueError: If layer is not a layer.
+        """
+        if layer not in self.LAYERS:
+            raise ValueError(
+                f"Unknown layer: expected one of {', '.join(self.LAYERS)}, got {layer!r}."
+            )
+        self.registry[name] = (layer, build, encrypt, decrypt)
+        if name not in self.selected:
+            self.selected.append(name)
+
+    def case(self, index: int) -> dict:
+        """Generates the key material of a case.
+
+        Args:
+            index (int): The case index.
+
+        Returns:
+            dict: The index, 64-bit key, S-box tables, rotor wirings and the seed of the
+            DESPermutation tables.
+        """
+        generator = DesGenerator(f"{self.seed}/{index}")
+        wirings = generator.random_rotor_wirings(1)[0].tolist()
+        return {
+            "index": index,
+            "key_64bits": format(int(generator.random_keys(1)[0]), "064b"),
+            "sbox_tables": generator.random_sbox_sets(1)[0].tolist(),
+            "rotors": [[chr(code) for code in wiring] for wiring in wirings],
+            "permutation_seed": f"{self.seed}/{index}/permutation",
+        }
+
+    def cryptosystem(self, case: dict, block_cache_size: int = 0) -> HybridCryptosystem:
+        """Builds a new HybridCryptosystem from the key material of a case.
+
+        Args:
+            case (dict): A case from case.
+            block_cache_size (int): The DES block cache size.
+
+        Returns:
+            HybridCryptosystem: The cryptosystem.
+        """
+        des = DESEncryption(
+            case["key_64bits"],
+            permutation=DESPermutation(seed=case["permutation_seed"]),
+            sbox_tables=case["sbox_tables"],
+            block_cache_size=block_cache_size,
+        )
+        return HybridCryptosystem(rotor_machine=RotorMachine(*case["rotors"]), des=des)
+
+    def payload(self, index: int, number: int) -> str:
+        """Generates a plaintext of a case.
+
+        Args:
+            index (int): The case index.
+            number (int): The payload number within the case.
+
+        Returns:
+            str: The plaintext, with characters 0-255.
+        """
+        rng = random.Random(f"{self.seed}/{index}/{number}")
+        if number % 2 == 0:
+            size = rng.choice(self.EDGE_SIZES)
+        else:
+            size = rng.randint(0, self.max_size)
+        # One character in five is outside the rotor alphabet
+        M = "".join(
+            [
+                chr(
+                    rng.randrange(128, 256)
+                    if rng.random() < 0.2
+                    else rng.randrange(128)
+                )
+                for _ in range(size)
+            ]
+        )
+        if size and rng.random() < 0.5:
+            # A tail the padding check accepts
+            count = rng.randint(1, min(size, 8))
+            M = M[:-count] + chr(count) * count
+        return M
+
+    def run(self) -> dict:
+        """Runs every selected engine on every case and payload.
+
+        Returns:
+            dict: The Python version, settings, one result per reference and engine
+            (layer, checks, bytes, seconds, MB/s and its first divergence, if any) and
+            the first divergence found.
+        """
+        results = {
+            name: {
+                "engine": name,
+                "layer": (
+                    name.partition(".")[2]
+                    if name.startswith("reference.")
+                    else self.registry[name][0]
+                ),
+                "checks": 0,
+                "bytes": 0,
+                "seconds": 0.0,
+                "divergence": None,
+            }
+            for name in [f"reference.{layer}" for layer in self.LAYERS] + self.selected
+        }
+        first_divergence = None
+        clock = time.perf_counter
+        for index in range(self.cases):
+            case = self.case(index)
+            reference = self.cryptosystem(case)
+            engines = {name: self._build(name, case) for name in self.selected}
+            for number in range(self.payloads):
+                M = self.payload(index, number)
+                expected = {}
+                for name in self.selected:
+                    result = results[name]
+                    if result["divergence"] is not None:
+                        continue
+                    layer, build, encrypt, decrypt = self.registry[name]
+                    if layer not in expected:
+                        began = clock()
+                        expected[layer] = self._reference(layer, reference, M)
+                        reference_result = results[f"reference.{layer}"]
+                        reference_result["seconds"] += clock() - began
+                        reference_result["bytes"] += len(M) + len(expected[layer][0])
+                        reference_result["checks"] += 2
+                    ciphertext, plaintext = expected[layer]
+                    for operation, function, text, wanted in [
+                        ("encrypt", encrypt, M, ciphertext),
+                        ("decrypt", decrypt, ciphertext, plaintext),
+                    ]:
+                        began = clock()
+                        output = self._call(function, engines[name], text)
+                        result["seconds"] += clock() - began
+                        result["bytes"] += len(text)
+                        result["checks"] += 1
+                        if output != wanted:
+                            result["divergence"] = self._divergence(
+                                name, case, operation, M
+                            )
+                            if first_divergence is None:
+                                first_divergence = result["divergence"]
+                            break
+        for result in results.values():
+            seconds = result["seconds"]
+            result["mb_per_s"] = result["bytes"] / seconds / 1e6 if seconds else None
+        return {
+            "python": platform.python_version(),
+            "seed": self.seed,
+            "cases": self.cases,
+            "payloads": self.payloads,
+            "results": list(results.values()),
+            "first_divergence": first_divergence,
+        }
+
+    def check(self, name: str, case: dict, operation: str, M: str):
+        """Compares one engine with its reference on one plaintext, with new instances.
+
+        Args:
+            name (str): The engine name.
+            case (dict): A case from case.
+            operation (str): "encrypt" compares the ciphertexts of M, "decrypt" the
+                decryptions of the reference ciphertext of M.
+            M (str): The plaintext.
+
+        Returns:
+            dict | None: The expected and actual outputs if they differ, otherwise None.
+        """
+        layer, build, encrypt, decrypt = self.registry[name]
+        ciphertext, plaintext = self._reference(layer, self.cryptosystem(case), M)
+        engine = self._build(name, case)
+        if operation == "encrypt":
+            expected, actual = ciphertext, self._call(encrypt, engine, M)
+        else:
+            expected, actual = plaintext, self._call(decrypt, engine, ciphertext)
+        return None if actual == expected else {"expected": expected, "actual": actual}
+
+    def _build(self, name: str, case: dict):
+        """Builds an engine's object for a case.
+
+        Args:
+            name (str): The engine name.
+            case (dict): A case from case.
+
+        Returns:
+            object: What the engine's functions take.
+        """
+        build = self.registry[name][1]
+        return self.cryptosystem(case) if build is None else build(case)
+
+    def _divergence(self, name: str, case: dict, operation: str, M: str) -> dict:
+        """Minimizes a diverging plaintext and describes the divergence.
+
+        Characters are removed in ever smaller chunks, keeping every removal
+        after which the outputs still differ (delta debugging), for at most
+        MAX_MINIMIZE_CHECKS checks.
+
+        Args:
+            name (str): The engine name.
+            case (dict): A case from case.
+            operation (str): "encrypt" or "decrypt".
+            M (str): The diverging plaintext.
+
+        Returns:
+            dict: The engine, operation, case index, original and minimized plaintext
+            lengths, the minimized plaintext, the expected and actual outputs on it and
+            a Python snippet reproducing it.
+        """
+        checks = 0
+        chunks = 2
+        minimized = M
+        while len(minimized) > 1 and checks < self.MAX_MINIMIZE_CHECKS:
+            chunk = -(-len(minimized) // chunks)
+            for start in range(0, len(minimized), chunk):
+                candidate = minimized[:start] + minimized[start + chunk :]
+                checks += 1
+                if self.check(name, case, operation, candidate) is not None:
+                    minimized = candidate
+                    chunks = max(chunks - 1, 2)
+                    break
+                if checks >= self.MAX_MINIMIZE_CHECKS:
+                    break
+            else:
+                if chunk == 1:
+                    break
+                chunks = min(chunks * 2, len(minimized))
+        outputs = self.check(name, case, operation, minimized) or self.check(
+            name, case, operation, M
+        )
+        if outputs is None:
+            # Diverged only with the state left by earlier payloads
+            minimized = M
+            outputs = {"expected": None, "actual": None}
+        reproducer = (
+            "from differential_harness import DifferentialHarness\n"
+            f"harness = DifferentialHarness(seed={self.seed!r})\n"
+        )
+        if name not in self.engines():
+            reproducer += f"# Register {name!r} on harness first\n"
+        reproducer += f"print(harness.check({name!r}, harness.case({case['index']}), {operation!r}, {minimized!r}))"
+        return {
+            "engine": name,
+            "operation": operation,
+            "case": case["index"],
+            "size": len(M),
+            "minimized_size": len(minimized),
+            "plaintext": minimized,
+            "expected": outputs["expected"],
+            "actual": outputs["actual"],
+            "reproducer": reproducer,
+        }
+
+    @staticmethod
+    def _reference(
+        layer: str, reference: HybridCryptosystem, M: str
+    ) -> tuple[str, str]:
+        """Runs the reference of a layer.
+
+        Args:
+            layer (str): rotor, des or hybrid.
+            reference (HybridCryptosystem): The reference instance of the case.
+            M (str): The plaintext.
+
+        Returns:
+            tuple[str, str]: The ciphertext of M and the decryption of that ciphertext.
+        """
+        rotor_machine = reference.rotor_machine
+        des = reference.des
+        if layer == "rotor":
+            ciphertext = rotor_machine.encrypt(M)
+            return ciphertext, rotor_machine.decrypt(ciphertext)
+        if layer == "des":
+            ciphertext = des.encrypt(M)
+            return ciphertext, des.decrypt(ciphertext)
+        ciphertext = des.encrypt(rotor_machine.encrypt(M))
+        return ciphertext, rotor_machine.decrypt(des.decrypt(ciphertext))
+
+    @staticmethod
+    def _call(function, engine, text: str) -> str:
+        """Runs an engine function, turning an exception into a distinct output.
+
+        Args:
+            function (Callable[[object, str], str]): The engine function.
+            engine (object): The engine's object.
+            text (str): The input.
+
+        Returns:
+            str: The output, or the exception type and message.
+        """
+        try:
+            return function(engine, text)
+        except Exception as error:
+            return f"<{type(error).__name__}: {error}>"
+
+
+def main():
+    """Command-line entry point: runs the harness, prints a table and the first divergence, and optionally writes JSON."""
+    parser = argparse.ArgumentParser(description="Differential equivalence harness.")
+    parser.add_argument("--engines", nargs="+", help="Engines to check (default: all).")
+    parser.add_argument(
+        "--cases", type=int, default=4, help="Random key material sets."
+    )
+    parser.add_argument("--payloads", type=int, default=8, help="Payloads per case.")
+    parser.add_argument(
+        "--max-size", type=int, default=768, help="Largest random payload size."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Case and payload seed.")
+    parser.add_argument("--output", help="JSON file to write the report to.")
+    args = parser.parse_args()
+
+    report = DifferentialHarness(
+        args.engines, args.cases, args.payloads, args.max_size, args.seed
+    ).run()
+    print(f"{'engine':<32} {'layer':<7} {'checks':>7} {'MB/s':>9}  status")
+    for result in report["results"]:
+        mb_per_s = "-" if result["mb_per_s"] is None else f"{result['mb_per_s']:.4f}"
+        divergence = result["divergence"]
+        status = (
+            "ok"
+            if divergence is None
+            else f"DIVERGED on {divergence['operation']} (case {divergence['case']}, {divergence['minimized_size']} of {divergence['size']} bytes)"
+        )
+        print(
+            f"{result['engine']:<32} {result['layer']:<7} {result['checks']:>7} {mb_per_s:>9}  {status}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    divergence = report["first_divergence"]
+    if divergence is not None:
+        print(f"\nFirst divergence: {divergence['engine']} {divergence['operation']}")
+        print(f"expected: {divergence['expected']!r}")
+        print(f"actual:   {divergence['actual']!r}")
+        print(f"reproducer:\n{divergence['reproducer']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,16 @@
+import copy
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from ciphertext_cache import CiphertextCache
+from compression_stage import CompressionStage
 from des_encryption import DESEncryption
+from des_permutation import DESPermutation
+from key_bundle import KeyBundle
+from key_context import KeyContext
 from rotor_machine import RotorMachine
 
 
@@ -10,19 +22,300 @@ class HybridCryptosystem:
     with the block cipher strength of DESEncryption (Layer 2) for enhanced security.
     Encryption flow: Plaintext -> RotorMachine -> DESEncryption -> Ciphertext (M -> E1 -> E2).
     Decryption flow (Inverse Key): Ciphertext -> DESEncryption -> RotorMachine -> Plaintext (M -> D1 -> D2).
+
+    With a CompressionStage, encrypt, encrypt_many and the key context compress
+    the plaintext before the rotor layer, and the matching decrypt functions
+    decompress after it. The segment, iterator and into functions always work
+    on the text as given.
     """
 
-    def __init__(self):
-        self.rotor_machine = RotorMachine()
-        self.des = DESEncryption()
+    # Number of decrypted bytes held back until the padding can be checked.
+    # The padding value is a single byte, so it never covers more than 255 bytes.
+    MAX_PADDING_BYTES = 255
+
+    # Warm prototypes of recently loaded key bundles, shared by from_key_bundle
+    BUNDLE_CACHE_SIZE = 128
+    _bundle_cache = OrderedDict()
+    _bundle_cache_lock = threading.Lock()
+    _bundle_cache_hits = 0
+    _bundle_cache_misses = 0
+
+    def __init__(
+        self,
+        keep_intermediates: bool = False,
+        rotor_machine: RotorMachine = None,
+        des: DESEncryption = None,
+        seed=None,
+        cache: CiphertextCache = None,
+        compression: CompressionStage = None,
+    ):
+        # Without a rotor machine, one is generated on first use (see the
+        # property) from entropy fixed now, like the DES tables
+        self._rotor_machine = rotor_machine
+        self._rotor_seed = f"{os.urandom(16).hex() if seed is None else seed}/rotor"
+        if des is not None:
+            self.des = des
+        else:
+            self.des = DESEncryption(seed=None if seed is None else f"{seed}/des")
+        # With a seed, both layers are generated reproducibly from it
+        self.seed = seed if rotor_machine is None and des is None else None
+        self.keep_intermediates = keep_intermediates
+        # Optional memo cache of encrypt/decrypt results, unused with keep_intermediates
+        self.cache = cache
+        # Optional compress-before-encrypt stage
+        self.compression = compression
+        self._fingerprint = None
+        self._key_context = None
+        self.block_bytes = self.des.parser.block_size // 8
         self.E1 = None
         self.E2 = None
         self.D1 = None
         self.D2 = None
 
+    @property
+    def seed(self):
+        """int | str | None: The seed both layers were generated from.
+
+        None when the layers were supplied, and from the moment new DES key
+        material is assigned, since the seed no longer reproduces it.
+        """
+        seeded = self._seeded
+        if seeded is not None and (
+            seeded[0] is not self.des or seeded[1] != self.des.material_version
+        ):
+            self._seeded = seeded = None
+        return None if seeded is None else seeded[2]
+
+    @seed.setter
+    def seed(self, seed):
+        # The DES layer and material version the seed describes
+        self._seeded = (
+            None if seed is None else (self.des, self.des.material_version, seed)
+        )
+
+    @property
+    def rotor_machine(self) -> RotorMachine:
+        """RotorMachine: Layer 1, generated on first use unless one was supplied."""
+        if self._rotor_machine is None:
+            self._rotor_machine = RotorMachine(seed=self._rotor_seed)
+        return self._rotor_machine
+
+    def key_material(self) -> dict:
+        """Returns everything that defines this instance's encryption.
+
+        Returns:
+            dict: The rotor wirings, DES key, rounds, permutation tables and S-boxes.
+        """
+        permutation = self.des.permutation
+        material = {
+            "rotor1": self.rotor_machine.rotor1_original,
+            "rotor2": self.rotor_machine.rotor2_original,
+            "rotor3": self.rotor_machine.rotor3_original,
+            "key_64bits": self.des.key_64bits,
+            "rounds": self.des.rounds,
+            "sbox_tables": self.des.sbox_tables,
+        }
+        for table_name in KeyBundle.TABLE_NAMES:
+            material[table_name] = getattr(permutation, table_name)
+        # PC-1 keeps its 8 parity indexes separately
+        material["permuted_choice_1_table"] = (
+            permutation.permuted_choice_1_table
+            + permutation.permuted_choice_1_parity_bits_table
+        )
+        return material
+
+    def fingerprint(self) -> bytes:
+        """Returns a digest identifying this instance's key material.
+
+        The digest is kept until the DES layer or its material_version changes.
+
+        Returns:
+            bytes: The SHA-256 digest of the key bundle.
+        """
+        des = self.des
+        cached = self._fingerprint
+        if cached is None or cached[0] is not des or cached[1] != des.material_version:
+            digest = hashlib.sha256(self.to_key_bundle()).digest()
+            self._fingerprint = cached = (des, des.material_version, digest)
+        return cached[2]
+
+    def to_key_bundle(self) -> bytes:
+        """Exports the key material as a compact key bundle (see KeyBundle).
+
+        Instances generated from a seed export the seed form, others (and seeded
+        instances whose DES key material was reassigned) the material form.
+
+        Returns:
+            bytes: The key bundle.
+        """
+        if self.seed is not None:
+            return KeyBundle().pack_seed(self.seed)
+        return KeyBundle().pack(self.key_material())
+
+    @classmethod
+    def from_key_bundle(cls, bundle: bytes, keep_intermediates: bool = False):
+        """Rebuilds an instance from a key bundle.
+
+        The first load of a bundle in a process builds a warm prototype with all
+        lookup tables precomputed; later loads copy it (see copy), so they skip
+        both the parsing and the table construction.
+
+        Args:
+            bundle (bytes): A key bundle from to_key_bundle.
+            keep_intermediates (bool): Whether the new instance retains E1, E2, D1 and D2.
+
+        Returns:
+            HybridCryptosystem: An instance with the bundle's key material.
+        """
+        digest = hashlib.sha256(bundle).digest()
+        with cls._bundle_cache_lock:
+            prototype = cls._bundle_cache.get(digest)
+            if prototype is not None:
+                cls._bundle_cache.move_to_end(digest)
+                HybridCryptosystem._bundle_cache_hits += 1
+            else:
+                HybridCryptosystem._bundle_cache_misses += 1
+        if prototype is None:
+            prototype = cls._from_material(KeyBundle().unpack(bundle))
+            prototype.precompute()
+            with cls._bundle_cache_lock:
+                cls._bundle_cache[digest] = prototype
+                if len(cls._bundle_cache) > cls.BUNDLE_CACHE_SIZE:
+                    cls._bundle_cache.popitem(last=False)
+        return prototype.copy(keep_intermediates)
+
+    @classmethod
+    def bundle_cache_stats(cls) -> dict:
+        """Returns the metrics of the from_key_bundle prototype cache.
+
+        Returns:
+            dict: Entry count, hits, misses and hit rate.
+        """
+        with cls._bundle_cache_lock:
+            hits = HybridCryptosystem._bundle_cache_hits
+            misses = HybridCryptosystem._bundle_cache_misses
+            return {
+                "entries": len(cls._bundle_cache),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+
+    @classmethod
+    def _from_material(cls, material: dict):
+        """Builds an instance from unpacked key bundle contents.
+
+        Args:
+            material (dict): {"seed": seed} or the key material.
+
+        Returns:
+            HybridCryptosystem: The new instance.
+        """
+        if "seed" in material:
+            return cls(seed=material["seed"])
+        permutation = DESPermutation(
+            *[material[table_name] for table_name in KeyBundle.TABLE_NAMES]
+        )
+        des = DESEncryption(
+            key_64bits=material["key_64bits"],
+            rounds=material["rounds"],
+            permutation=permutation,
+            sbox_tables=material["sbox_tables"],
+        )
+        rotor_machine = RotorMachine(
+            material["rotor1"], material["rotor2"], material["rotor3"]
+        )
+        return cls(rotor_machine=rotor_machine, des=des)
+
+    def precompute(self):
+        """Builds the lookup tables of both layers now instead of on first use."""
+        self.rotor_machine.precompute()
+        self.des.precompute()
+
+    def key_context(self) -> KeyContext:
+        """Returns the immutable key context of this instance, for use from many threads.
+
+        encrypt and decrypt step this instance's rotors and store intermediates,
+        so an instance must not be shared between threads; its key context can.
+
+        Returns:
+            KeyContext: The key context, built on first use and again after the
+            DES layer or its material_version changed.
+        """
+        des = self.des
+        cached = self._key_context
+        if cached is None or cached[0] is not des or cached[1] != des.material_version:
+            self._key_context = cached = (des, des.material_version, KeyContext(self))
+        return cached[2]
+
+    def copy(self, keep_intermediates: bool = None):
+        """Returns a new instance with the same key material in its reset state.
+
+        The read-only tables and lookups are shared with this instance; the
+        rotor state and the DES layer object are per instance (see
+        DESEncryption.copy), so assigning new key material to one instance
+        leaves the other unchanged.
+
+        Args:
+            keep_intermediates (bool, optional): Defaults to this instance's setting.
+
+        Returns:
+            HybridCryptosystem: The new instance.
+        """
+        if keep_intermediates is None:
+            keep_intermediates = self.keep_intermediates
+        rotor_machine = copy.copy(self.rotor_machine)
+        rotor_machine.reset_rotors()
+        clone = HybridCryptosystem(
+            keep_intermediates,
+            rotor_machine=rotor_machine,
+            des=self.des.copy(),
+            cache=self.cache,
+            compression=self.compression,
+        )
+        clone.seed = self.seed
+        if self._fingerprint is not None:
+            clone._fingerprint = (clone.des,) + self._fingerprint[1:]
+        return clone
+
+    def __reduce__(self):
+        """Pickles the instance as its key bundle, so process pools ship about 1 KB.
+
+        The compression settings are pickled along with it; the intermediate
+        results, rotor state and cache are not.
+        """
+        compression = None if self.compression is None else self.compression.settings()
+        return (
+            HybridCryptosystem._from_pickle,
+            (self.to_key_bundle(), self.keep_intermediates, compression),
+        )
+
+    @classmethod
+    def _from_pickle(
+        cls, bundle: bytes, keep_intermediates: bool, compression: bytes = None
+    ):
+        """Rebuilds a pickled instance (see __reduce__).
+
+        Args:
+            bundle (bytes): The key bundle.
+            keep_intermediates (bool): Whether the instance retains E1, E2, D1 and D2.
+            compression (bytes, optional): The CompressionStage settings, None without one.
+
+        Returns:
+            HybridCryptosystem: The instance.
+        """
+        cryptosystem = cls.from_key_bundle(bundle, keep_intermediates)
+        if compression is not None:
+            cryptosystem.compression = CompressionStage.from_settings(compression)
+        return cryptosystem
+
     def encrypt(self, M: str):
         """Encrypts the given plaintext using a hybrid cryptosystem consisting of a rotor machine and DES encryption.
 
+        Both layers run in a single pass (see iter_encrypt). E1 and E2 are only
+        retained when the instance was created with keep_intermediates=True.
+        Otherwise, with a cache, repeated plaintexts are served from it.
+
         Args:
             M (str): The plaintext to encrypt.
 
@@ -36,15 +329,31 @@ class HybridCryptosystem:
         """
 
         self._reset_variables()
-        # 1. Encrypt using the rotor machine
-        self.E1 = self.rotor_machine.encrypt(M)
-        # 2. Encrypt the result using DES
-        self.E2 = self.des.encrypt(self.E1)
-        return self.E2  # Encrypted text
+        cache_key = self._cache_key(CiphertextCache.ENCRYPT, M)
+        if cache_key is not None:
+            E2 = self.cache.get(cache_key)
+            if E2 is not None:
+                return E2
+        if self.compression is not None:
+            M = self.compression.compress(M)
+        # DES output bytes are always below 256, so they are collected as latin-1
+        ciphertext = bytearray()
+        for encrypted_block in self.iter_encrypt(M):
+            ciphertext += encrypted_block.encode("latin-1")
+        E2 = ciphertext.decode("latin-1")
+        if self.keep_intermediates:
+            self.E2 = E2
+        if cache_key is not None:
+            self.cache.put(cache_key, E2)
+        return E2  # Encrypted text
 
     def decrypt(self, M: str):
         """Decrypts the given ciphertext using a hybrid cryptosystem consisting of a rotor machine and DES encryption.
 
+        Both layers run in a single pass (see iter_decrypt). D1 and D2 are only
+        retained when the instance was created with keep_intermediates=True.
+        Otherwise, with a cache, repeated ciphertexts are served from it.
+
         Args:
             M (str): The ciphertext to decrypt.
 
@@ -56,11 +365,466 @@ class HybridCryptosystem:
         The rotor machine decryption operation has a time complexity of O(n)
         Therefore, the overall time complexity of the decryption process is O(n) + O(k) where k is the number of rounds to each block
         """
-        # 1. Decrypt using DES
-        self.D1 = self.des.decrypt(M)
-        # 2. Decrypt the result using the rotor machine
-        self.D2 = self.rotor_machine.decrypt(self.D1)
-        return self.D2  # Decrypted text
+        cache_key = self._cache_key(CiphertextCache.DECRYPT, M)
+        if cache_key is not None:
+            D2 = self.cache.get(cache_key)
+            if D2 is not None:
+                return D2
+        plaintext = bytearray()
+        for decrypted_chunk in self.iter_decrypt(M):
+            plaintext += decrypted_chunk.encode("latin-1")
+        D2 = plaintext.decode("latin-1")
+        if self.compression is not None:
+            D2 = self.compression.decompress(D2)
+        if self.keep_intermediates:
+            self.D2 = D2
+        if cache_key is not None:
+            self.cache.put(cache_key, D2)
+        return D2  # Decrypted text
+
+    def iter_encrypt(self, M: str):
+        """Encrypts the plaintext in a single pass, yielding one ciphertext block at a time.
+
+        Each rotor output character is written straight into a reusable 8-byte
+        block buffer, and the block is passed to DES as soon as it is full, so
+        neither E1 nor the 8x expanded binary string of the whole message is
+        ever materialized. The output is identical to des.encrypt(rotor_machine.encrypt(M)).
+
+        Args:
+            M (str): The plaintext to encrypt.
+
+        Yields:
+            str: The next 8-character ciphertext block.
+        """
+        rotor_machine = self.rotor_machine
+        bit_converter = self.des.bit_converter
+        block_bytes = self.block_bytes
+        E1 = [] if self.keep_intermediates else None
+
+        # 1. Reset the rotors once for the whole message
+        rotor_machine.reset_rotors()
+
+        # 2. Fill the block buffer with rotor output
+        block = [""] * block_bytes
+        filled = 0
+        for char in M:
+            block[filled] = rotor_machine.encrypt_char(char)
+            filled += 1
+            if filled == block_bytes:
+                # 3. Encrypt the full block with DES
+                block_chars = "".join(block)
+                if E1 is not None:
+                    E1.append(block_chars)
+                block_64bits = bit_converter.str_to_binary(block_chars)
+                yield bit_converter.binary_to_str(self.des.encrypt_block(block_64bits))
+                filled = 0
+
+        # 4. Pad and encrypt the last block if it is not full
+        if filled:
+            block_chars = "".join(block[:filled])
+            if E1 is not None:
+                E1.append(block_chars)
+            block_64bits = self.des.parser.pad(bit_converter.str_to_binary(block_chars))
+            yield bit_converter.binary_to_str(self.des.encrypt_block(block_64bits))
+
+        if E1 is not None:
+            self.E1 = "".join(E1)
+
+    def iter_decrypt(self, M: str):
+        """Decrypts the ciphertext in a single pass, yielding plaintext as it is produced.
+
+        Each DES block is decrypted and fed to the rotor machine directly. Only
+        the last MAX_PADDING_BYTES decrypted bytes are held back until the end
+        of the message, when the padding is removed. The output is identical to
+        rotor_machine.decrypt(des.decrypt(M)).
+
+        Args:
+            M (str): The ciphertext to decrypt.
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks.
+
+        Yields:
+            str: The next chunk of plaintext.
+        """
+        rotor_machine = self.rotor_machine
+        bit_converter = self.des.bit_converter
+        block_bytes = self.block_bytes
+        if len(M) % block_bytes != 0:
+            raise ValueError(
+                f"Ciphertext size mismatch: expected a multiple of {block_bytes} characters, got {len(M)} characters."
+            )
+        D1 = [] if self.keep_intermediates else None
+        max_pending_blocks = -(-self.MAX_PADDING_BYTES // block_bytes)
+
+        # 1. Reset the rotors once for the whole message
+        rotor_machine.reset_rotors()
+
+        pending_blocks = []
+        for i in range(0, len(M), block_bytes):
+            # 2. Decrypt the next block with DES
+            block_64bits = bit_converter.str_to_binary(M[i : i + block_bytes])
+            pending_blocks.append(
+                bit_converter.binary_to_str(self.des.decrypt_block(block_64bits))
+            )
+
+            # 3. Blocks that can no longer hold padding go through the rotor machine
+            if len(pending_blocks) > max_pending_blocks:
+                block_chars = pending_blocks.pop(0)
+                if D1 is not None:
+                    D1.append(block_chars)
+                yield "".join(
+                    [rotor_machine.decrypt_char(char) for char in block_chars]
+                )
+
+        # 4. Remove the padding from the held back tail and finish the rotor layer
+        tail_bits = bit_converter.str_to_binary("".join(pending_blocks))
+        tail_chars = bit_converter.binary_to_str(
+            self.des.parser.remove_padding(tail_bits)
+        )
+        if D1 is not None:
+            D1.append(tail_chars)
+            self.D1 = "".join(D1)
+        yield "".join([rotor_machine.decrypt_char(char) for char in tail_chars])
+
+    def encrypt_into(self, src, dst) -> int:
+        """Encrypts plaintext bytes into a caller-provided buffer.
+
+        The result is identical to encrypt on the latin-1 decoded plaintext.
+        The rotor layer writes into dst (RotorMachine.encrypt_into) and DES
+        then pads and encrypts it in place (DESEncryption.encrypt_into), so
+        neither layer allocates per block. src and dst may be the same buffer
+        if it has room for the padding. Intermediate results are never retained.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The plaintext as latin-1 bytes.
+            dst (bytearray | memoryview | mmap.mmap): A writable buffer of at least len(src) bytes rounded up to a whole block.
+
+        Raises:
+            ValueError: If dst is too small.
+
+        Returns:
+            int: The number of ciphertext bytes written.
+        """
+        target = memoryview(dst).cast("B")
+        size = memoryview(src).nbytes
+        padded_size = size + (-size % self.block_bytes)
+        if len(target) < padded_size:
+            raise ValueError(
+                f"Buffer size mismatch: expected at least {padded_size} bytes, got {len(target)} bytes."
+            )
+        self.rotor_machine.encrypt_into(src, target)
+        return self.des.encrypt_into(target[:size], target)
+
+    def decrypt_into(self, src, dst) -> int:
+        """Decrypts ciphertext bytes into a caller-provided buffer.
+
+        The result is identical to decrypt on the latin-1 decoded ciphertext.
+        src and dst may be the same buffer.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The ciphertext bytes, a whole number of blocks.
+            dst (bytearray | memoryview | mmap.mmap): A writable buffer of at least len(src) bytes.
+
+        Raises:
+            ValueError: If src is not a whole number of blocks or dst is too small.
+
+        Returns:
+            int: The number of plaintext bytes written.
+        """
+        target = memoryview(dst).cast("B")
+        size = self.des.decrypt_into(src, target)
+        return self.rotor_machine.decrypt_into(target[:size], target)
+
+    def encrypt_many(self, messages: list[str]) -> list[str]:
+        """Encrypts many independent messages in one batch.
+
+        The result is identical to calling encrypt on every message. The rotor
+        layer runs over all messages with precomputed lookups
+        (RotorMachine.encrypt_many), the padded messages are packed into one
+        ragged buffer with an offsets array, and every block of the batch goes
+        through a single DESEncryption.encrypt_blocks call before the buffer is
+        split back into messages. Intermediate results are never retained.
+
+        Args:
+            messages (list[str]): The plaintexts to encrypt.
+
+        Returns:
+            list[str]: The ciphertexts, in the same order.
+        """
+        parser = self.des.parser
+        if self.compression is not None:
+            messages = [self.compression.compress(M) for M in messages]
+
+        # 1. Encrypt every message with the rotor machine
+        E1s = self.rotor_machine.encrypt_many(messages)
+
+        # 2. Pack the padded messages into one buffer
+        batch = bytearray()
+        offsets = [0]
+        for E1 in E1s:
+            batch += parser.pad_bytes(E1.encode("latin-1"))
+            offsets.append(len(batch))
+
+        # 3. Encrypt all blocks of the batch with DES
+        encrypted_batch = self._crypt_batch(batch, self.des.encrypt_blocks)
+
+        # 4. Split the batch back into messages
+        return [
+            encrypted_batch[start:end].decode("latin-1")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+    def decrypt_many(self, ciphertexts: list[str]) -> list[str]:
+        """Decrypts many independent ciphertexts in one batch.
+
+        The result is identical to calling decrypt on every ciphertext.
+
+        Args:
+            ciphertexts (list[str]): The ciphertexts to decrypt.
+
+        Raises:
+            ValueError: If a ciphertext is not a whole number of blocks.
+
+        Returns:
+            list[str]: The plaintexts, in the same order.
+        """
+        parser = self.des.parser
+
+        # 1. Pack the ciphertexts into one buffer
+        batch = bytearray()
+        offsets = [0]
+        for i, ciphertext in enumerate(ciphertexts):
+            if len(ciphertext) % self.block_bytes != 0:
+                raise ValueError(
+                    f"Ciphertext {i} size mismatch: expected a multiple of {self.block_bytes} characters, got {len(ciphertext)} characters."
+                )
+            batch += ciphertext.encode("latin-1")
+            offsets.append(len(batch))
+
+        # 2. Decrypt all blocks of the batch with DES
+        decrypted_batch = self._crypt_batch(batch, self.des.decrypt_blocks)
+
+        # 3. Split the batch back into messages and remove the padding
+        D1s = [
+            parser.remove_padding_bytes(decrypted_batch[start:end]).decode("latin-1")
+            for start, end in zip(offsets, offsets[1:])
+        ]
+
+        # 4. Decrypt every message with the rotor machine
+        D2s = self.rotor_machine.decrypt_many(D1s)
+        if self.compression is not None:
+            D2s = [self.compression.decompress(D2) for D2 in D2s]
+        return D2s
+
+    def encrypt_segment(self, M: str, start: int, final: bool) -> str:
+        """Encrypts a segment of a message that begins at character index start.
+
+        Concatenating the encrypted segments of a message in order gives
+        encrypt(message). Only the final segment is padded, so every other
+        segment must be a whole number of blocks. The rotor lookups and integer
+        DES blocks are used instead of the instance's rotors, so segments can be
+        encrypted independently and concurrently. Intermediate results are never
+        retained.
+
+        Args:
+            M (str): The plaintext segment.
+            start (int): The index of the segment's first character in the message, a multiple of the block size.
+            final (bool): Whether this is the last segment of the message.
+
+        Raises:
+            ValueError: If start or a non-final segment is not aligned to the block size.
+
+        Returns:
+            str: The ciphertext segment.
+        """
+        E1 = self.rotor_encrypt_segment(M, start, final)
+        return self.des_encrypt_segment(E1, start, final)
+
+    def decrypt_segment(self, M: str, start: int, final: bool) -> str:
+        """Decrypts a segment of a ciphertext that begins at character index start.
+
+        Concatenating the decrypted segments in order gives decrypt(ciphertext)
+        as long as the final segment holds at least the last MAX_PADDING_BYTES
+        characters, since the padding check may look that far back.
+
+        Args:
+            M (str): The ciphertext segment.
+            start (int): The index of the segment's first character in the ciphertext, a multiple of the block size.
+            final (bool): Whether this is the last segment of the ciphertext.
+
+        Raises:
+            ValueError: If start or the segment is not aligned to the block size.
+
+        Returns:
+            str: The plaintext segment.
+        """
+        D1 = self.des_decrypt_segment(M, start, final)
+        return self.rotor_decrypt_segment(D1, start, final)
+
+    def rotor_encrypt_segment(self, M: str, start: int, final: bool) -> str:
+        """Layer 1 of encrypt_segment: the rotor machine.
+
+        Args:
+            M (str): The plaintext segment.
+            start (int): The index of the segment's first character in the message.
+            final (bool): Whether this is the last segment of the message.
+
+        Returns:
+            str: The segment of E1.
+        """
+        return self.rotor_machine.encrypt_segment(M, start)
+
+    def des_encrypt_segment(self, E1: str, start: int, final: bool) -> str:
+        """Layer 2 of encrypt_segment: DES, padding the final segment.
+
+        Args:
+            E1 (str): The segment of E1.
+            start (int): The index of the segment's first character in the message.
+            final (bool): Whether this is the last segment of the message.
+
+        Raises:
+            ValueError: If start or a non-final segment is not aligned to the block size.
+
+        Returns:
+            str: The segment of E2.
+        """
+        if start % self.block_bytes != 0:
+            raise ValueError(
+                f"Segment start mismatch: expected a multiple of {self.block_bytes} characters, got {start}."
+            )
+        E1_bytes = E1.encode("latin-1")
+        if final:
+            E1_bytes = self.des.parser.pad_bytes(E1_bytes)
+        elif len(E1_bytes) % self.block_bytes != 0:
+            raise ValueError(
+                f"Segment size mismatch: expected a multiple of {self.block_bytes} characters, got {len(E1_bytes)} characters."
+            )
+        return self._crypt_batch(E1_bytes, self.des.encrypt_blocks).decode("latin-1")
+
+    def des_decrypt_segment(self, M: str, start: int, final: bool) -> str:
+        """Layer 1 of decrypt_segment: DES, removing the padding from the final segment.
+
+        Args:
+            M (str): The ciphertext segment.
+            start (int): The index of the segment's first character in the ciphertext.
+            final (bool): Whether this is the last segment of the ciphertext.
+
+        Raises:
+            ValueError: If start or the segment is not aligned to the block size.
+
+        Returns:
+            str: The segment of D1.
+        """
+        if start % self.block_bytes != 0 or len(M) % self.block_bytes != 0:
+            raise ValueError(
+                f"Segment size mismatch: expected a multiple of {self.block_bytes} characters, got {len(M)} characters at {start}."
+            )
+        D1 = self._crypt_batch(M.encode("latin-1"), self.des.decrypt_blocks)
+        if final:
+            D1 = self.des.parser.remove_padding_bytes(D1)
+        return D1.decode("latin-1")
+
+    def rotor_decrypt_segment(self, D1: str, start: int, final: bool) -> str:
+        """Layer 2 of decrypt_segment: the rotor machine.
+
+        Args:
+            D1 (str): The segment of D1.
+            start (int): The index of the segment's first character in the ciphertext.
+            final (bool): Whether this is the last segment of the ciphertext.
+
+        Returns:
+            str: The segment of D2.
+        """
+        return self.rotor_machine.decrypt_segment(D1, start)
+
+    def split_segments(self, M: str, segment_size: int):
+        """Splits a message into segments for encrypt_segment and decrypt_segment.
+
+        Segments are segment_size characters long, except the final one, which
+        absorbs any remainder shorter than min_segment_size() so that it holds
+        every byte the padding check can look at.
+
+        Args:
+            M (str): The message to split.
+            segment_size (int): The segment size, a multiple of the block size of at least min_segment_size().
+
+        Raises:
+            ValueError: If segment_size is not valid.
+
+        Yields:
+            tuple[str, int, bool]: The segment, its start index and whether it is the last one.
+        """
+        for start, length, final in self.segment_bounds(len(M), segment_size):
+            yield M[start : start + length], start, final
+
+    def segment_bounds(
+        self, size: int, segment_size: int
+    ) -> list[tuple[int, int, bool]]:
+        """Returns the bounds of the segments split_segments produces for a message of size characters.
+
+        Args:
+            size (int): The message length.
+            segment_size (int): The segment size, a multiple of the block size of at least min_segment_size().
+
+        Raises:
+            ValueError: If segment_size is not valid.
+
+        Returns:
+            list[tuple[int, int, bool]]: The start, length and whether it is the last one, for each segment.
+        """
+        min_segment_size = self.min_segment_size()
+        if segment_size % self.block_bytes != 0 or segment_size < min_segment_size:
+            raise ValueError(
+                f"Segment size mismatch: expected a multiple of {self.block_bytes} of at least {min_segment_size}, got {segment_size}."
+            )
+        bounds = []
+        start = 0
+        while size - start - segment_size >= min_segment_size:
+            bounds.append((start, segment_size, False))
+            start += segment_size
+        bounds.append((start, size - start, True))
+        return bounds
+
+    def min_segment_size(self) -> int:
+        """Returns the smallest segment size that keeps the padding check within the final segment.
+
+        Returns:
+            int: MAX_PADDING_BYTES rounded up to the next whole block.
+        """
+        return (self.MAX_PADDING_BYTES // self.block_bytes + 1) * self.block_bytes
+
+    def _cache_key(self, operation: int, M: str):
+        """Returns the cache key of a message, or None when the cache is not used.
+
+        Args:
+            operation (int): CiphertextCache.ENCRYPT or CiphertextCache.DECRYPT.
+            M (str): The message.
+
+        Returns:
+            tuple | None: The cache key.
+        """
+        if self.cache is None or self.keep_intermediates:
+            return None
+        fingerprint = self.fingerprint()
+        if self.compression is not None:
+            # Compressed and uncompressed ciphertexts of one key must not collide
+            fingerprint += self.compression.settings()
+        return self.cache.key(fingerprint, operation, M)
+
+    def _crypt_batch(self, batch: bytes, crypt_blocks) -> bytes:
+        """Runs a DES block function over every 8-byte block of a packed batch.
+
+        Args:
+            batch (bytes): The packed batch, a whole number of blocks long.
+            crypt_blocks (Callable[[list[int]], list[int]]): DESEncryption.encrypt_blocks or decrypt_blocks.
+
+        Returns:
+            bytes: The processed batch.
+        """
+        num_blocks = len(batch) // self.block_bytes
+        blocks = struct.unpack(f">{num_blocks}Q", batch)
+        return struct.pack(f">{num_blocks}Q", *crypt_blocks(blocks))
 
     """
     Retrieves one of the intermediate results (E1, E2, D1, or D2) from the last
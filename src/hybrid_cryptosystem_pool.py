@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class HybridCryptosystemPool:
+    """
+    Keyed pool of warm HybridCryptosystem instances.
+
+    Instances are built by factory(key), which must return equivalent instances
+    for the same key (for example built from the tenant's key material), and
+    are handed out with check-out/check-in semantics so each one is used by one
+    caller at a time. At most max_size instances exist at once. When the pool
+    is full, the least recently used idle instance of another key is evicted;
+    when nothing is idle, checkout waits for a check-in. Idle instances unused
+    for idle_timeout seconds are evicted too.
+
+    The pool keeps the instances it has handed out, so checkin and discard
+    reject instances that are not checked out from it, including a second
+    check-in of the same instance.
+    """
+
+    def __init__(self, factory, max_size: int = 64, idle_timeout: float = 300.0):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}.")
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        # key -> list of (instance, last check-in time), least recently used key first
+        self._idle = OrderedDict()
+        self._size = 0
+        # id -> instance, for every instance currently checked out
+        self._checked_out = {}
+        self._condition = threading.Condition()
+        # Checkouts currently waiting for a check-in
+        self._queued = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def checkout(self, key, timeout: float = None) -> HybridCryptosystem:
+        """Checks out an instance for key, building one if none is idle.
+
+        Args:
+            key (Hashable): The tenant key.
+            timeout (float, optional): Seconds to wait when the pool is full. Waits forever if None.
+
+        Raises:
+            TimeoutError: If no instance became available within timeout.
+
+        Returns:
+            HybridCryptosystem: An instance in its reset state.
+        """
+        waited = False
+        began = time.perf_counter()
+        with self._condition:
+            while True:
+                self._evict_expired()
+                idle = self._idle.get(key)
+                if idle:
+                    cryptosystem, _ = idle.pop()
+                    if not idle:
+                        del self._idle[key]
+                    else:
+                        self._idle.move_to_end(key)
+                    self.hits += 1
+                    self._record_wait(waited, began)
+                    self._checked_out[id(cryptosystem)] = cryptosystem
+                    return cryptosystem
+                if self._size >= self.max_size and self._idle:
+                    self._evict_lru()
+                if self._size < self.max_size:
+                    # Reserve the slot, then build outside the lock
+                    self._size += 1
+                    self.misses += 1
+                    self._record_wait(waited, began)
+                    break
+                waited = True
+                remaining = (
+                    None if timeout is None else timeout - (time.perf_counter() - began)
+                )
+                if remaining is not None and remaining <= 0:
+                    self._record_wait(waited, began)
+                    raise TimeoutError(f"No instance available for {key!r}.")
+                self._queued += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._queued -= 1
+
+        try:
+            cryptosystem = self.factory(key)
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._checked_out[id(cryptosystem)] = cryptosystem
+        return cryptosystem
+
+    def checkin(self, key, cryptosystem: HybridCryptosystem):
+        """Returns an instance to the pool after resetting its state.
+
+        Args:
+            key (Hashable): The key the instance was checked out for.
+            cryptosystem (HybridCryptosystem): The instance.
+
+        Raises:
+            ValueError: If the instance is not checked out from this pool.
+        """
+        with self._condition:
+            self._release(cryptosystem)
+        cryptosystem._reset_variables()
+        cryptosystem.rotor_machine.reset_rotors()
+        with self._condition:
+            self._idle.setdefault(key, []).append((cryptosystem, time.monotonic()))
+            self._idle.move_to_end(key)
+            self._condition.notify()
+
+    def discard(self, key, cryptosystem: HybridCryptosystem):
+        """Drops a checked out instance instead of returning it, freeing its slot.
+
+        Args:
+            key (Hashable): The key the instance was checked out for.
+            cryptosystem (HybridCryptosystem): The instance.
+
+        Raises:
+            ValueError: If the instance is not checked out from this pool.
+        """
+        with self._condition:
+            self._release(cryptosystem)
+            self._size -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def instance(self, key, timeout: float = None):
+        """Checks out an instance for the duration of a with block.
+
+        The instance is checked back in when the block exits normally. If the
+        block raises, it is discarded: whether the exception came from the
+        instance or from the caller's code, the instance may have been left
+        mid-operation, and a new one costs only a factory call.
+
+        Args:
+            key (Hashable): The tenant key.
+            timeout (float, optional): Seconds to wait when the pool is full.
+
+        Yields:
+            HybridCryptosystem: An instance in its reset state.
+        """
+        cryptosystem = self.checkout(key, timeout)
+        try:
+            yield cryptosystem
+        except Exception:
+            self.discard(key, cryptosystem)
+            raise
+        self.checkin(key, cryptosystem)
+
+    def evict_idle(self):
+        """Evicts idle instances that have not been used for idle_timeout seconds."""
+        with self._condition:
+            self._evict_expired()
+
+    def stats(self) -> dict:
+        """Returns the pool metrics.
+
+        Returns:
+            dict: Size, idle count, queued checkouts, hits, misses, hit rate, evictions,
+                waits and total wait time.
+        """
+        with self._condition:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._size,
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "queued": self._queued,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+            }
+
+    def _evict_lru(self):
+        """Evicts one idle instance of the least recently used key. Called with the lock held."""
+        key, idle = next(iter(self._idle.items()))
+        idle.pop(0)
+        if not idle:
+            del self._idle[key]
+        self._size -= 1
+        self.evictions += 1
+
+    def _evict_expired(self):
+        """Evicts idle instances older than idle_timeout. Called with the lock held."""
+        if self.idle_timeout is None:
+            return
+        deadline = time.monotonic() - self.idle_timeout
+        for key in list(self._idle):
+            idle = self._idle[key]
+            kept = [(instance, used) for instance, used in idle if used > deadline]
+            expired = len(idle) - len(kept)
+            if expired:
+                self._size -= expired
+                self.evictions += expired
+                if kept:
+                    self._idle[key] = kept
+                else:
+                    del self._idle[key]
+
+    def _release(self, cryptosystem: HybridCryptosystem):
+        """Forgets a checked out instance. Called with the lock held.
+
+        Args:
+            cryptosystem (HybridCryptosystem): The instance.
+
+        Raises:
+            ValueError: If the instance is not checked out from this pool.
+        """
+        if self._checked_out.pop(id(cryptosystem), None) is not cryptosystem:
+            raise ValueError("Instance is not checked out from this pool.")
+
+    def _record_wait(self, waited: bool, began: float):
+        """Adds a checkout's wait to the metrics. Called with the lock held.
+
+        Args:
+            waited (bool): Whether the checkout had to wait.
+            began (float): When the checkout started (time.perf_counter).
+        """
+        if waited:
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - began
@@ -0,0 +1,151 @@
+import struct
+
+
+class KeyBundle:
+    """
+    Compact binary format for the key material of a HybridCryptosystem.
+
+    Every bundle starts with the magic b"HCKB", the format version and the kind.
+
+    Seed bundles (kind SEED) hold only the seed the material is generated from:
+    seed type (0 int, 1 str) | seed length (2 bytes) | seed. The version pins the
+    generation algorithm, so a seed bundle only loads with the same version.
+
+    Material bundles (kind MATERIAL) hold the material itself, about 1 KB:
+    rounds (1 byte) | key (8 bytes) | three rotor wirings (128 character codes each) |
+    six permutation tables (1-byte length, then one byte per entry) |
+    eight S-boxes (64 4-bit entries, two per byte).
+    """
+
+    MAGIC = b"HCKB"
+    VERSION = 1
+    SEED = 0
+    MATERIAL = 1
+
+    TABLE_NAMES = [
+        "initial_permutation_table",
+        "inverse_initial_permutation_table",
+        "expansion_table",
+        "permuted_choice_1_table",
+        "permuted_choice_2_table",
+        "p_box_table",
+    ]
+
+    def pack_seed(self, seed) -> bytes:
+        """Packs a seed bundle.
+
+        Args:
+            seed (int | str): The seed passed to HybridCryptosystem(seed=...).
+
+        Raises:
+            ValueError: If the seed is not an int or a str.
+
+        Returns:
+            bytes: The bundle.
+        """
+        if isinstance(seed, bool) or not isinstance(seed, (int, str)):
+            raise ValueError(
+                f"Seed must be an int or a str, got {type(seed).__name__}."
+            )
+        seed_type = 0 if isinstance(seed, int) else 1
+        seed_bytes = str(seed).encode("utf-8")
+        return (
+            self._header(self.SEED)
+            + struct.pack(">BH", seed_type, len(seed_bytes))
+            + seed_bytes
+        )
+
+    def pack(self, material: dict) -> bytes:
+        """Packs a material bundle.
+
+        Args:
+            material (dict): The key material, as returned by HybridCryptosystem.key_material.
+
+        Returns:
+            bytes: The bundle.
+        """
+        parts = [
+            self._header(self.MATERIAL),
+            struct.pack(">B", material["rounds"]),
+            int(material["key_64bits"], 2).to_bytes(8, "big"),
+        ]
+        for rotor_name in ["rotor1", "rotor2", "rotor3"]:
+            parts.append(bytes([ord(char) for char in material[rotor_name]]))
+        for table_name in self.TABLE_NAMES:
+            table = material[table_name]
+            parts.append(struct.pack(">B", len(table)) + bytes(table))
+        for sbox in material["sbox_tables"]:
+            parts.append(
+                bytes([(sbox[i] << 4) | sbox[i + 1] for i in range(0, len(sbox), 2)])
+            )
+        return b"".join(parts)
+
+    def unpack(self, bundle: bytes) -> dict:
+        """Unpacks a bundle.
+
+        Args:
+            bundle (bytes): A seed or material bundle.
+
+        Raises:
+            ValueError: If the bundle is not valid or has another version.
+
+        Returns:
+            dict: {"seed": seed} for a seed bundle, otherwise the key material.
+        """
+        if bundle[:4] != self.MAGIC:
+            raise ValueError("Not a key bundle.")
+        version, kind = struct.unpack_from(">BB", bundle, 4)
+        if version != self.VERSION:
+            raise ValueError(
+                f"Key bundle version mismatch: expected {self.VERSION}, got {version}."
+            )
+        position = 6
+
+        if kind == self.SEED:
+            seed_type, length = struct.unpack_from(">BH", bundle, position)
+            position += 3
+            seed = bundle[position : position + length].decode("utf-8")
+            return {"seed": int(seed) if seed_type == 0 else seed}
+
+        if kind != self.MATERIAL:
+            raise ValueError(f"Unknown key bundle kind: {kind}.")
+        material = {"rounds": bundle[position]}
+        position += 1
+        material["key_64bits"] = format(
+            int.from_bytes(bundle[position : position + 8], "big"), "064b"
+        )
+        position += 8
+        for rotor_name in ["rotor1", "rotor2", "rotor3"]:
+            material[rotor_name] = [
+                chr(code) for code in bundle[position : position + 128]
+            ]
+            position += 128
+        for table_name in self.TABLE_NAMES:
+            length = bundle[position]
+            material[table_name] = list(bundle[position + 1 : position + 1 + length])
+            position += 1 + length
+        sbox_tables = []
+        for _ in range(8):
+            sbox = []
+            for byte in bundle[position : position + 32]:
+                sbox.append(byte >> 4)
+                sbox.append(byte & 15)
+            sbox_tables.append(sbox)
+            position += 32
+        material["sbox_tables"] = sbox_tables
+        if position != len(bundle):
+            raise ValueError(
+                f"Key bundle size mismatch: expected {position} bytes, got {len(bundle)} bytes."
+            )
+        return material
+
+    def _header(self, kind: int) -> bytes:
+        """Returns the bundle header.
+
+        Args:
+            kind (int): SEED or MATERIAL.
+
+        Returns:
+            bytes: The magic, version and kind.
+        """
+        return self.MAGIC + struct.pack(">BB", self.VERSION, kind)
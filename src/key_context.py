@@ -0,0 +1,178 @@
+import os
+
+
+class KeyContext:
+    """
+    Immutable key context of a HybridCryptosystem, safe to share across threads.
+
+    Holds a private copy of the engine, with its own DES layer (see
+    DESEncryption.copy), and every lookup table built up front: the rotor
+    wirings and per-offset lookups, the DES permutation and SP tables and the
+    integer subkeys. Key material assigned to the original engine afterwards
+    does not reach the context. Every operation goes through the segment and batch
+    functions, which keep their state (rotor offsets, blocks, buffers) in local
+    variables, so calls from any number of threads need no locks; on
+    free-threaded builds they run in parallel.
+
+    Create one with HybridCryptosystem.key_context(). Attributes cannot be
+    reassigned after construction. The engine's compression stage, if any, is
+    applied by encrypt, decrypt, the batch and the parallel functions, not by
+    the segment functions.
+    """
+
+    __slots__ = ("_cryptosystem", "block_bytes")
+
+    def __init__(self, cryptosystem):
+        # A private copy, so the caller's rotor state and intermediates stay out of reach
+        engine = cryptosystem.copy(keep_intermediates=False)
+        engine.precompute()
+        object.__setattr__(self, "_cryptosystem", engine)
+        object.__setattr__(self, "block_bytes", engine.block_bytes)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"KeyContext is immutable, cannot set {name!r}.")
+
+    def encrypt(self, M: str) -> str:
+        """Encrypts a message.
+
+        Args:
+            M (str): The plaintext to encrypt.
+
+        Returns:
+            str: The ciphertext, identical to HybridCryptosystem.encrypt.
+        """
+        compression = self._cryptosystem.compression
+        if compression is not None:
+            M = compression.compress(M)
+        return self._cryptosystem.encrypt_segment(M, 0, True)
+
+    def decrypt(self, M: str) -> str:
+        """Decrypts a message.
+
+        Args:
+            M (str): The ciphertext to decrypt.
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks.
+
+        Returns:
+            str: The plaintext, identical to HybridCryptosystem.decrypt.
+        """
+        D2 = self._cryptosystem.decrypt_segment(M, 0, True)
+        compression = self._cryptosystem.compression
+        return D2 if compression is None else compression.decompress(D2)
+
+    def encrypt_segment(self, M: str, start: int, final: bool) -> str:
+        """Encrypts a segment of a message (see HybridCryptosystem.encrypt_segment).
+
+        Args:
+            M (str): The plaintext segment.
+            start (int): The index of the segment's first character in the message.
+            final (bool): Whether this is the last segment of the message.
+
+        Returns:
+            str: The ciphertext segment.
+        """
+        return self._cryptosystem.encrypt_segment(M, start, final)
+
+    def decrypt_segment(self, M: str, start: int, final: bool) -> str:
+        """Decrypts a segment of a ciphertext (see HybridCryptosystem.decrypt_segment).
+
+        Args:
+            M (str): The ciphertext segment.
+            start (int): The index of the segment's first character in the ciphertext.
+            final (bool): Whether this is the last segment of the ciphertext.
+
+        Returns:
+            str: The plaintext segment.
+        """
+        return self._cryptosystem.decrypt_segment(M, start, final)
+
+    def encrypt_many(self, messages: list[str]) -> list[str]:
+        """Encrypts many independent messages in one batch (see HybridCryptosystem.encrypt_many).
+
+        Args:
+            messages (list[str]): The plaintexts to encrypt.
+
+        Returns:
+            list[str]: The ciphertexts, in the same order.
+        """
+        return self._cryptosystem.encrypt_many(messages)
+
+    def decrypt_many(self, ciphertexts: list[str]) -> list[str]:
+        """Decrypts many independent ciphertexts in one batch (see HybridCryptosystem.decrypt_many).
+
+        Args:
+            ciphertexts (list[str]): The ciphertexts to decrypt.
+
+        Returns:
+            list[str]: The plaintexts, in the same order.
+        """
+        return self._cryptosystem.decrypt_many(ciphertexts)
+
+    def encrypt_parallel(
+        self, M: str, executor: "ThreadPoolExecutor" = None, chunk_size: int = 65536
+    ) -> str:
+        """Encrypts a message with its segments spread over a thread pool.
+
+        Args:
+            M (str): The plaintext to encrypt.
+            executor (ThreadPoolExecutor, optional): The pool. A temporary pool of os.cpu_count() threads is used if None.
+            chunk_size (int): The segment size (see HybridCryptosystem.split_segments).
+
+        Returns:
+            str: The ciphertext, identical to HybridCryptosystem.encrypt.
+        """
+        compression = self._cryptosystem.compression
+        if compression is not None:
+            M = compression.compress(M)
+        return self._run_parallel(
+            M, self._cryptosystem.encrypt_segment, executor, chunk_size
+        )
+
+    def decrypt_parallel(
+        self, M: str, executor: "ThreadPoolExecutor" = None, chunk_size: int = 65536
+    ) -> str:
+        """Decrypts a ciphertext with its segments spread over a thread pool.
+
+        Args:
+            M (str): The ciphertext to decrypt.
+            executor (ThreadPoolExecutor, optional): The pool. A temporary pool of os.cpu_count() threads is used if None.
+            chunk_size (int): The segment size (see HybridCryptosystem.split_segments).
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks.
+
+        Returns:
+            str: The plaintext, identical to HybridCryptosystem.decrypt.
+        """
+        if len(M) % self.block_bytes != 0:
+            raise ValueError(
+                f"Ciphertext size mismatch: expected a multiple of {self.block_bytes} characters, got {len(M)} characters."
+            )
+        D2 = self._run_parallel(
+            M, self._cryptosystem.decrypt_segment, executor, chunk_size
+        )
+        compression = self._cryptosystem.compression
+        return D2 if compression is None else compression.decompress(D2)
+
+    def _run_parallel(self, M: str, crypt_segment, executor, chunk_size: int) -> str:
+        """Maps crypt_segment over the segments of M in a thread pool and joins the results in order.
+
+        Args:
+            M (str): The message.
+            crypt_segment (Callable[[str, int, bool], str]): The segment function.
+            executor (ThreadPoolExecutor | None): The pool, or None for a temporary one.
+            chunk_size (int): The segment size.
+
+        Returns:
+            str: The processed message.
+        """
+        texts, starts, finals = zip(*self._cryptosystem.split_segments(M, chunk_size))
+        if executor is not None:
+            return "".join(executor.map(crypt_segment, texts, starts, finals))
+        # Imported here so that importing this module stays cheap
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            return "".join(pool.map(crypt_segment, texts, starts, finals))
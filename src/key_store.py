@@ -0,0 +1,423 @@
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+from hybrid_cryptosystem import HybridCryptosystem
+from key_bundle import KeyBundle
+
+
+class KeyStore:
+    """
+    Memory-mapped store of many keys with their precomputed lookup tables.
+
+    Every record holds a key bundle (see KeyBundle) and the tables both layers
+    would otherwise build per process: the DES permutation lookups, SP tables
+    and integer subkeys, and the rotor translation tables per offset. The file
+    is opened with mmap and get serves the tables as memoryviews onto it, so
+    every process using a store shares one copy of the pages. Layout, all
+    little-endian so the tables can be used in place:
+
+    header:  magic b"HCKS" | version (1 byte) | 3 reserved bytes |
+             key count (4 bytes) | slot count (4 bytes)
+    index:   hash table of slot count slots: BLAKE2b-128 of the key id (16 bytes) |
+             record offset (8 bytes), 0 for an empty slot
+    records: at 8-byte aligned offsets: key id length (2 bytes) | bundle length (4 bytes) |
+             key id | bundle | padding to 8 bytes | tables (TABLE_BYTES)
+    tables:  initial permutation (8 x 256 x 8 bytes) | inverse initial permutation
+             (8 x 256 x 8 bytes) | expansion (4 x 256 x 8 bytes) | SP tables
+             (8 x 64 x 4 bytes) | subkeys (16 x 8 bytes) | rotor encryption tables
+             (128 x 256 bytes) | rotor decryption tables (128 x 256 bytes)
+
+    A key id is found with one hash and a short linear probe, so lookups are
+    O(1) whatever the number of keys. Stores are written whole by build and
+    rewritten by compact; both replace the file atomically, so processes that
+    have the old file mapped keep a consistent view.
+    """
+
+    MAGIC = b"HCKS"
+    VERSION = 1
+    HEADER = struct.Struct("<4sB3xII")
+    SLOT = struct.Struct("<16sQ")
+    RECORD = struct.Struct("<HI")
+    # (name, item format, rows, row length) of the tables, in file order
+    TABLES = [
+        ("initial_permutation", "Q", 8, 256),
+        ("inverse_initial_permutation", "Q", 8, 256),
+        ("expansion", "Q", 4, 256),
+        ("sp_tables", "I", 8, 64),
+        ("subkeys", "Q", 1, 16),
+        ("encrypt_tables", "B", 128, 256),
+        ("decrypt_tables", "B", 128, 256),
+    ]
+    TABLE_BYTES = sum(
+        struct.calcsize(item) * rows * length for _, item, rows, length in TABLES
+    )
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise ValueError("Key stores can only be mapped on little-endian machines.")
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, version, self._count, self._slots = self.HEADER.unpack_from(
+            self._view, 0
+        )
+        if magic != self.MAGIC:
+            raise ValueError("Not a key store.")
+        if version != self.VERSION:
+            raise ValueError(
+                f"Key store version mismatch: expected {self.VERSION}, got {version}."
+            )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key_id: str) -> bool:
+        return self._find(key_id) is not None
+
+    def ids(self) -> list[str]:
+        """Returns the key ids in the store.
+
+        Returns:
+            list[str]: The key ids, in record order.
+        """
+        return [key_id for key_id, _, _ in self._records()]
+
+    def bundle(self, key_id: str) -> bytes:
+        """Returns the key bundle of a key.
+
+        Args:
+            key_id (str): The key id.
+
+        Raises:
+            KeyError: If the key id is not in the store.
+
+        Returns:
+            bytes: The key bundle.
+        """
+        bundle_start, bundle_length = self._record(key_id)
+        return bytes(self._view[bundle_start : bundle_start + bundle_length])
+
+    def get(
+        self, key_id: str, keep_intermediates: bool = False, shared: bool = True
+    ) -> HybridCryptosystem:
+        """Returns an instance for a key, with the stored tables in place of built ones.
+
+        Args:
+            key_id (str): The key id.
+            keep_intermediates (bool): Whether the instance retains E1, E2, D1 and D2.
+            shared (bool): Use the tables as views onto the mapped file, shared with
+                every process using the store. With False they are copied into
+                lists, which costs memory per process but indexes faster.
+
+        Raises:
+            KeyError: If the key id is not in the store.
+
+        Returns:
+            HybridCryptosystem: The instance.
+        """
+        bundle_start, bundle_length = self._record(key_id)
+        bundle = bytes(self._view[bundle_start : bundle_start + bundle_length])
+        cryptosystem = HybridCryptosystem._from_material(KeyBundle().unpack(bundle))
+        cryptosystem.keep_intermediates = keep_intermediates
+
+        tables = self._tables(bundle_start + bundle_length, shared)
+        rotor_machine = cryptosystem.rotor_machine
+        rotor_machine._decrypt_tables = tables.pop("decrypt_tables")
+        rotor_machine._encrypt_tables = tables.pop("encrypt_tables")
+        tables["subkeys"] = list(tables["subkeys"][0])
+        cryptosystem.des._fast_tables = tables
+        return cryptosystem
+
+    def close(self):
+        """Unmaps the file. Instances from get with shared tables must be released first."""
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def build(cls, path: str, keys: dict):
+        """Writes a new store, replacing any file at path.
+
+        Args:
+            path (str): The store file.
+            keys (dict[str, HybridCryptosystem | bytes]): The keys by id, as instances or key bundles.
+
+        Raises:
+            ValueError: If a key does not use the standard DES table sizes.
+        """
+        cls._write(path, [cls._new_record(key_id, key) for key_id, key in keys.items()])
+
+    @classmethod
+    def compact(cls, path: str, remove=(), add: dict = None):
+        """Rewrites a store without the removed keys and with the added ones.
+
+        The tables of kept keys are copied as they are, not rebuilt.
+
+        Args:
+            path (str): The store file.
+            remove (Iterable[str]): The ids of the keys to drop.
+            add (dict[str, HybridCryptosystem | bytes], optional): Keys to add or replace.
+        """
+        add = add or {}
+        remove = set(remove) | set(add)
+        with cls(path) as store:
+            records = []
+            for key_id, bundle_start, bundle_length in store._records():
+                if key_id in remove:
+                    continue
+                tables_start = cls._align(bundle_start + bundle_length)
+                records.append(
+                    (
+                        key_id,
+                        bytes(store._view[bundle_start : bundle_start + bundle_length]),
+                        bytes(
+                            store._view[tables_start : tables_start + cls.TABLE_BYTES]
+                        ),
+                    )
+                )
+        records += [cls._new_record(key_id, key) for key_id, key in add.items()]
+        cls._write(path, records)
+
+    @classmethod
+    def _new_record(cls, key_id: str, key) -> tuple[str, bytes, bytes]:
+        """Returns the record contents of a key.
+
+        Args:
+            key_id (str): The key id.
+            key (HybridCryptosystem | bytes): The key, as an instance or a key bundle.
+
+        Returns:
+            tuple[str, bytes, bytes]: The key id, bundle and packed tables.
+        """
+        if isinstance(key, HybridCryptosystem):
+            cryptosystem, bundle = key, key.to_key_bundle()
+        else:
+            cryptosystem, bundle = HybridCryptosystem.from_key_bundle(key), key
+        return key_id, bundle, cls._pack_tables(cryptosystem)
+
+    @classmethod
+    def _pack_tables(cls, cryptosystem: HybridCryptosystem) -> bytes:
+        """Packs the lookup tables of both layers in the store's table layout.
+
+        Args:
+            cryptosystem (HybridCryptosystem): The instance.
+
+        Raises:
+            ValueError: If the tables do not have the standard sizes.
+
+        Returns:
+            bytes: TABLE_BYTES bytes.
+        """
+        cryptosystem.precompute()
+        tables = dict(cryptosystem.des._fast_tables)
+        tables["subkeys"] = [tables["subkeys"]]
+        rotor_machine = cryptosystem.rotor_machine
+        tables["encrypt_tables"] = rotor_machine._encrypt_tables
+        tables["decrypt_tables"] = rotor_machine._decrypt_tables
+        parts = []
+        for name, item, rows, length in cls.TABLES:
+            if len(tables[name]) != rows or any(
+                len(row) != length for row in tables[name]
+            ):
+                raise ValueError(
+                    f"Table size mismatch for {name}: expected {rows} rows of {length} entries."
+                )
+            for row in tables[name]:
+                parts.append(struct.pack(f"<{length}{item}", *row))
+        return b"".join(parts)
+
+    @classmethod
+    def _write(cls, path: str, records: list[tuple[str, bytes, bytes]]):
+        """Writes records as a store to a temporary file, then moves it to path.
+
+        Args:
+            path (str): The store file.
+            records (list[tuple[str, bytes, bytes]]): Key id, bundle and packed tables per key.
+
+        Raises:
+            ValueError: If a key id appears twice.
+        """
+        # At most half the slots are used, which keeps probe sequences short
+        slots = 1 << max(2 * len(records) - 1, 1).bit_length()
+        index = [None] * slots
+        body = bytearray()
+        start = cls.HEADER.size + slots * cls.SLOT.size
+        for key_id, bundle, tables in records:
+            encoded_id = key_id.encode("utf-8")
+            digest = cls._digest(key_id)
+            slot = int.from_bytes(digest[:8], "little") & (slots - 1)
+            while index[slot] is not None:
+                if index[slot][0] == digest:
+                    raise ValueError(f"Duplicate key id: {key_id!r}.")
+                slot = (slot + 1) & (slots - 1)
+            index[slot] = (digest, start + len(body))
+            body += cls.RECORD.pack(len(encoded_id), len(bundle)) + encoded_id + bundle
+            body += bytes(cls._align(start + len(body)) - start - len(body))
+            body += tables
+
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(records), slots))
+            for entry in index:
+                file.write(cls.SLOT.pack(*(entry or (bytes(16), 0))))
+            file.write(body)
+        os.replace(temporary, path)
+
+    def _find(self, key_id: str):
+        """Probes the index for a key id.
+
+        Args:
+            key_id (str): The key id.
+
+        Returns:
+            int | None: The record offset, or None if the key id is not in the store.
+        """
+        digest = self._digest(key_id)
+        mask = self._slots - 1
+        slot = int.from_bytes(digest[:8], "little") & mask
+        while True:
+            slot_digest, offset = self.SLOT.unpack_from(
+                self._view, self.HEADER.size + slot * self.SLOT.size
+            )
+            if offset == 0:
+                return None
+            if slot_digest == digest:
+                return offset
+            slot = (slot + 1) & mask
+
+    def _record(self, key_id: str) -> tuple[int, int]:
+        """Returns where the bundle of a key id is.
+
+        Args:
+            key_id (str): The key id.
+
+        Raises:
+            KeyError: If the key id is not in the store.
+
+        Returns:
+            tuple[int, int]: The bundle offset and bundle length.
+        """
+        offset = self._find(key_id)
+        if offset is None:
+            raise KeyError(key_id)
+        id_length, bundle_length = self.RECORD.unpack_from(self._view, offset)
+        id_start = offset + self.RECORD.size
+        if bytes(self._view[id_start : id_start + id_length]) != key_id.encode("utf-8"):
+            raise KeyError(key_id)
+        return id_start + id_length, bundle_length
+
+    def _records(self):
+        """Yields every record in file order.
+
+        Yields:
+            tuple[str, int, int]: The key id, bundle offset and bundle length.
+        """
+        offsets = []
+        for slot in range(self._slots):
+            _, offset = self.SLOT.unpack_from(
+                self._view, self.HEADER.size + slot * self.SLOT.size
+            )
+            if offset:
+                offsets.append(offset)
+        for offset in sorted(offsets):
+            id_length, bundle_length = self.RECORD.unpack_from(self._view, offset)
+            id_start = offset + self.RECORD.size
+            key_id = bytes(self._view[id_start : id_start + id_length]).decode("utf-8")
+            yield key_id, id_start + id_length, bundle_length
+
+    def _tables(self, bundle_end: int, shared: bool) -> dict:
+        """Returns the tables of a record, as views onto the map or as copies.
+
+        Args:
+            bundle_end (int): The offset just past the record's bundle.
+            shared (bool): Whether to return views instead of copies.
+
+        Returns:
+            dict: The tables by name, each a list of rows.
+        """
+        position = self._align(bundle_end)
+        tables = {}
+        for name, item, rows, length in self.TABLES:
+            size = struct.calcsize(item) * rows * length
+            table = self._view[position : position + size].cast(item)
+            position += size
+            table_rows = [table[i * length : (i + 1) * length] for i in range(rows)]
+            if not shared:
+                # Byte rows stay bytes, as RotorMachine builds them
+                convert = bytes if item == "B" else memoryview.tolist
+                table_rows = [convert(row) for row in table_rows]
+            tables[name] = table_rows
+        return tables
+
+    @staticmethod
+    def _digest(key_id: str) -> bytes:
+        """Returns the index hash of a key id.
+
+        Args:
+            key_id (str): The key id.
+
+        Returns:
+            bytes: The 16-byte BLAKE2b digest.
+        """
+        return hashlib.blake2b(key_id.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _align(offset: int) -> int:
+        """Rounds an offset up to a multiple of 8.
+
+        Args:
+            offset (int): The offset.
+
+        Returns:
+            int: The aligned offset.
+        """
+        return (offset + 7) & ~7
+
+
+def main():
+    """Command-line entry point: builds, compacts or lists a key store."""
+    parser = argparse.ArgumentParser(description="Memory-mapped key store tool.")
+    parser.add_argument("store", help="Key store file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Write a new store from key bundles.")
+    build.add_argument(
+        "bundles", nargs="+", metavar="ID=FILE", help="Key id and key bundle file."
+    )
+    compact = subparsers.add_parser(
+        "compact", help="Rewrite a store, dropping and adding keys."
+    )
+    compact.add_argument("--remove", nargs="+", default=[], help="Key ids to drop.")
+    compact.add_argument(
+        "--add", nargs="+", default=[], metavar="ID=FILE", help="Keys to add."
+    )
+    subparsers.add_parser("list", help="Print the key ids.")
+    args = parser.parse_args()
+
+    def read_bundles(specs):
+        keys = {}
+        for spec in specs:
+            key_id, _, file_name = spec.partition("=")
+            with open(file_name, "rb") as file:
+                keys[key_id] = file.read()
+        return keys
+
+    if args.command == "build":
+        KeyStore.build(args.store, read_bundles(args.bundles))
+    elif args.command == "compact":
+        KeyStore.compact(args.store, args.remove, read_bundles(args.add))
+    with KeyStore(args.store) as store:
+        for key_id in store.ids():
+            print(key_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+import argparse
+import asyncio
+import csv
+import math
+import platform
+import queue
+import random
+import threading
+import time
+
+from async_hybrid_cryptosystem import AsyncHybridCryptosystem
+from crypto_client import CryptoClient
+from crypto_daemon import CryptoDaemon
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class LoadGenerator:
+    """
+    Drives an engine with synthetic traffic and records latency and resource use.
+
+    Targets:
+        key_context: a HybridCryptosystem's KeyContext, called from the worker threads.
+        daemon: a CryptoDaemon through a CryptoClient; one is started in this
+            process unless an address is given.
+        async: an AsyncHybridCryptosystem on an event loop in a background thread.
+
+    Message sizes are drawn from a distribution spec: fixed:N,
+    uniform:MIN:MAX, lognormal:MEDIAN:SIGMA or choice:A,B,... in bytes,
+    capped at max_size. Without a rate the load is closed: concurrency
+    workers send requests back to back. With a rate it is open: requests
+    arrive as a Poisson process of rate per second, wait in a queue for one
+    of the concurrency workers, and their latency is measured from the
+    arrival, so queueing under overload is counted instead of hidden. Queued
+    requests are still served after duration, so an overloaded run takes
+    longer than duration.
+
+    While the load runs, the process CPU and RSS are sampled every
+    sample_interval seconds with psutil. The report holds every request, the
+    resource samples and a summary with the latency percentiles, and can be
+    written to CSV files or loaded into pandas DataFrames to compare builds.
+    """
+
+    TARGETS = ["key_context", "daemon", "async"]
+    OPERATIONS = ["encrypt", "roundtrip"]
+
+    def __init__(
+        self,
+        target: str = "key_context",
+        sizes: str = "lognormal:1024:1.0",
+        rate: float = None,
+        concurrency: int = 4,
+        duration: float = 10.0,
+        operation: str = "encrypt",
+        max_size: int = 1024 * 1024,
+        sample_interval: float = 0.25,
+        seed: int = 0,
+        address=None,
+    ):
+        if target not in self.TARGETS:
+            raise ValueError(
+                f"Unknown target: expected one of {', '.join(self.TARGETS)}, got {target!r}."
+            )
+        if operation not in self.OPERATIONS:
+            raise ValueError(
+                f"Unknown operation: expected one of {', '.join(self.OPERATIONS)}, got {operation!r}."
+            )
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}.")
+        if rate is not None and rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}.")
+        self.target = target
+        self.sizes = sizes
+        self.size_distribution = self._size_distribution(sizes, max_size)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.duration = duration
+        self.operation = operation
+        self.max_size = max_size
+        self.sample_interval = sample_interval
+        self.seed = seed
+        # Address of a running daemon for the daemon target
+        self.address = address
+
+    def run(self) -> dict:
+        """Runs the load for duration seconds.
+
+        Returns:
+            dict: The summary, one entry per request (arrival offset, size, latency in
+            seconds, ok) and the resource samples (offset, CPU percent, RSS bytes,
+            threads, completed requests).
+        """
+        import psutil
+
+        rng = random.Random(self.seed)
+        # Every payload is a slice of one random ASCII text, so building them costs a copy
+        ascii_table = bytes(i & 0x7F for i in range(256))
+        text = rng.randbytes(self.max_size).translate(ascii_table).decode("latin-1")
+        crypt, close = self._open_target()
+        try:
+            # Warm up the lookups and connections outside the measured window
+            crypt(text[:1024])
+            records = [[] for _ in range(self.concurrency)]
+            requests = None if self.rate is None else queue.Queue()
+            clock = time.perf_counter
+            began = clock()
+            deadline = began + self.duration
+            workers = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(
+                        index,
+                        crypt,
+                        text,
+                        requests,
+                        began,
+                        deadline,
+                        records[index],
+                    ),
+                    daemon=True,
+                )
+                for index in range(self.concurrency)
+            ]
+            resources = []
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=self._sample_resources,
+                args=(psutil.Process(), began, records, resources, stop),
+                daemon=True,
+            )
+            sampler.start()
+            for worker in workers:
+                worker.start()
+            if requests is not None:
+                self._dispatch(rng, requests, deadline)
+            for worker in workers:
+                worker.join()
+            seconds = clock() - began
+            stop.set()
+            sampler.join()
+        finally:
+            close()
+
+        requests = sorted(
+            (
+                {"offset": offset, "size": size, "latency": latency, "ok": ok}
+                for worker_records in records
+                for offset, size, latency, ok in worker_records
+            ),
+            key=lambda request: request["offset"],
+        )
+        return {
+            "summary": self._summarize(requests, resources, seconds),
+            "requests": requests,
+            "resources": resources,
+        }
+
+    @staticmethod
+    def to_dataframes(report: dict) -> dict:
+        """Loads a report into pandas.
+
+        Args:
+            report (dict): A report from run.
+
+        Returns:
+            dict[str, pandas.DataFrame]: The requests, resources and summary (one row) frames.
+        """
+        import pandas
+
+        return {
+            "requests": pandas.DataFrame(report["requests"]),
+            "resources": pandas.DataFrame(report["resources"]),
+            "summary": pandas.DataFrame([report["summary"]]),
+        }
+
+    @staticmethod
+    def write_csv(report: dict, prefix: str) -> list[str]:
+        """Writes a report as <prefix>_requests.csv, <prefix>_resources.csv and <prefix>_summary.csv.
+
+        Args:
+            report (dict): A report from run.
+            prefix (str): The path prefix of the files.
+
+        Returns:
+            list[str]: The paths written.
+        """
+        paths = []
+        for name, rows in [
+            ("requests", report["requests"]),
+            ("resources", report["resources"]),
+            ("summary", [report["summary"]]),
+        ]:
+            path = f"{prefix}_{name}.csv"
+            with open(path, "w", newline="") as file:
+                if rows:
+                    writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                    writer.writeheader()
+                    writer.writerows(rows)
+            paths.append(path)
+        return paths
+
+    def _open_target(self):
+        """Prepares the target.
+
+        Returns:
+            tuple[Callable[[str], object], Callable[[], None]]: The operation on one
+            message, run by the workers, and the function that releases the target.
+        """
+        roundtrip = self.operation == "roundtrip"
+        cryptosystem = HybridCryptosystem(seed=self.seed)
+        closers = []
+        if self.target == "key_context":
+            key_context = cryptosystem.key_context()
+            encrypt, decrypt = key_context.encrypt, key_context.decrypt
+        elif self.target == "daemon":
+            address = self.address
+            if address is None:
+                daemon = CryptoDaemon(("127.0.0.1", 0), max_workers=self.concurrency)
+                address = daemon.start()
+                closers.append(daemon.stop)
+            client = CryptoClient(address, pool_size=self.concurrency)
+            closers.append(client.close)
+            key_id = client.new_key()
+            closers.append(lambda: client.drop_key(key_id))
+            encrypt = lambda M: client.encrypt(key_id, M)
+            decrypt = lambda M: client.decrypt(key_id, M)
+        else:
+            front_end = AsyncHybridCryptosystem(cryptosystem)
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, daemon=True)
+            thread.start()
+
+            def stop_loop():
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+
+            closers.append(stop_loop)
+            encrypt = lambda M: asyncio.run_coroutine_threadsafe(
+                front_end.encrypt(M), loop
+            ).result()
+            decrypt = lambda M: asyncio.run_coroutine_threadsafe(
+                front_end.decrypt(M), loop
+            ).result()
+
+        def close():
+            for closer in reversed(closers):
+                closer()
+
+        if not roundtrip:
+            return encrypt, close
+
+        def crypt(M):
+            if decrypt(encrypt(M)) != M:
+                raise ValueError(
+                    "Round trip mismatch: the decrypted text differs from the plaintext."
+                )
+
+        return crypt, close
+
+    def _worker(self, index, crypt, text, requests, began, deadline, records):
+        """Sends requests until the deadline (closed load) or the queue ends (open load).
+
+        Args:
+            index (int): The worker number, which seeds its sizes in a closed load.
+            crypt (Callable[[str], object]): The operation on one message.
+            text (str): The text the payloads are sliced from.
+            requests (queue.Queue | None): (arrival time, size) tuples, None for a closed load.
+            began (float): The start of the run on the perf_counter clock.
+            deadline (float): The end of the run on the perf_counter clock.
+            records (list): Receives (arrival offset, size, latency, ok) per request.
+        """
+        rng = random.Random(f"{self.seed}/{index}")
+        clock = time.perf_counter
+        while True:
+            if requests is None:
+                arrival = clock()
+                if arrival >= deadline:
+                    return
+                size = self.size_distribution(rng)
+            else:
+                request = requests.get()
+                if request is None:
+                    return
+                arrival, size = request
+            start = rng.randrange(len(text) - size + 1)
+            M = text[start : start + size]
+            try:
+                crypt(M)
+                ok = True
+            except Exception:
+                ok = False
+            records.append((arrival - began, size, clock() - arrival, ok))
+
+    def _dispatch(self, rng: random.Random, requests: queue.Queue, deadline: float):
+        """Puts requests on the queue at Poisson arrival times until the deadline, then one None per worker.
+
+        Args:
+            rng (random.Random): The arrival and size generator.
+            requests (queue.Queue): The request queue of the workers.
+            deadline (float): The end of the run on the perf_counter clock.
+        """
+        clock = time.perf_counter
+        arrival = clock()
+        while True:
+            arrival += rng.expovariate(self.rate)
+            if arrival >= deadline:
+                break
+            delay = arrival - clock()
+            if delay > 0:
+                time.sleep(delay)
+            requests.put((arrival, self.size_distribution(rng)))
+        for _ in range(self.concurrency):
+            requests.put(None)
+
+    def _sample_resources(self, process, began, records, resources, stop):
+        """Samples the process every sample_interval seconds until stopped.
+
+        Args:
+            process (psutil.Process): This process.
+            began (float): The start of the run on the perf_counter clock.
+            records (list[list]): The request records of every worker.
+            resources (list): Receives one dict per sample.
+            stop (threading.Event): Set when the run is over.
+        """
+        # The first call only sets the reference point of cpu_percent
+        process.cpu_percent(None)
+        while not stop.wait(self.sample_interval):
+            resources.append(
+                {
+                    "offset": time.perf_counter() - began,
+                    "cpu_percent": process.cpu_percent(None),
+                    "rss_bytes": process.memory_info().rss,
+                    "threads": process.num_threads(),
+                    "completed": sum(map(len, records)),
+                }
+            )
+
+    def _summarize(
+        self, requests: list[dict], resources: list[dict], seconds: float
+    ) -> dict:
+        """Summarizes a run.
+
+        Args:
+            requests (list[dict]): The request records.
+            resources (list[dict]): The resource samples.
+            seconds (float): The wall-clock duration of the run.
+
+        Returns:
+            dict: The settings, request and error counts, throughput, latency mean and
+            percentiles in seconds, and CPU and RSS statistics.
+        """
+        latencies = sorted(request["latency"] for request in requests if request["ok"])
+        nbytes = sum(request["size"] for request in requests if request["ok"])
+        cpu = [sample["cpu_percent"] for sample in resources]
+        rss = [sample["rss_bytes"] for sample in resources]
+        return {
+            "python": platform.python_version(),
+            "target": self.target,
+            "operation": self.operation,
+            "sizes": self.sizes,
+            "rate": self.rate,
+            "concurrency": self.concurrency,
+            "seconds": seconds,
+            "requests": len(requests),
+            "errors": len(requests) - len(latencies),
+            "requests_per_s": len(latencies) / seconds,
+            "mb_per_s": nbytes / seconds / 1e6,
+            "latency_mean": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": self._percentile(latencies, 50),
+            "latency_p99": self._percentile(latencies, 99),
+            "latency_p999": self._percentile(latencies, 99.9),
+            "latency_max": latencies[-1] if latencies else None,
+            "cpu_percent_mean": sum(cpu) / len(cpu) if cpu else None,
+            "cpu_percent_max": max(cpu, default=None),
+            "rss_max_bytes": max(rss, default=None),
+            "rss_growth_bytes": rss[-1] - rss[0] if rss else None,
+        }
+
+    @staticmethod
+    def _size_distribution(spec: str, max_size: int):
+        """Parses a message size distribution.
+
+        Args:
+            spec (str): fixed:N, uniform:MIN:MAX, lognormal:MEDIAN:SIGMA or choice:A,B,...
+            max_size (int): The largest size drawn.
+
+        Raises:
+            ValueError: If spec is not a distribution.
+
+        Returns:
+            Callable[[random.Random], int]: Draws a size between 1 and max_size.
+        """
+        kind, _, arguments = spec.partition(":")
+        try:
+            if kind == "fixed":
+                size = int(arguments)
+                draw = lambda rng: size
+            elif kind == "uniform":
+                low, high = map(int, arguments.split(":"))
+                draw = lambda rng: rng.randint(low, high)
+            elif kind == "lognormal":
+                median, sigma = arguments.split(":")
+                mu, sigma = math.log(float(median)), float(sigma)
+                draw = lambda rng: round(rng.lognormvariate(mu, sigma))
+            elif kind == "choice":
+                sizes = [int(size) for size in arguments.split(",")]
+                draw = lambda rng: rng.choice(sizes)
+            else:
+                raise ValueError(kind)
+        except ValueError:
+            raise ValueError(
+                f"Invalid size distribution: expected fixed:N, uniform:MIN:MAX, lognormal:MEDIAN:SIGMA or choice:A,B,..., got {spec!r}."
+            ) from None
+        return lambda rng: min(max(draw(rng), 1), max_size)
+
+    @staticmethod
+    def _percentile(values: list[float], percent: float):
+        """Returns the nearest-rank percentile of sorted values.
+
+        Args:
+            values (list[float]): The sorted values.
+            percent (float): The percentile.
+
+        Returns:
+            float | None: The value at that percentile, None without values.
+        """
+        if not values:
+            return None
+        rank = max(math.ceil(percent * len(values) / 100), 1)
+        return values[rank - 1]
+
+
+def main():
+    """Command-line entry point: runs the load, prints the summary and optionally writes CSV files."""
+    parser = argparse.ArgumentParser(description="Synthetic load generator.")
+    parser.add_argument(
+        "--target",
+        choices=LoadGenerator.TARGETS,
+        default="key_context",
+        help="What to drive.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="lognormal:1024:1.0",
+        help="Message size distribution: fixed:N, uniform:MIN:MAX, lognormal:MEDIAN:SIGMA or choice:A,B,...",
+    )
+    parser.add_argument(
+        "--rate", type=float, help="Poisson arrivals per second (default: closed load)."
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="Worker threads.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load.")
+    parser.add_argument(
+        "--operation",
+        choices=LoadGenerator.OPERATIONS,
+        default="encrypt",
+        help="Per request.",
+    )
+    parser.add_argument(
+        "--max-size", type=int, default=1024 * 1024, help="Largest message size."
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.25,
+        help="Seconds between CPU/RSS samples.",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Key, size and payload seed."
+    )
+    parser.add_argument(
+        "--address",
+        help="Running daemon as a socket path or host:port (daemon target).",
+    )
+    parser.add_argument("--output", help="Path prefix of the CSV files to write.")
+    args = parser.parse_args()
+
+    address = args.address
+    if address is not None and ":" in address:
+        host, port = address.rsplit(":", 1)
+        address = (host, int(port))
+    report = LoadGenerator(
+        args.target,
+        args.sizes,
+        args.rate,
+        args.concurrency,
+        args.duration,
+        args.operation,
+        args.max_size,
+        args.sample_interval,
+        args.seed,
+        address,
+    ).run()
+    for name, value in report["summary"].items():
+        print(
+            f"{name:<18} {value:.6g}"
+            if isinstance(value, float)
+            else f"{name:<18} {value}"
+        )
+    if args.output:
+        for path in LoadGenerator.write_csv(report, args.output):
+            print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
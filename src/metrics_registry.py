@@ -0,0 +1,433 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hybrid_cryptosystem import HybridCryptosystem
+from key_context import KeyContext
+from stage_timer import StageTimer
+
+
+class MetricsRegistry:
+    """
+    Operational metrics of the hybrid cryptosystem in the Prometheus text format.
+
+    Counters and histograms are sharded per thread: every thread updates its
+    own dict without locks, and render sums the shards. Only the first update
+    from a new thread takes the lock, to register its shard. Shard values are
+    never mutated in place: counters are numbers and histograms are tuples
+    replaced on every observation, so a scrape reads each one whole. Gauges are
+    callbacks evaluated at scrape time, which is how the cache hit rates and
+    worker pool queue depths are collected without touching the hot path.
+
+    instrument times the public operations of a HybridCryptosystem or of the
+    engine behind a KeyContext (see StageTimer.instrument_methods). Every call
+    counts the bytes passed through each layer, the characters processed by
+    the rotor machine and the blocks processed by DES, and records its latency
+    in a histogram. The counts come from the plaintext and ciphertext sides of
+    the call, whichever is the input or the result, so padding is counted as
+    DES blocks only and each message of a batch is padded on its own. With
+    compression, the rotor characters are those of the uncompressed text.
+    Results served from a CiphertextCache are counted like any other call.
+    serve exposes render on a local HTTP endpoint.
+    """
+
+    # Upper bounds of the latency histogram buckets, in seconds
+    LATENCY_BUCKETS = (
+        0.0001,
+        0.0005,
+        0.001,
+        0.005,
+        0.01,
+        0.05,
+        0.1,
+        0.5,
+        1.0,
+        5.0,
+        10.0,
+    )
+
+    # Instrumented engine operations: (attribute, span name, bytes given to the operation)
+    SPANS = StageTimer.HYBRID_SPANS + [
+        (
+            "encrypt_segment",
+            "hybrid.encrypt_segment",
+            lambda M, start, final: len(M),
+        ),
+        (
+            "decrypt_segment",
+            "hybrid.decrypt_segment",
+            lambda M, start, final: len(M),
+        ),
+        (
+            "encrypt_into",
+            "hybrid.encrypt_into",
+            lambda src, dst: memoryview(src).nbytes,
+        ),
+        (
+            "decrypt_into",
+            "hybrid.decrypt_into",
+            lambda src, dst: memoryview(src).nbytes,
+        ),
+    ]
+
+    # Type and help text of the built-in metrics
+    METRICS = {
+        "hybrid_operations_total": ("counter", "Calls of the engine operations."),
+        "hybrid_layer_bytes_total": ("counter", "Bytes passed through each layer."),
+        "hybrid_rotor_chars_total": (
+            "counter",
+            "Characters processed by the rotor machine.",
+        ),
+        "hybrid_des_blocks_total": ("counter", "Blocks processed by DES."),
+        "hybrid_operation_seconds": ("histogram", "Latency of the engine operations."),
+        "hybrid_cache_hits_total": ("counter", "Cache hits."),
+        "hybrid_cache_misses_total": ("counter", "Cache misses."),
+        "hybrid_cache_hit_ratio": ("gauge", "Cache hits per lookup."),
+        "hybrid_cache_entries": ("gauge", "Entries held by the cache."),
+        "hybrid_queue_depth": ("gauge", "Tasks waiting for a worker."),
+    }
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._metrics = dict(self.METRICS)
+        # One {(name, labels): value} dict per thread that has updated a metric
+        self._shards = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # name -> callbacks returning a value or {labels: value}
+        self._gauges = {}
+        # span name -> method, operation, rotor and DES label sets, built on first use
+        self._span_labels = {}
+        self._timers = []
+        self._server = None
+
+    def describe(self, name: str, kind: str, help: str = ""):
+        """Declares the type and help text of a metric.
+
+        Args:
+            name (str): The metric name.
+            kind (str): "counter", "gauge" or "histogram".
+            help (str): The help text.
+
+        Raises:
+            ValueError: If kind is not a metric type.
+        """
+        if kind not in ("counter", "gauge", "histogram"):
+            raise ValueError(
+                f"Invalid metric type: expected counter, gauge or histogram, got {kind!r}."
+            )
+        self._metrics[name] = (kind, help)
+
+    def inc(self, name: str, value=1, labels: tuple = ()):
+        """Adds to a counter.
+
+        Args:
+            name (str): The metric name.
+            value (int | float): The increment.
+            labels (tuple[tuple[str, str], ...]): The label names and values.
+        """
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: tuple = ()):
+        """Records a value in a histogram.
+
+        Args:
+            name (str): The metric name.
+            value (float): The observed value.
+            labels (tuple[tuple[str, str], ...]): The label names and values.
+        """
+        shard = self._shard()
+        key = (name, labels)
+        # Per bucket counts (the last one is +Inf), then the count and the sum
+        counts = shard.get(key)
+        counts = [0] * (len(self.buckets) + 3) if counts is None else list(counts)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += 1
+        counts[-1] += value
+        # Replaced rather than updated, so collect never sees half an observation
+        shard[key] = tuple(counts)
+
+    def gauge(self, name: str, callback):
+        """Registers a gauge evaluated at every scrape.
+
+        Args:
+            name (str): The metric name.
+            callback (Callable): Returns the value, or a dict of label tuples to values.
+        """
+        with self._lock:
+            self._gauges.setdefault(name, []).append(callback)
+
+    def watch_cache(self, name: str, stats):
+        """Exports the hits, misses, hit ratio and entries of a cache.
+
+        Args:
+            name (str): The cache label.
+            stats (Callable): Returns a dict with hits, misses, hit_rate and entries,
+                such as CiphertextCache.stats, DESBlockCache.stats or
+                HybridCryptosystem.bundle_cache_stats.
+        """
+        labels = (("cache", name),)
+        for metric, field in (
+            ("hybrid_cache_hits_total", "hits"),
+            ("hybrid_cache_misses_total", "misses"),
+            ("hybrid_cache_hit_ratio", "hit_rate"),
+            ("hybrid_cache_entries", "entries"),
+        ):
+            self.gauge(metric, lambda field=field: {labels: stats()[field]})
+
+    def watch_queue(self, name: str, stats):
+        """Exports the queue depth of a worker pool.
+
+        Args:
+            name (str): The pool label.
+            stats (Callable): Returns a dict with queued, such as
+                HybridCryptosystemPool.stats (checkouts waiting for a check-in)
+                or CryptoDaemon.stats (requests waiting for a worker).
+        """
+        labels = (("pool", name),)
+        self.gauge("hybrid_queue_depth", lambda: {labels: stats()["queued"]})
+
+    def instrument(self, target):
+        """Measures the operations of a HybridCryptosystem or KeyContext until detach.
+
+        Args:
+            target (HybridCryptosystem | KeyContext): The engine or key context.
+
+        Raises:
+            ValueError: If target is neither.
+        """
+        if isinstance(target, KeyContext):
+            target = target._cryptosystem
+        if not isinstance(target, HybridCryptosystem):
+            raise ValueError(
+                f"Cannot instrument {type(target).__name__}, expected HybridCryptosystem or KeyContext."
+            )
+        block_bytes = target.block_bytes
+        timer = StageTimer(
+            sink=lambda name, seconds, nbytes, result: self._record(
+                name, seconds, nbytes, result, block_bytes
+            )
+        )
+        timer.instrument_methods(target, self.SPANS)
+        self._timers.append(timer)
+
+    def detach(self):
+        """Restores every instrumented engine. The recorded metrics are kept."""
+        for timer in reversed(self._timers):
+            timer.detach()
+        self._timers = []
+
+    def collect(self) -> dict:
+        """Sums the counters and histograms of every thread.
+
+        Returns:
+            dict[tuple[str, tuple], int | float | list]: Per metric name and labels,
+                the counter value or the histogram bucket counts, count and sum.
+        """
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            # dict.copy is atomic and the values are immutable, so the owner
+            # thread can keep writing
+            for key, value in shard.copy().items():
+                if isinstance(value, tuple):
+                    total = totals.get(key)
+                    if total is None:
+                        totals[key] = list(value)
+                    else:
+                        for i, count in enumerate(value):
+                            total[i] += count
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition, one sample per line.
+        """
+        samples = {}
+        for (name, labels), value in self.collect().items():
+            samples.setdefault(name, []).append((labels, value))
+        with self._lock:
+            gauges = {name: list(callbacks) for name, callbacks in self._gauges.items()}
+        for name, callbacks in gauges.items():
+            for callback in callbacks:
+                value = callback()
+                if isinstance(value, dict):
+                    samples.setdefault(name, []).extend(value.items())
+                else:
+                    samples.setdefault(name, []).append(((), value))
+
+        lines = []
+        for name in sorted(samples):
+            kind, help = self._metrics.get(name, ("untyped", ""))
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples[name]):
+                if kind == "histogram":
+                    cumulative = 0
+                    bounds = [*map(self._number, self.buckets), "+Inf"]
+                    for bound, count in zip(bounds, value):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{self._labels(labels + (('le', bound),))} {cumulative}"
+                        )
+                    lines.append(f"{name}_count{self._labels(labels)} {value[-2]}")
+                    lines.append(
+                        f"{name}_sum{self._labels(labels)} {self._number(value[-1])}"
+                    )
+                else:
+                    lines.append(f"{name}{self._labels(labels)} {self._number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+        """Serves render at /metrics from a background thread until close.
+
+        Args:
+            host (str): The address to bind, local only by default.
+            port (int): The port, 0 for any free one.
+
+        Returns:
+            ThreadingHTTPServer: The server; server_address holds the bound port.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "text/plain; version=0.0.4; charset=utf-8"
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.close()
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def close(self):
+        """Stops the HTTP endpoint, if serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.detach()
+        self.close()
+
+    def _shard(self) -> dict:
+        """Returns the calling thread's shard, registering it on first use.
+
+        Returns:
+            dict: The shard.
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _record(self, name: str, seconds: float, nbytes: int, result, block_bytes: int):
+        """Records one engine operation, the StageTimer sink of instrument.
+
+        The input of an encrypt operation and the result of a decrypt operation
+        are the plaintext, handled by the rotor machine; the other side is the
+        padded ciphertext, handled by DES. A failed call counts its input only.
+
+        Args:
+            name (str): The span name, such as hybrid.encrypt_segment.
+            seconds (float): The time spent.
+            nbytes (int): The bytes given to the operation.
+            result (str | list[str] | int): The operation's result: a text, one text
+                per message, or the bytes written; None if it raised.
+            block_bytes (int): The DES block size in bytes.
+        """
+        labels = self._span_labels.get(name)
+        if labels is None:
+            method = name.partition(".")[2]
+            operation = "encrypt" if method.startswith("encrypt") else "decrypt"
+            labels = self._span_labels[name] = (
+                operation,
+                (("method", method), ("operation", operation)),
+                (("operation", operation),),
+                (("layer", "rotor"), ("operation", operation)),
+                (("layer", "des"), ("operation", operation)),
+            )
+        operation, method_labels, operation_labels, rotor_labels, des_labels = labels
+        if result is None:
+            result_bytes = 0
+        elif isinstance(result, int):
+            result_bytes = result
+        elif isinstance(result, list):
+            result_bytes = sum(map(len, result))
+        else:
+            result_bytes = len(result)
+        if operation == "encrypt":
+            chars, des_bytes = nbytes, result_bytes
+        else:
+            chars, des_bytes = result_bytes, nbytes
+        self.inc("hybrid_operations_total", 1, method_labels)
+        self.observe("hybrid_operation_seconds", seconds, method_labels)
+        self.inc("hybrid_rotor_chars_total", chars, operation_labels)
+        self.inc("hybrid_des_blocks_total", des_bytes // block_bytes, operation_labels)
+        self.inc("hybrid_layer_bytes_total", chars, rotor_labels)
+        self.inc("hybrid_layer_bytes_total", des_bytes, des_labels)
+
+    @staticmethod
+    def _labels(labels: tuple) -> str:
+        """Formats a label set, escaping the values.
+
+        Args:
+            labels (tuple[tuple[str, str], ...]): The label names and values.
+
+        Returns:
+            str: The {name="value",...} suffix, empty without labels.
+        """
+        if not labels:
+            return ""
+        pairs = []
+        for key, value in labels:
+            value = (
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n")
+            )
+            pairs.append(f'{key}="{value}"')
+        return "{" + ",".join(pairs) + "}"
+
+    @staticmethod
+    def _number(value) -> str:
+        """Formats a sample value.
+
+        Args:
+            value (int | float): The value.
+
+        Returns:
+            str: The value, integral floats without a fraction.
+        """
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,208 @@
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+def _run_stage(name, crypt_segment, segments_in, segments_out, stats):
+    """Stage worker: applies crypt_segment to every segment until the None sentinel.
+
+    An exception is passed downstream in place of a segment. After that the
+    remaining segments are dropped rather than processed, but the stage keeps
+    reading until the sentinel so the pipeline always drains. The stage's busy
+    time and segment count are put on the stats queue at the end.
+
+    Args:
+        name (str): The stage name used in the statistics.
+        crypt_segment (Callable[[str, int, bool], str]): The stage's layer.
+        segments_in (queue.Queue | multiprocessing.Queue): (segment, start, final) tuples from the previous stage.
+        segments_out (queue.Queue | multiprocessing.Queue): The processed tuples for the next stage.
+        stats (queue.Queue | multiprocessing.Queue): Receives (name, busy seconds, segments).
+    """
+    busy = 0.0
+    count = 0
+    failed = False
+    while True:
+        item = segments_in.get()
+        if item is None:
+            segments_out.put(None)
+            break
+        if failed:
+            continue
+        if isinstance(item, Exception):
+            segments_out.put(item)
+            failed = True
+            continue
+        segment, start, final = item
+        began = time.perf_counter()
+        try:
+            result = crypt_segment(segment, start, final)
+        except Exception as error:
+            segments_out.put(error)
+            failed = True
+            continue
+        busy += time.perf_counter() - began
+        count += 1
+        segments_out.put((result, start, final))
+    stats.put((name, busy, count))
+
+
+class PipelinedHybridCryptosystem:
+    """
+    Runs the two layers of a HybridCryptosystem as concurrent pipeline stages.
+
+    The message is split into segments (HybridCryptosystem.split_segments). One
+    worker runs layer 1 and another runs layer 2, connected by bounded queues of
+    max_queue segments, so DES works on segment k while the rotor machine
+    produces segment k + 1. The output is identical to encrypt/decrypt; the
+    cryptosystem's compression, if any, is applied to the whole message
+    before the stages start and after they finish.
+
+    Stage workers are processes by default, or threads on free-threaded builds
+    where threads run in parallel. After every call, stats holds the wall time
+    and the busy time, segment count and utilization of each stage.
+    """
+
+    def __init__(
+        self,
+        cryptosystem: HybridCryptosystem = None,
+        chunk_size: int = 65536,
+        max_queue: int = 4,
+        use_processes: bool = None,
+    ):
+        if cryptosystem is None:
+            cryptosystem = HybridCryptosystem()
+        if use_processes is None:
+            use_processes = getattr(sys, "_is_gil_enabled", lambda: True)()
+        self.cryptosystem = cryptosystem
+        self.chunk_size = chunk_size
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self.stats = None
+
+    def encrypt(self, M: str) -> str:
+        """Encrypts the plaintext with the rotor and DES stages running concurrently.
+
+        Args:
+            M (str): The plaintext to encrypt.
+
+        Returns:
+            str: The encrypted ciphertext, identical to HybridCryptosystem.encrypt.
+        """
+        compression = self.cryptosystem.compression
+        if compression is not None:
+            M = compression.compress(M)
+        return self._run(
+            M,
+            [
+                ("rotor", self.cryptosystem.rotor_encrypt_segment),
+                ("des", self.cryptosystem.des_encrypt_segment),
+            ],
+        )
+
+    def decrypt(self, M: str) -> str:
+        """Decrypts the ciphertext with the DES and rotor stages running concurrently.
+
+        Args:
+            M (str): The ciphertext to decrypt.
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks.
+
+        Returns:
+            str: The decrypted plaintext, identical to HybridCryptosystem.decrypt.
+        """
+        block_bytes = self.cryptosystem.block_bytes
+        if len(M) % block_bytes != 0:
+            raise ValueError(
+                f"Ciphertext size mismatch: expected a multiple of {block_bytes} characters, got {len(M)} characters."
+            )
+        D2 = self._run(
+            M,
+            [
+                ("des", self.cryptosystem.des_decrypt_segment),
+                ("rotor", self.cryptosystem.rotor_decrypt_segment),
+            ],
+        )
+        compression = self.cryptosystem.compression
+        if compression is not None:
+            D2 = compression.decompress(D2)
+        return D2
+
+    def _run(self, M: str, stages: list) -> str:
+        """Feeds the segments of M through the stages and collects the output in order.
+
+        Args:
+            M (str): The message.
+            stages (list[tuple[str, Callable[[str, int, bool], str]]]): The stage names and layers, in order.
+
+        Raises:
+            Exception: The error raised by a stage.
+
+        Returns:
+            str: The processed message.
+        """
+        segments = list(self.cryptosystem.split_segments(M, self.chunk_size))
+        if self.use_processes:
+            make_queue = multiprocessing.Queue
+            make_worker = multiprocessing.Process
+        else:
+            make_queue = queue.Queue
+            make_worker = threading.Thread
+
+        began = time.perf_counter()
+        queues = [make_queue(self.max_queue) for _ in range(len(stages) + 1)]
+        stats = make_queue()
+        workers = [
+            make_worker(
+                target=_run_stage,
+                args=(name, crypt_segment, queues[i], queues[i + 1], stats),
+                daemon=True,
+            )
+            for i, (name, crypt_segment) in enumerate(stages)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # The feeder blocks on the bounded queue while the first stage is busy
+        def feed():
+            for item in segments:
+                queues[0].put(item)
+            queues[0].put(None)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        # Drain the whole pipeline even after an error so every worker finishes
+        results = []
+        error = None
+        while True:
+            item = queues[-1].get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                error = item
+            else:
+                results.append(item[0])
+        feeder.join()
+        stage_stats = {}
+        while len(stage_stats) < len(stages):
+            name, busy, count = stats.get()
+            stage_stats[name] = (busy, count)
+        for worker in workers:
+            worker.join()
+        if error is not None:
+            raise error
+
+        wall = time.perf_counter() - began
+        self.stats = {"wall_seconds": wall}
+        for name, (busy, count) in stage_stats.items():
+            self.stats[name] = {
+                "busy_seconds": busy,
+                "segments": count,
+                "utilization": busy / wall if wall else 0.0,
+            }
+        return "".join(results)
@@ -1,16 +1,24 @@
+import itertools
+import math
+
 from des_generator import DesGenerator
 
 
 class RotorMachine:
     # Note I am assuming rotors are length 128 for all ASCII characters
+
+    # Characters translated per rotor offset schedule computed by encrypt_into/decrypt_into
+    INTO_WINDOW = 65536
+
     def __init__(
         self,
         rotor1: list[str] = None,
         rotor2: list[str] = None,
         rotor3: list[str] = None,
+        seed=None,
     ):
 
-        self.generator = DesGenerator()
+        self.generator = DesGenerator(seed)
 
         if rotor1 is None:
             self.rotor1_original = self.generator.random_all_ascii()
@@ -28,7 +36,7 @@ class RotorMachine:
             self.rotor3_original = rotor3
 
         self.rotor_length = len(self.rotor1_original)  # 128 ascii length
-        sorted_alphabet = sorted(self.generator.random_all_ascii())
+        sorted_alphabet = [chr(i) for i in range(128)]
 
         for i, rotor in enumerate(
             [self.rotor1_original, self.rotor2_original, self.rotor3_original], start=1
@@ -37,6 +45,13 @@ class RotorMachine:
                 raise ValueError(
                     f"Rotor {i} must contain 26 unique uppercase and 26 unique lowercase letters."
                 )
+        # Bulk lookups, built on first use by encrypt_many/decrypt_many
+        self._encrypt_maps = None
+        self._decrypt_maps = None
+        self._encrypt_tables = None
+        self._decrypt_tables = None
+        # One period of the rotor offsets, built on first use by _rotor_offsets
+        self._offsets = None
         self.reset_rotors()
 
     def reset_rotors(self):
@@ -163,6 +178,305 @@ class RotorMachine:
             decrypted_text += self.decrypt_char(char)
         return decrypted_text
 
+    def precompute(self):
+        """
+        Builds the lookups used by encrypt_many, decrypt_many and the segment
+        functions now instead of on first use.
+        """
+        if self._encrypt_maps is None or self._decrypt_tables is None:
+            self._build_lookups()
+
+    def _build_lookups(self):
+        """
+        Precomputes the character mappings used by encrypt_many and decrypt_many.
+
+        With rotor k at position p, rotor_k[i] is rotor_k_original[(i + p) % L].
+        Rotor 2 maps index i to a character and straight back to index i, so a
+        character at index i of rotor 1 always leaves as rotor3[i]. The mapping
+        therefore only depends on the offset (rotor3_pos - rotor1_pos) % L, and
+        one dictionary per offset covers every rotor position.
+        """
+        length = self.rotor_length
+        rotor1_index = {char: i for i, char in enumerate(self.rotor1_original)}
+        rotor3_index = {char: i for i, char in enumerate(self.rotor3_original)}
+        self._encrypt_maps = [
+            {
+                char: self.rotor3_original[(i + offset) % length]
+                for char, i in rotor1_index.items()
+            }
+            for offset in range(length)
+        ]
+        self._decrypt_maps = [
+            {
+                char: self.rotor1_original[(i - offset) % length]
+                for char, i in rotor3_index.items()
+            }
+            for offset in range(length)
+        ]
+        # Byte forms for encrypt_into/decrypt_into, assigned last as they mark
+        # the build complete; tables supplied from a KeyStore are kept
+        if self._decrypt_tables is None or self._encrypt_tables is None:
+            self._decrypt_tables = self._byte_tables(self._decrypt_maps)
+            self._encrypt_tables = self._byte_tables(self._encrypt_maps)
+
+    def _byte_tables(self, maps: list[dict]) -> list[bytes]:
+        """Converts the per-offset character mappings to 256-byte translation tables.
+
+        Bytes outside the rotor alphabet map to themselves.
+
+        Args:
+            maps (list[dict]): One character mapping per rotor offset.
+
+        Returns:
+            list[bytes]: One translation table per rotor offset.
+        """
+        return [
+            bytes([ord(mapping.get(chr(code), chr(code))) for code in range(256)])
+            for mapping in maps
+        ]
+
+    def positions_at(self, index: int) -> tuple[int, int, int]:
+        """
+        Returns the rotor positions after index characters have been processed
+        from the reset state, without replaying the stepping.
+
+        Rotor 3 steps after every character that leaves rotor 2 at position 0:
+        the first L/2 - 1 characters, then L/2 characters in every window of
+        L/2 * L characters.
+
+        Args:
+            index (int): The number of characters processed since the reset.
+
+        Returns:
+            tuple[int, int, int]: rotor1_pos, rotor2_pos and rotor3_pos.
+        """
+        length = self.rotor_length
+        half_length = length // 2
+        period = half_length * length
+        rotor3_steps = (index // period) * half_length + min(
+            index % period, half_length - 1
+        )
+        return (
+            index % length,
+            (index // half_length) % length,
+            rotor3_steps % length,
+        )
+
+    def _offsets_from(self, start: int, size: int) -> list[int]:
+        """
+        Returns the rotor offset (rotor3_pos - rotor1_pos) % L used for the
+        characters at indexes start to start + size - 1 of a message.
+
+        Args:
+            start (int): The index of the first character.
+            size (int): The number of characters.
+
+        Returns:
+            list[int]: The offset for each character index.
+        """
+        length = self.rotor_length
+        half_length = length // 2
+        rotor1_pos, rotor2_pos, rotor3_pos = self.positions_at(start)
+        offsets = []
+        # Replay the stepping of rotate_rotors
+        for _ in range(size):
+            offsets.append((rotor3_pos - rotor1_pos) % length)
+            rotor1_pos = (rotor1_pos + 1) % length
+            if rotor1_pos % half_length == 0:
+                rotor2_pos = (rotor2_pos + 1) % length
+            if rotor2_pos % length == 0:
+                rotor3_pos = (rotor3_pos + 1) % length
+        return offsets
+
+    def _rotor_offsets(self) -> list[int]:
+        """
+        Returns the rotor offsets of one period of the stepping schedule.
+
+        The stepping does not depend on the text and repeats itself: rotor 1
+        every L characters, rotor 3 every L / gcd(L / 2, L) windows of
+        L / 2 * L characters (L * L characters in all for an even L). The
+        period is computed once, so the cache never grows with the message
+        length; callers cycle through it.
+
+        Returns:
+            list[int]: The offset for each character index of one period.
+        """
+        if self._offsets is None:
+            length = self.rotor_length
+            half_length = length // 2
+            period = half_length * length * (length // math.gcd(half_length, length))
+            self._offsets = self._offsets_from(0, period)
+        return self._offsets
+
+    def encrypt_segment(self, text: str, start: int) -> str:
+        """
+        Encrypts a segment of a message that begins at character index start.
+
+        The result is identical to the matching slice of encrypt(message). The
+        machine's own rotors are not used, so segments of the same message can
+        be encrypted independently and concurrently.
+
+        Args:
+            text (str): The plaintext segment.
+            start (int): The index of the segment's first character in the message.
+
+        Returns:
+            str: The ciphertext segment.
+        """
+        if self._encrypt_maps is None:
+            self._build_lookups()
+        maps = self._encrypt_maps
+        offsets = self._offsets_from(start, len(text))
+        return "".join(
+            [maps[offset].get(char, char) for char, offset in zip(text, offsets)]
+        )
+
+    def decrypt_segment(self, text: str, start: int) -> str:
+        """
+        Decrypts a segment of a message that begins at character index start.
+
+        Args:
+            text (str): The ciphertext segment.
+            start (int): The index of the segment's first character in the message.
+
+        Returns:
+            str: The plaintext segment.
+        """
+        if self._decrypt_maps is None:
+            self._build_lookups()
+        maps = self._decrypt_maps
+        offsets = self._offsets_from(start, len(text))
+        return "".join(
+            [maps[offset].get(char, char) for char, offset in zip(text, offsets)]
+        )
+
+    def encrypt_into(self, src, dst, start: int = 0) -> int:
+        """
+        Encrypts latin-1 bytes into a caller-provided buffer.
+
+        The result is identical to the matching slice of encrypt on the decoded
+        text. Each byte is translated through the table for its rotor offset and
+        written in place; only the offset schedule of every INTO_WINDOW bytes is
+        allocated. src and dst may be the same buffer.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The plaintext bytes.
+            dst (bytearray | memoryview | mmap.mmap): A writable buffer of at least len(src) bytes.
+            start (int): The index of the first byte in the message.
+
+        Raises:
+            ValueError: If dst is too small.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        if self._encrypt_tables is None:
+            self._build_lookups()
+        return self._translate_into(src, dst, start, self._encrypt_tables)
+
+    def decrypt_into(self, src, dst, start: int = 0) -> int:
+        """
+        Decrypts latin-1 bytes into a caller-provided buffer.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The ciphertext bytes.
+            dst (bytearray | memoryview | mmap.mmap): A writable buffer of at least len(src) bytes.
+            start (int): The index of the first byte in the message.
+
+        Raises:
+            ValueError: If dst is too small.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        if self._decrypt_tables is None:
+            self._build_lookups()
+        return self._translate_into(src, dst, start, self._decrypt_tables)
+
+    def _translate_into(self, src, dst, start: int, tables: list[bytes]) -> int:
+        """Translates every byte of src into dst through the table for its rotor offset.
+
+        Args:
+            src (bytes | bytearray | memoryview | mmap.mmap): The input bytes.
+            dst (bytearray | memoryview | mmap.mmap): The writable output buffer.
+            start (int): The index of the first byte in the message.
+            tables (list[bytes]): One translation table per rotor offset.
+
+        Raises:
+            ValueError: If dst is too small.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        source = memoryview(src).cast("B")
+        target = memoryview(dst).cast("B")
+        size = len(source)
+        if len(target) < size:
+            raise ValueError(
+                f"Buffer size mismatch: expected at least {size} bytes, got {len(target)} bytes."
+            )
+        for begin in range(0, size, self.INTO_WINDOW):
+            end = min(begin + self.INTO_WINDOW, size)
+            offsets = self._offsets_from(start + begin, end - begin)
+            for i, offset in zip(range(begin, end), offsets):
+                target[i] = tables[offset][source[i]]
+        return size
+
+    def encrypt_many(self, texts: list[str]) -> list[str]:
+        """
+        Encrypts several independent strings, each from the reset rotor state.
+
+        The result is identical to calling encrypt on every string, but the
+        rotors are never copied or rotated: each character is looked up in the
+        precomputed mapping for its position in the message.
+
+        Args:
+            texts (list[str]): The plaintext strings to be encrypted.
+
+        Returns:
+            list[str]: The ciphertext strings, in the same order.
+        """
+        if self._encrypt_maps is None:
+            self._build_lookups()
+        return self._translate_many(texts, self._encrypt_maps)
+
+    def decrypt_many(self, texts: list[str]) -> list[str]:
+        """
+        Decrypts several independent strings, each from the reset rotor state.
+
+        Args:
+            texts (list[str]): The ciphertext strings to be decrypted.
+
+        Returns:
+            list[str]: The plaintext strings, in the same order.
+        """
+        if self._decrypt_maps is None:
+            self._build_lookups()
+        return self._translate_many(texts, self._decrypt_maps)
+
+    def _translate_many(self, texts: list[str], maps: list[dict]) -> list[str]:
+        """Maps every character through the lookup for its offset.
+
+        Characters outside the rotor alphabet are passed through unchanged.
+
+        Args:
+            texts (list[str]): The strings to translate.
+            maps (list[dict]): One character mapping per rotor offset.
+
+        Returns:
+            list[str]: The translated strings.
+        """
+        offsets = self._rotor_offsets()
+        return [
+            "".join(
+                [
+                    maps[offset].get(char, char)
+                    for char, offset in zip(text, itertools.cycle(offsets))
+                ]
+            )
+            for text in texts
+        ]
+
     def get_rotor_state_dict(self) -> dict:
         """Returns the current state of the rotor machine
 
@@ -0,0 +1,239 @@
+import argparse
+import os
+import random
+import signal
+import time
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the Python stack on a CPU-time timer.
+
+    start arms ITIMER_PROF, so the kernel sends SIGPROF every interval seconds
+    of process CPU time; the handler walks the interrupted frame up to the
+    root and counts the stack. Nothing is hooked into calls or returns, so
+    deeply nested helpers such as DESEncryption.round and the permutations
+    run at full speed between samples. Signals are handled by the main
+    thread, so only its stack is sampled, and the timer requires a Unix
+    platform.
+
+    collapsed renders the counts in the folded format read by flamegraph.pl,
+    speedscope and similar tools (one "root;...;leaf count" line per stack),
+    and top ranks the functions by self time, the samples in which they were
+    the leaf frame.
+    """
+
+    # Workloads of the profile command, built by workload
+    WORKLOADS = ["des", "rotor", "hybrid", "key_context"]
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        # (frame label, ...) from the root to the leaf -> samples
+        self.stacks = {}
+        self._labels = {}
+        self._previous_handler = None
+
+    def start(self):
+        """Starts sampling the main thread.
+
+        Raises:
+            RuntimeError: If the platform has no CPU-time interval timer.
+        """
+        if not hasattr(signal, "setitimer"):
+            raise RuntimeError(
+                "Sampling requires signal.setitimer, which this platform lacks."
+            )
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stops sampling and restores the previous SIGPROF handler. The samples are kept."""
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGPROF, self._previous_handler)
+            self._previous_handler = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def profile(self, operation, seconds: float = 1.0) -> int:
+        """Samples an operation repeated until seconds have passed.
+
+        Args:
+            operation (Callable[[], object]): The operation.
+            seconds (float): The wall-clock duration, at least one run.
+
+        Returns:
+            int: The number of runs.
+        """
+        runs = 0
+        clock = time.perf_counter
+        with self:
+            began = clock()
+            while not runs or clock() - began < seconds:
+                operation()
+                runs += 1
+        return runs
+
+    def samples(self) -> int:
+        """Returns the number of samples taken.
+
+        Returns:
+            int: The sample count.
+        """
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Renders the samples as collapsed stacks.
+
+        Returns:
+            str: One "root;...;leaf count" line per distinct stack, most sampled first.
+        """
+        lines = [
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        ]
+        return "".join(line + "\n" for line in lines)
+
+    def top(self, count: int = 20) -> list[dict]:
+        """Ranks the functions by self time.
+
+        Args:
+            count (int): The number of functions to return.
+
+        Returns:
+            list[dict]: Per function, most self samples first: its label, self and total
+            samples and their fractions of all samples. Total samples count every
+            stack the function appears in once, recursion included.
+        """
+        own = {}
+        total = {}
+        for stack, samples in self.stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + samples
+            for label in set(stack):
+                total[label] = total.get(label, 0) + samples
+        all_samples = self.samples()
+        ranked = sorted(total, key=lambda label: (-own.get(label, 0), -total[label]))
+        return [
+            {
+                "function": label,
+                "self_samples": own.get(label, 0),
+                "total_samples": total[label],
+                "self_fraction": own.get(label, 0) / all_samples,
+                "total_fraction": total[label] / all_samples,
+            }
+            for label in ranked[:count]
+        ]
+
+    def reset(self):
+        """Clears the samples."""
+        self.stacks = {}
+
+    @staticmethod
+    def workload(name: str, size: int, seed=0):
+        """Builds one of the profile command's workloads.
+
+        Args:
+            name (str): des (DESEncryption.encrypt), rotor (RotorMachine.encrypt),
+                hybrid (HybridCryptosystem.encrypt) or key_context (KeyContext.encrypt).
+            size (int): The payload size in bytes.
+            seed (int | str): The key and payload seed.
+
+        Raises:
+            ValueError: If name is not a workload.
+
+        Returns:
+            Callable[[], object]: The operation to profile, with its tables already built.
+        """
+        cryptosystem = HybridCryptosystem(seed=seed)
+        cryptosystem.precompute()
+        rng = random.Random(f"{seed}/{size}")
+        M = "".join([chr(rng.randrange(128)) for _ in range(size)])
+        if name == "des":
+            operation = lambda: cryptosystem.des.encrypt(M)
+        elif name == "rotor":
+            rotor_machine = cryptosystem.rotor_machine
+
+            def operation():
+                rotor_machine.reset_rotors()
+                return rotor_machine.encrypt(M)
+
+        elif name == "hybrid":
+            operation = lambda: cryptosystem.encrypt(M)
+        elif name == "key_context":
+            key_context = cryptosystem.key_context()
+            operation = lambda: key_context.encrypt(M)
+        else:
+            raise ValueError(
+                f"Unknown workload: expected one of {', '.join(SamplingProfiler.WORKLOADS)}, got {name!r}."
+            )
+        return operation
+
+    def _sample(self, signum, frame):
+        """SIGPROF handler: counts the interrupted stack.
+
+        Args:
+            signum (int): The signal number.
+            frame (frame): The interrupted frame of the main thread.
+        """
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                # Spaces and semicolons separate counts and frames in the folded format
+                label = labels[code] = f"{module}:{code.co_qualname}".replace(
+                    " ", "_"
+                ).replace(";", "_")
+            stack.append(label)
+            frame = frame.f_back
+        stack = tuple(reversed(stack))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+
+def main():
+    """Command-line entry point for the profile command: samples a workload, writes collapsed stacks and prints the top functions."""
+    parser = argparse.ArgumentParser(
+        description="Sampling profiler for the cipher workloads."
+    )
+    parser.add_argument(
+        "workload", choices=SamplingProfiler.WORKLOADS, help="The operation to profile."
+    )
+    parser.add_argument("--size", type=int, default=4096, help="Payload size in bytes.")
+    parser.add_argument(
+        "--seconds", type=float, default=5.0, help="How long to repeat the workload."
+    )
+    parser.add_argument(
+        "--interval", type=float, default=0.005, help="Seconds of CPU time per sample."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Key and payload seed.")
+    parser.add_argument("--output", help="File to write the collapsed stacks to.")
+    parser.add_argument("--top", type=int, default=20, help="Functions to list.")
+    args = parser.parse_args()
+
+    operation = SamplingProfiler.workload(args.workload, args.size, args.seed)
+    profiler = SamplingProfiler(args.interval)
+    runs = profiler.profile(operation, args.seconds)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(profiler.collapsed())
+    print(
+        f"{args.workload} x {runs} runs of {args.size} bytes, {profiler.samples()} samples"
+    )
+    print(f"{'self %':>7} {'total %':>8} {'self':>7} {'total':>7}  function")
+    for row in profiler.top(args.top):
+        print(
+            f"{row['self_fraction']:>7.1%} {row['total_fraction']:>8.1%} {row['self_samples']:>7} {row['total_samples']:>7}  {row['function']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import itertools
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+# Worker process state: the latest attachment of each shared segment role and
+# the key contexts built so far, both kept across calls
+_worker_segments = {}
+_worker_contexts = {}
+
+
+def _attach(role: str, name: str) -> shared_memory.SharedMemory:
+    """Returns the worker's attachment to a shared segment, reattaching when the segment was replaced.
+
+    Args:
+        role (str): "keys", "input" or "output".
+        name (str): The segment name.
+
+    Returns:
+        shared_memory.SharedMemory: The attached segment.
+    """
+    attached = _worker_segments.get(role)
+    if attached is not None and attached.name == name:
+        return attached
+    if attached is not None:
+        attached.close()
+    # Pool workers share the parent's resource tracker, so attaching here does
+    # not make the segment outlive or die with the worker
+    attached = shared_memory.SharedMemory(name=name)
+    _worker_segments[role] = attached
+    return attached
+
+
+def _key_context(keys_name: str, context_id: int):
+    """Returns the worker's key context for an id, building it from the key segment on first use.
+
+    Args:
+        keys_name (str): The name of the key segment.
+        context_id (int): The key context id.
+
+    Returns:
+        KeyContext: The key context.
+    """
+    context = _worker_contexts.get(context_id)
+    if context is None:
+        keys = _attach("keys", keys_name).buf
+        offset, length = struct.unpack_from(">QI", keys, 4 + 12 * context_id)
+        bundle = bytes(keys[offset : offset + length])
+        context = HybridCryptosystem.from_key_bundle(bundle).key_context()
+        _worker_contexts[context_id] = context
+    return context
+
+
+def _crypt_in_place(
+    encrypt: bool,
+    keys_name: str,
+    context_id: int,
+    input_name: str,
+    output_name: str,
+    offset: int,
+    length: int,
+    final: bool,
+) -> int:
+    """Worker task: processes one segment of the input segment into the output segment at the same offset.
+
+    Args:
+        encrypt (bool): Whether to encrypt or decrypt.
+        keys_name (str): The name of the key segment.
+        context_id (int): The key context id.
+        input_name (str): The name of the input segment.
+        output_name (str): The name of the output segment.
+        offset (int): The segment's offset, also its index in the message.
+        length (int): The segment's length.
+        final (bool): Whether this is the last segment of the message.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    context = _key_context(keys_name, context_id)
+    source = _attach("input", input_name).buf
+    M = bytes(source[offset : offset + length]).decode("latin-1")
+    if encrypt:
+        result = context.encrypt_segment(M, offset, final)
+    else:
+        result = context.decrypt_segment(M, offset, final)
+    data = result.encode("latin-1")
+    _attach("output", output_name).buf[offset : offset + len(data)] = data
+    return len(data)
+
+
+class SharedMemoryHybridCryptosystem:
+    """
+    Process-pool encryption with the data in shared memory.
+
+    The message is copied once into a shared input segment; each worker
+    process receives only (offset, length, key context id) plus the segment
+    names, reads its segment from shared memory and writes the result in
+    place into a shared output segment. Nothing but the small task tuple and
+    the written length is pickled.
+
+    Key contexts are registered with register, which stores the key bundle in
+    a shared key segment; each worker builds the context from it on first use
+    and keeps it. The input and output segments are reused across calls and
+    only replaced by larger ones when a message does not fit. Call close (or
+    use the instance as a context manager) to release the segments.
+
+    A registered cryptosystem's compression is kept in the parent process and
+    applied to the whole message around the worker tasks.
+
+    An instance can be shared between threads, but the segments hold one
+    message at a time, so concurrent calls run one after another. Use one
+    instance per thread for concurrent messages.
+    """
+
+    def __init__(
+        self,
+        cryptosystem: HybridCryptosystem = None,
+        processes: int = None,
+        chunk_size: int = 65536,
+    ):
+        if cryptosystem is None:
+            cryptosystem = HybridCryptosystem()
+        self.cryptosystem = cryptosystem
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(max_workers=processes)
+        self._bundles = []
+        self._compressions = []
+        self._keys = None
+        self._input = None
+        self._output = None
+        # Held while a call uses or replaces the shared segments
+        self._lock = threading.Lock()
+        self.register(cryptosystem)
+
+    def register(self, cryptosystem: HybridCryptosystem) -> int:
+        """Makes a key available to the workers.
+
+        Args:
+            cryptosystem (HybridCryptosystem): An instance with the key.
+
+        Returns:
+            int: The key context id to pass to encrypt and decrypt.
+        """
+        with self._lock:
+            self._bundles.append(cryptosystem.to_key_bundle())
+            self._compressions.append(cryptosystem.compression)
+            # Layout: count (4 bytes) | (offset (8 bytes), length (4 bytes)) per key | bundles
+            table_size = 4 + 12 * len(self._bundles)
+            keys = shared_memory.SharedMemory(
+                create=True, size=table_size + sum(map(len, self._bundles))
+            )
+            struct.pack_into(">I", keys.buf, 0, len(self._bundles))
+            offset = table_size
+            for i, bundle in enumerate(self._bundles):
+                struct.pack_into(">QI", keys.buf, 4 + 12 * i, offset, len(bundle))
+                keys.buf[offset : offset + len(bundle)] = bundle
+                offset += len(bundle)
+            self._release(self._keys)
+            self._keys = keys
+            return len(self._bundles) - 1
+
+    def encrypt(self, M: str, context_id: int = 0) -> str:
+        """Encrypts a message in the worker processes.
+
+        Args:
+            M (str): The plaintext to encrypt.
+            context_id (int): The key context id from register; 0 is the constructor's key.
+
+        Returns:
+            str: The ciphertext, identical to HybridCryptosystem.encrypt with that key.
+        """
+        compression = self._compression(context_id)
+        if compression is not None:
+            M = compression.compress(M)
+        return self._run(M, True, context_id)
+
+    def decrypt(self, M: str, context_id: int = 0) -> str:
+        """Decrypts a ciphertext in the worker processes.
+
+        Args:
+            M (str): The ciphertext to decrypt.
+            context_id (int): The key context id from register; 0 is the constructor's key.
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks.
+
+        Returns:
+            str: The plaintext, identical to HybridCryptosystem.decrypt with that key.
+        """
+        block_bytes = self.cryptosystem.block_bytes
+        if len(M) % block_bytes != 0:
+            raise ValueError(
+                f"Ciphertext size mismatch: expected a multiple of {block_bytes} characters, got {len(M)} characters."
+            )
+        compression = self._compression(context_id)
+        D2 = self._run(M, False, context_id)
+        if compression is not None:
+            D2 = compression.decompress(D2)
+        return D2
+
+    def close(self):
+        """Shuts the workers down and releases the shared segments."""
+        with self._lock:
+            self.executor.shutdown()
+            for segment in [self._keys, self._input, self._output]:
+                self._release(segment)
+            self._keys = self._input = self._output = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _compression(self, context_id: int):
+        """Returns the compression of a key context.
+
+        Args:
+            context_id (int): The key context id.
+
+        Raises:
+            ValueError: If context_id is not registered.
+
+        Returns:
+            CompressionStage: The compression, or None.
+        """
+        if not 0 <= context_id < len(self._bundles):
+            raise ValueError(f"Unknown key context id: {context_id}.")
+        return self._compressions[context_id]
+
+    def _run(self, M: str, encrypt: bool, context_id: int) -> str:
+        """Copies M into the input segment, runs one task per segment and reads the output.
+
+        Args:
+            M (str): The message.
+            encrypt (bool): Whether to encrypt or decrypt.
+            context_id (int): The key context id.
+
+        Raises:
+            ValueError: If context_id is not registered.
+
+        Returns:
+            str: The processed message.
+        """
+        if not 0 <= context_id < len(self._bundles):
+            raise ValueError(f"Unknown key context id: {context_id}.")
+        data = M.encode("latin-1")
+        block_bytes = self.cryptosystem.block_bytes
+        bounds = list(self.cryptosystem.segment_bounds(len(M), self.chunk_size))
+        count = len(bounds)
+        with self._lock:
+            # The final segment may grow by up to one block of padding
+            self._input = self._reserve(self._input, len(data))
+            self._output = self._reserve(self._output, len(data) + block_bytes)
+            self._input.buf[: len(data)] = data
+            written = list(
+                self.executor.map(
+                    _crypt_in_place,
+                    itertools.repeat(encrypt, count),
+                    itertools.repeat(self._keys.name, count),
+                    itertools.repeat(context_id, count),
+                    itertools.repeat(self._input.name, count),
+                    itertools.repeat(self._output.name, count),
+                    *zip(*bounds),
+                )
+            )
+            end = bounds[-1][0] + written[-1]
+            return bytes(self._output.buf[:end]).decode("latin-1")
+
+    def _reserve(self, segment, size: int):
+        """Returns segment if it holds size bytes, otherwise a new segment of the next power of two.
+
+        Args:
+            segment (shared_memory.SharedMemory | None): The current segment.
+            size (int): The bytes needed.
+
+        Returns:
+            shared_memory.SharedMemory: A segment of at least size bytes.
+        """
+        if segment is not None and segment.size >= size:
+            return segment
+        self._release(segment)
+        return shared_memory.SharedMemory(
+            create=True, size=1 << max(size - 1, 4095).bit_length()
+        )
+
+    def _release(self, segment):
+        """Closes and unlinks a segment created by this instance.
+
+        Args:
+            segment (shared_memory.SharedMemory | None): The segment.
+        """
+        if segment is not None:
+            segment.close()
+            segment.unlink()
@@ -0,0 +1,278 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class StageMemoryProfiler:
+    """
+    Traces the memory allocated by each stage of the reference hybrid pipeline.
+
+    The stages run one after another on a payload of the given size, exactly
+    as HybridCryptosystem with keep_intermediates and DESEncryption.encrypt
+    and decrypt chain them: the rotor layer (E1), the bit conversion (a string
+    of 8 characters per byte), the parsing into 64-bit blocks, the DES rounds
+    on every block, the deparse (joining the blocks, and stripping the padding
+    when decrypting) and the back-conversion to text. Decryption runs them in
+    the opposite order, the rotor layer last. Every output is kept until the
+    end, as the reference keeps its intermediates, so a stage's retained
+    bytes are what its output holds.
+
+    These stages are the reference pipeline, not the code HybridCryptosystem
+    runs by default, which fuses both layers in one pass (see iter_encrypt).
+    So after the stages and the reference pipeline, profile traces the fused
+    path as well, through HybridCryptosystem.encrypt or decrypt, under
+    memory.<operation>.fused; that is the result that tracks production
+    memory. Each result's path field is reference or fused.
+
+    For each stage, for the reference pipeline and for the fused path, the
+    result records the peak bytes allocated while it ran, the bytes still
+    allocated when it returned and both as ratios to the input size. The results use the BenchmarkSuite
+    result format (component, size, peak_memory_bytes), so they can be stored
+    in a benchmark report and compared against a baseline.
+    """
+
+    def __init__(self, cryptosystem: HybridCryptosystem = None, seed: int = 0):
+        self.cryptosystem = (
+            cryptosystem if cryptosystem is not None else HybridCryptosystem(seed=seed)
+        )
+        self.cryptosystem.precompute()
+        # The fused path runs on a copy without a result cache, so every run computes
+        self._fused = self.cryptosystem.copy(keep_intermediates=False)
+        self._fused.cache = None
+        self.seed = seed
+        self._warm = False
+
+    def profile(self, size: int, operation: str = "encrypt") -> list[dict]:
+        """Traces every stage of one operation on a random payload.
+
+        Args:
+            size (int): The plaintext size in bytes.
+            operation (str): "encrypt" or "decrypt".
+
+        Raises:
+            ValueError: If operation is neither.
+
+        Returns:
+            list[dict]: Per stage in pipeline order, then for the whole reference
+            pipeline, then for the fused path: the component (memory.<operation>.<stage>,
+            memory.<operation>.pipeline or memory.<operation>.fused), path, size,
+            seconds, peak_memory_bytes, retained_memory_bytes,
+            peak_bytes_per_input_byte and retained_bytes_per_input_byte.
+        """
+        if operation not in ("encrypt", "decrypt"):
+            raise ValueError(
+                f"Invalid operation: expected encrypt or decrypt, got {operation!r}."
+            )
+        stages = self._stages(operation)
+        if not self._warm:
+            # Builds the lazily generated tables outside the traced runs
+            ciphertext = self._run(self._stages("encrypt"), "warm up")[-1]
+            self._run(self._stages("decrypt"), ciphertext)
+            self._fused.decrypt(self._fused.encrypt("warm up"))
+            self._warm = True
+        rng = random.Random(f"{self.seed}/{size}")
+        plaintext = "".join([chr(rng.randrange(128)) for _ in range(size)])
+        data = (
+            plaintext
+            if operation == "encrypt"
+            else self.cryptosystem.encrypt(plaintext)
+        )
+        source = data
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            clock = time.perf_counter
+            # Every output stays referenced until the end, like the reference intermediates
+            outputs = []
+            results = []
+            baseline = tracemalloc.get_traced_memory()[0]
+            pipeline_peak = 0
+            pipeline_began = clock()
+            for stage, function in stages:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                began = clock()
+                data = function(data)
+                seconds = clock() - began
+                outputs.append(data)
+                current, peak = tracemalloc.get_traced_memory()
+                pipeline_peak = max(pipeline_peak, peak - baseline)
+                results.append(
+                    self._result(
+                        operation, stage, size, seconds, peak - before, current - before
+                    )
+                )
+            seconds = clock() - pipeline_began
+            retained = tracemalloc.get_traced_memory()[0] - baseline
+            results.append(
+                self._result(
+                    operation, "pipeline", size, seconds, pipeline_peak, retained
+                )
+            )
+            # The fused path keeps no intermediates, so it runs without them
+            outputs.clear()
+            data = None
+            fused = (
+                self._fused.encrypt if operation == "encrypt" else self._fused.decrypt
+            )
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            began = clock()
+            data = fused(source)
+            seconds = clock() - began
+            current, peak = tracemalloc.get_traced_memory()
+            results.append(
+                self._result(
+                    operation,
+                    "fused",
+                    size,
+                    seconds,
+                    peak - before,
+                    current - before,
+                    "fused",
+                )
+            )
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return results
+
+    def _stages(self, operation: str) -> list:
+        """Returns the stages of an operation in pipeline order.
+
+        Args:
+            operation (str): "encrypt" or "decrypt".
+
+        Returns:
+            list[tuple[str, Callable[[object], object]]]: Per stage, its name and the
+            function from its input to its output.
+        """
+        rotor_machine = self.cryptosystem.rotor_machine
+        des = self.cryptosystem.des
+        bit_converter = des.bit_converter
+        parser = des.parser
+        block_size = parser.block_size
+
+        def rotor(M):
+            rotor_machine.reset_rotors()
+            if operation == "encrypt":
+                return rotor_machine.encrypt(M)
+            return rotor_machine.decrypt(M)
+
+        if operation == "encrypt":
+            return [
+                ("rotor", rotor),
+                ("bit_conversion", bit_converter.str_to_binary),
+                ("parsing", parser.parse),
+                (
+                    "des_rounds",
+                    lambda blocks: [des.encrypt_block(block) for block in blocks],
+                ),
+                ("deparse", "".join),
+                ("back_conversion", bit_converter.binary_to_str),
+            ]
+        return [
+            ("bit_conversion", bit_converter.str_to_binary),
+            (
+                "parsing",
+                lambda bits: [
+                    bits[i : i + block_size] for i in range(0, len(bits), block_size)
+                ],
+            ),
+            (
+                "des_rounds",
+                lambda blocks: [des.decrypt_block(block) for block in blocks],
+            ),
+            ("deparse", parser.deparse),
+            ("back_conversion", bit_converter.binary_to_str),
+            ("rotor", rotor),
+        ]
+
+    @staticmethod
+    def _run(stages: list, data):
+        """Runs stages without tracing.
+
+        Args:
+            stages (list[tuple[str, Callable]]): The stages.
+            data (object): The input of the first stage.
+
+        Returns:
+            list: The output of every stage.
+        """
+        outputs = []
+        for stage, function in stages:
+            data = function(data)
+            outputs.append(data)
+        return outputs
+
+    @staticmethod
+    def _result(
+        operation: str,
+        stage: str,
+        size: int,
+        seconds: float,
+        peak: int,
+        retained: int,
+        path: str = "reference",
+    ) -> dict:
+        """Builds the result of one stage.
+
+        Args:
+            operation (str): "encrypt" or "decrypt".
+            stage (str): The stage name, pipeline or fused.
+            size (int): The input size in bytes.
+            seconds (float): The time spent, with tracing on.
+            peak (int): The peak bytes allocated while it ran.
+            retained (int): The bytes still allocated when it returned.
+            path (str): reference for the layered stages and pipeline, fused for the default path.
+
+        Returns:
+            dict: The result.
+        """
+        return {
+            "component": f"memory.{operation}.{stage}",
+            "path": path,
+            "size": size,
+            "seconds": seconds,
+            "peak_memory_bytes": peak,
+            "retained_memory_bytes": retained,
+            "peak_bytes_per_input_byte": peak / size if size else None,
+            "retained_bytes_per_input_byte": retained / size if size else None,
+        }
+
+
+def main():
+    """Command-line entry point: prints the memory used by each stage for each size."""
+    parser = argparse.ArgumentParser(description="Per-stage memory profiler.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1024, 65536], help="Payload sizes."
+    )
+    parser.add_argument(
+        "--operations",
+        nargs="+",
+        choices=["encrypt", "decrypt"],
+        default=["encrypt", "decrypt"],
+        help="Operations to profile.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Key and payload seed.")
+    args = parser.parse_args()
+
+    profiler = StageMemoryProfiler(seed=args.seed)
+    print(
+        f"{'component':<34} {'size':>10} {'peak B':>12} {'retained B':>12} {'peak/B':>8} {'kept/B':>8}"
+    )
+    for size in args.sizes:
+        for operation in args.operations:
+            for result in profiler.profile(size, operation):
+                print(
+                    f"{result['component']:<34} {size:>10} {result['peak_memory_bytes']:>12} {result['retained_memory_bytes']:>12} {result['peak_bytes_per_input_byte'] or 0:>8.1f} {result['retained_bytes_per_input_byte'] or 0:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import functools
+import threading
+import time
+
+from des_encryption import DESEncryption
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class StageTimer:
+    """
+    Registry of named timing spans for the stages of the hybrid pipeline.
+
+    instrument switches the class of a HybridCryptosystem or DESEncryption,
+    and of its layers, to a subclass whose stage methods are timed wrappers;
+    detach switches them back. Uninstrumented objects therefore run the
+    original methods with no flag checks or extra calls at all, and
+    instrumenting one object leaves every other instance untouched: copies
+    made before, siblings loaded from the same key bundle and the bundle
+    prototypes each have their own layer objects (see DESEncryption.copy).
+    Layers copied while instrumented keep the timed class, so copies taken
+    then are measured too.
+
+    Every span records its call count, cumulative seconds and bytes
+    processed; des.round counts no bytes, as its block is already counted by
+    des.encrypt_block or des.decrypt_block. Spans are inclusive: hybrid.encrypt contains the rotor and DES
+    spans it calls, and des.encrypt_block contains its des.round spans.
+    """
+
+    # Instrumented methods per layer: (attribute, span name, bytes processed from the
+    # arguments); the byte count functions take the method's parameter names
+    ROTOR_SPANS = [
+        ("encrypt_char", "rotor.encrypt_char", lambda char1: 1),
+        ("decrypt_char", "rotor.decrypt_char", lambda char3: 1),
+        ("encrypt", "rotor.encrypt", lambda text: len(text)),
+        ("decrypt", "rotor.decrypt", lambda text: len(text)),
+    ]
+    BIT_CONVERTER_SPANS = [
+        ("str_to_binary", "bit_converter.str_to_binary", lambda string: len(string)),
+        (
+            "binary_to_str",
+            "bit_converter.binary_to_str",
+            lambda binary_string: len(binary_string) // 8,
+        ),
+    ]
+    PARSER_SPANS = [
+        ("parse", "parser.parse", lambda binary_string: len(binary_string) // 8),
+        ("pad", "parser.pad", lambda last_block: len(last_block) // 8),
+        ("deparse", "parser.deparse", lambda blocks_bits: 8 * len(blocks_bits)),
+        (
+            "remove_padding",
+            "parser.remove_padding",
+            lambda combined: len(combined) // 8,
+        ),
+    ]
+    DES_SPANS = [
+        ("encrypt", "des.encrypt", lambda plaintext: len(plaintext)),
+        ("decrypt", "des.decrypt", lambda ciphertext: len(ciphertext)),
+        (
+            "encrypt_block",
+            "des.encrypt_block",
+            lambda block_64bits: len(block_64bits) // 8,
+        ),
+        (
+            "decrypt_block",
+            "des.decrypt_block",
+            lambda block_64bits: len(block_64bits) // 8,
+        ),
+        (
+            "round",
+            "des.round",
+            lambda left_32bits, right_32bits, subkey_48bits: 0,
+        ),
+        ("encrypt_blocks", "des.encrypt_blocks", lambda blocks: 8 * len(blocks)),
+        ("decrypt_blocks", "des.decrypt_blocks", lambda blocks: 8 * len(blocks)),
+    ]
+    HYBRID_SPANS = [
+        ("encrypt", "hybrid.encrypt", lambda M: len(M)),
+        ("decrypt", "hybrid.decrypt", lambda M: len(M)),
+        (
+            "encrypt_many",
+            "hybrid.encrypt_many",
+            lambda messages: sum(map(len, messages)),
+        ),
+        (
+            "decrypt_many",
+            "hybrid.decrypt_many",
+            lambda ciphertexts: sum(map(len, ciphertexts)),
+        ),
+    ]
+
+    def __init__(self, sink=None):
+        # Optional receiver of every call instead of this registry, given
+        # (name, seconds, nbytes, result); result is None when the call raised
+        self.sink = sink
+        self._spans = {}
+        self._lock = threading.Lock()
+        # (object, original class) per instrumented object
+        self._patched = []
+
+    def instrument(self, target):
+        """Times the stages of a HybridCryptosystem or DESEncryption until detach.
+
+        Args:
+            target (HybridCryptosystem | DESEncryption): The object to instrument.
+
+        Raises:
+            ValueError: If target is neither.
+        """
+        if isinstance(target, HybridCryptosystem):
+            self.instrument_methods(target.rotor_machine, self.ROTOR_SPANS)
+            self.instrument(target.des)
+            self.instrument_methods(target, self.HYBRID_SPANS)
+        elif isinstance(target, DESEncryption):
+            self.instrument_methods(target.bit_converter, self.BIT_CONVERTER_SPANS)
+            self.instrument_methods(target.parser, self.PARSER_SPANS)
+            self.instrument_methods(target, self.DES_SPANS)
+        else:
+            raise ValueError(
+                f"Cannot instrument {type(target).__name__}, expected HybridCryptosystem or DESEncryption."
+            )
+
+    def instrument_methods(self, obj, spans: list):
+        """Switches an object to a subclass with the given methods timed, until detach.
+
+        Args:
+            obj (object): The object.
+            spans (list[tuple[str, str, Callable]]): The attribute, span name and byte count function per method, which takes the method's arguments by the same names.
+        """
+        original = type(obj)
+        namespace = {
+            attribute: self._timed(getattr(original, attribute), name, size)
+            for attribute, name, size in spans
+        }
+        obj.__class__ = type(original.__name__, (original,), namespace)
+        self._patched.append((obj, original))
+
+    def detach(self):
+        """Restores the original methods of every instrumented object. The recorded spans are kept."""
+        for obj, original in reversed(self._patched):
+            obj.__class__ = original
+        self._patched = []
+
+    def record(self, name: str, seconds: float, nbytes: int = 0):
+        """Adds one call to a span.
+
+        Args:
+            name (str): The span name.
+            seconds (float): The time spent.
+            nbytes (int): The bytes processed.
+        """
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                span = self._spans[name] = [0, 0.0, 0]
+            span[0] += 1
+            span[1] += seconds
+            span[2] += nbytes
+
+    def stats(self) -> dict:
+        """Returns the recorded spans.
+
+        Returns:
+            dict[str, dict]: Per span name, its calls, seconds and bytes.
+        """
+        with self._lock:
+            return {
+                name: {"calls": calls, "seconds": seconds, "bytes": nbytes}
+                for name, (calls, seconds, nbytes) in sorted(self._spans.items())
+            }
+
+    def reset(self):
+        """Clears the recorded spans."""
+        with self._lock:
+            self._spans.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.detach()
+
+    def _timed(self, function, name: str, size):
+        """Wraps a method so that every call is recorded in a span, or passed to the sink with its result.
+
+        Args:
+            function (Callable): The method, unbound.
+            name (str): The span name.
+            size (Callable): Computes the bytes processed from the arguments, positional and keyword.
+
+        Returns:
+            Callable: The wrapper.
+        """
+        clock = time.perf_counter
+        sink = self.sink
+        if sink is None:
+            record = self.record
+
+            @functools.wraps(function)
+            def timed(obj, *args, **kwargs):
+                began = clock()
+                try:
+                    return function(obj, *args, **kwargs)
+                finally:
+                    record(name, clock() - began, size(*args, **kwargs))
+
+            return timed
+
+        @functools.wraps(function)
+        def timed_to_sink(obj, *args, **kwargs):
+            began = clock()
+            result = None
+            try:
+                result = function(obj, *args, **kwargs)
+                return result
+            finally:
+                sink(name, clock() - began, size(*args, **kwargs), result)
+
+        return timed_to_sink
@@ -1,3 +1,16 @@
+import asyncio
+import copy
+import mmap
+import os
+import pickle
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
 from rotor_machine import RotorMachine
 from hybrid_cryptosystem import HybridCryptosystem
 from des_encryption import DESEncryption
@@ -5,6 +18,24 @@ from des_parser import DESParser
 from des_generator import DesGenerator
 from des_bit_converter import DESBitConverter
 from des_permutation import DESPermutation
+from async_hybrid_cryptosystem import AsyncHybridCryptosystem
+from crypto_daemon import CryptoDaemon
+from crypto_client import CryptoClient
+from pipelined_hybrid_cryptosystem import PipelinedHybridCryptosystem
+from hybrid_cryptosystem_pool import HybridCryptosystemPool
+from key_bundle import KeyBundle
+from key_store import KeyStore
+from stage_timer import StageTimer
+from stage_memory_profiler import StageMemoryProfiler
+from sampling_profiler import SamplingProfiler
+from load_generator import LoadGenerator
+from differential_harness import DifferentialHarness
+from metrics_registry import MetricsRegistry
+from shared_memory_hybrid_cryptosystem import SharedMemoryHybridCryptosystem
+from chunked_container import ChunkedContainer
+from ciphertext_cache import CiphertextCache
+from benchmark_suite import BenchmarkSuite
+from compression_stage import CompressionStage
 
 
 def run_split_into_blocks_test():
@@ -634,16 +665,136 @@ def run_des_encryption_test():
     return test_string == decrypted
 
 
-def des_test():
-    """Runs a test to check if the DES encryption class can correctly encrypt and decrypt a string.
+def run_des_blocks_test():
+    """Runs a test to check if the integer block functions match encrypt_block and decrypt_block.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    des_encryption = DESEncryption()
+    blocks = [0, 2**64 - 1, 0x0123456789ABCDEF, 0x5275_6E20_4445_5321]
+    encrypted = des_encryption.encrypt_blocks(blocks)
+    expected = [
+        int(des_encryption.encrypt_block(format(block, "064b")), 2) for block in blocks
+    ]
+    if encrypted != expected or des_encryption.decrypt_blocks(encrypted) != blocks:
+        return False
+    # The tables check the subkey sizes
+    short_subkeys = DESEncryption()
+    short_subkeys.subkeys = ["0" * 40] * 16
+    try:
+        short_subkeys.encrypt_blocks(blocks)
+        return False
+    except ValueError as error:
+        return "expected 48 bits, got 40 bits" in str(error)
+
+
+def run_des_block_cache_test():
+    """Runs a test to check if cached blocks give the same results and are counted as hits.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    des_encryption = DESEncryption()
+    cached_des_encryption = DESEncryption(
+        key_64bits=des_encryption.key_64bits,
+        permutation=des_encryption.permutation,
+        sbox_tables=des_encryption.sbox_tables,
+        block_cache_size=2,
+    )
+    blocks = [0, 0, 0x2020202020202020, 0, 0x0123456789ABCDEF, 0]
+    encrypted = cached_des_encryption.encrypt_blocks(blocks)
+    block_64bits = format(blocks[4], "064b")
+    if (
+        encrypted != des_encryption.encrypt_blocks(blocks)
+        or cached_des_encryption.decrypt_blocks(encrypted) != blocks
+        or cached_des_encryption.encrypt_block(block_64bits)
+        != des_encryption.encrypt_block(block_64bits)
+    ):
+        return False
+    stats = cached_des_encryption.block_cache_stats()["encrypt"]
+    return stats["hits"] == 4 and stats["entries"] == 2 and stats["evictions"] == 1
+
+
+def run_des_setters_test():
+    """Runs a test to check if assigning the key, tables and subkeys rebuilds the derived subkeys, lookup tables and caches.
 
     Returns:
         bool: True if the test passes, False otherwise."""
+    des_encryption = DESEncryption(block_cache_size=16)
+    reference = DESEncryption()
+    blocks = [0, 0x0123456789ABCDEF]
+    des_encryption.encrypt_blocks(blocks)
+    des_encryption.key_64bits = reference.key_64bits
+    des_encryption.permutation = reference.permutation
+    des_encryption.sbox_tables = reference.sbox_tables
+    if des_encryption.subkeys != reference.subkeys or des_encryption.encrypt_blocks(
+        blocks
+    ) != reference.encrypt_blocks(blocks):
+        return False
+    # Assigned subkeys are used as given
+    des_encryption.subkeys = reference.subkeys[::-1]
+    return des_encryption.encrypt_blocks(blocks) == reference.decrypt_blocks(blocks)
+
+
+def des_test():
+    """Runs tests to check if the DES encryption class can correctly encrypt and decrypt a string and integer blocks.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
     if not run_des_encryption_test():
         print("DES encryption test failed.")
         return False
     print("DES encryption test passed.")
 
+    if not run_des_blocks_test():
+        print("DES blocks test failed.")
+        return False
+    print("DES blocks test passed.")
+
+    if not run_des_block_cache_test():
+        print("DES block cache test failed.")
+        return False
+    print("DES block cache test passed.")
+
+    if not run_des_setters_test():
+        print("DES setters test failed.")
+        return False
+    print("DES setters test passed.")
+
+    if not run_des_generator_bulk_test():
+        print("DES generator bulk test failed.")
+        return False
+    print("DES generator bulk test passed.")
+
+    return True
+
+
+def run_des_generator_bulk_test():
+    """Runs a test to check if bulk keys, S-box sets and rotor wirings are reproducible and build working ciphers.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    des_generator = DesGenerator("bulk")
+    keys = des_generator.random_keys(4)
+    sbox_sets = des_generator.random_sbox_sets(4)
+    wirings = des_generator.random_rotor_wirings(4)
+    again = DesGenerator("bulk")
+    if (
+        (again.random_keys(4) != keys).any()
+        or (again.random_sbox_sets(4) != sbox_sets).any()
+        or (sbox_sets.reshape(-1, 16).sum(axis=1) != 120).any()
+        or len(DesGenerator().random_keys(3)) != 3
+    ):
+        return False
+    test_string = "Run DES generator bulk test."
+    for i in range(4):
+        des = DESEncryption(
+            key_64bits=format(int(keys[i]), "064b"), sbox_tables=sbox_sets[i].tolist()
+        )
+        rotor_machine = RotorMachine(*[[chr(c) for c in row] for row in wirings[i]])
+        if des.decrypt(des.encrypt(test_string)) != test_string:
+            return False
+        if rotor_machine.decrypt(rotor_machine.encrypt(test_string)) != test_string:
+            return False
     return True
 
 
@@ -677,6 +828,46 @@ def run_custom_rotor_machine_test():
     return test_string == decrypted
 
 
+def run_rotor_machine_many_test():
+    """Runs a test to check if encrypt_many and decrypt_many match encrypting each string on its own.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    rotor_machine = RotorMachine()
+    test_strings = ["Run rotor machine many test.", "", "\xe9t\xe9", "z" * 20000]
+    encrypted = rotor_machine.encrypt_many(test_strings)
+    if encrypted != [rotor_machine.encrypt(text) for text in test_strings]:
+        return False
+    # The last string runs past one period of the offset schedule, which is all that is cached
+    return (
+        rotor_machine.decrypt_many(encrypted) == test_strings
+        and len(rotor_machine._offsets) == rotor_machine.rotor_length**2
+    )
+
+
+def run_rotor_machine_segment_test():
+    """Runs a test to check if segments encrypted from a start index match the same slice of the whole message.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    rotor_machine = RotorMachine()
+    test_string = "Run rotor machine segment test. " * 600
+    encrypted = rotor_machine.encrypt(test_string)
+    for start in [0, 64, 8191, 8192, 16400]:
+        segment = slice(start, start + 100)
+        if (
+            rotor_machine.encrypt_segment(test_string[segment], start)
+            != encrypted[segment]
+        ):
+            return False
+        if (
+            rotor_machine.decrypt_segment(encrypted[segment], start)
+            != test_string[segment]
+        ):
+            return False
+    return True
+
+
 def rotor_machine_test():
     """Runs two tests to check if the rotor machine can correctly encrypt and decrypt a string using both default and custom rotor settings. Prints the result of each test.
 
@@ -692,6 +883,16 @@ def rotor_machine_test():
         return False
     print("Custom rotor machine test passed.")
 
+    if not run_rotor_machine_many_test():
+        print("Rotor machine many test failed.")
+        return False
+    print("Rotor machine many test passed.")
+
+    if not run_rotor_machine_segment_test():
+        print("Rotor machine segment test failed.")
+        return False
+    print("Rotor machine segment test passed.")
+
     return True
 
 
@@ -703,65 +904,1723 @@ def run_hybrid_cryptosystem_test():
     return test_string == decrypted
 
 
-def hybrid_cryptosystem_test():
-    """Runs a test to check if the hybrid cryptosystem can correctly encrypt and decrypt a string. Prints the result of the test.
+def run_hybrid_cryptosystem_layers_test():
+    """Runs a test to check if the single-pass hybrid pipeline matches running the rotor machine and DES one after the other.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    rotor_machine = hybrid_cryptosystem.rotor_machine
+    des = hybrid_cryptosystem.des
+    for test_string in ["Run hybrid layers test.", "8 bytes!", "x" * 300]:
+        encrypted = hybrid_cryptosystem.encrypt(test_string)
+        if encrypted != des.encrypt(rotor_machine.encrypt(test_string)):
+            return False
+        if hybrid_cryptosystem.decrypt(encrypted) != test_string:
+            return False
+    return hybrid_cryptosystem.decrypt(hybrid_cryptosystem.encrypt("")) == ""
+
+
+def run_hybrid_cryptosystem_intermediates_test():
+    """Runs a test to check if the intermediate results are only retained when keep_intermediates is set.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    test_string = "Run hybrid intermediates test."
+    hybrid_cryptosystem.decrypt(hybrid_cryptosystem.encrypt(test_string))
+    if hybrid_cryptosystem.E1 is not None or hybrid_cryptosystem.D2 is not None:
+        return False
+
+    hybrid_cryptosystem = HybridCryptosystem(keep_intermediates=True)
+    encrypted = hybrid_cryptosystem.encrypt(test_string)
+    hybrid_cryptosystem.decrypt(encrypted)
+    return (
+        hybrid_cryptosystem.get_E1()
+        == hybrid_cryptosystem.rotor_machine.encrypt(test_string)
+        and hybrid_cryptosystem.get_E2() == encrypted
+        and hybrid_cryptosystem.get_D1() == hybrid_cryptosystem.get_E1()
+        and hybrid_cryptosystem.get_D2() == test_string
+    )
+
+
+def run_hybrid_cryptosystem_many_test():
+    """Runs a test to check if encrypt_many and decrypt_many match encrypting each message on its own.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    test_strings = ["Run hybrid many test.", "", "8 bytes!", "\x01" * 16, "HELLO"]
+    encrypted = hybrid_cryptosystem.encrypt_many(test_strings)
+    if encrypted != [hybrid_cryptosystem.encrypt(text) for text in test_strings]:
+        return False
+    return hybrid_cryptosystem.decrypt_many(encrypted) == [
+        hybrid_cryptosystem.decrypt(text) for text in encrypted
+    ]
+
+
+def run_hybrid_cryptosystem_into_test():
+    """Runs a test to check if encrypt_into and decrypt_into match encrypt and decrypt, in place and into an mmap.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    test_string = "Run hybrid cryptosystem into test."
+    encrypted = hybrid_cryptosystem.encrypt(test_string).encode("latin-1")
+    buffer = mmap.mmap(-1, 4096)
+    written = hybrid_cryptosystem.encrypt_into(test_string.encode("latin-1"), buffer)
+    if buffer[:written] != encrypted:
+        return False
+    in_place = bytearray(encrypted)
+    read = hybrid_cryptosystem.decrypt_into(in_place, in_place)
+    if in_place[:read].decode("latin-1") != test_string:
+        return False
+    try:
+        hybrid_cryptosystem.encrypt_into(test_string.encode("latin-1"), bytearray(8))
+        return False
+    except ValueError:
+        return True
+
+
+def run_hybrid_cryptosystem_lazy_test():
+    """Runs a test to check if lazily generated tables match the seed whichever is used first.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    test_string = "Run hybrid cryptosystem lazy test."
+    reference = HybridCryptosystem(seed="lazy")
+    encrypted = reference.encrypt(test_string)
+    hybrid_cryptosystem = HybridCryptosystem(seed="lazy")
+    return (
+        hybrid_cryptosystem.des.sbox_tables == reference.des.sbox_tables
+        and hybrid_cryptosystem.des.key_64bits == reference.des.key_64bits
+        and hybrid_cryptosystem.encrypt(test_string) == encrypted
+    )
+
+
+def run_hybrid_cryptosystem_cold_start_test():
+    """Runs a test to check if importing, constructing and first using a hybrid cryptosystem stay within the startup budget.
+
+    Each phase is timed on its own in a fresh interpreter with bytecode
+    writing enabled, and the fastest of three runs is kept, so compiling
+    on the first run and scheduler noise do not count against the budget.
 
     Returns:
         bool: True if the test passes, False otherwise."""
+    script = (
+        "import sys, time\n"
+        "began = time.perf_counter()\n"
+        "from hybrid_cryptosystem import HybridCryptosystem\n"
+        "imported = time.perf_counter()\n"
+        "hybrid_cryptosystem = HybridCryptosystem()\n"
+        "constructed = time.perf_counter()\n"
+        "hybrid_cryptosystem.encrypt('Run hybrid cryptosystem cold start test.')\n"
+        "used = time.perf_counter()\n"
+        "heavy = [name for name in ['numpy', 'concurrent.futures'] if name in sys.modules]\n"
+        "print(imported - began, constructed - imported, used - constructed, len(heavy))"
+    )
+    environment = dict(os.environ)
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    runs = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=environment,
+        ).stdout.split()
+        if output[3] != "0":
+            return False
+        runs.append([float(value) for value in output[:3]])
+    import_seconds, construct_seconds, first_use_seconds = (
+        min(phase) for phase in zip(*runs)
+    )
+    return (
+        import_seconds < 0.01
+        and construct_seconds < 0.0005
+        and first_use_seconds < 0.005
+    )
+
+
+def hybrid_cryptosystem_test():
+    """Runs tests to check if the hybrid cryptosystem can correctly encrypt and decrypt a string. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
     if not run_hybrid_cryptosystem_test():
         print("Hybrid cryptosystem test failed.")
         return False
     print("Hybrid cryptosystem test passed.")
 
+    if not run_hybrid_cryptosystem_layers_test():
+        print("Hybrid cryptosystem layers test failed.")
+        return False
+    print("Hybrid cryptosystem layers test passed.")
+
+    if not run_hybrid_cryptosystem_intermediates_test():
+        print("Hybrid cryptosystem intermediates test failed.")
+        return False
+    print("Hybrid cryptosystem intermediates test passed.")
+
+    if not run_hybrid_cryptosystem_many_test():
+        print("Hybrid cryptosystem many test failed.")
+        return False
+    print("Hybrid cryptosystem many test passed.")
+
+    if not run_hybrid_cryptosystem_into_test():
+        print("Hybrid cryptosystem into test failed.")
+        return False
+    print("Hybrid cryptosystem into test passed.")
+
+    if not run_hybrid_cryptosystem_lazy_test():
+        print("Hybrid cryptosystem lazy test failed.")
+        return False
+    print("Hybrid cryptosystem lazy test passed.")
+
+    if not run_hybrid_cryptosystem_cold_start_test():
+        print("Hybrid cryptosystem cold start test failed.")
+        return False
+    print("Hybrid cryptosystem cold start test passed.")
+
     return True
 
 
-def run_all_tests():
-    """Main entry point for the program. Runs all tests and prints the results of each test."""
+def run_async_hybrid_cryptosystem_test():
+    """Runs a test to check if the async front-end gives the same results as the hybrid cryptosystem.
 
-    results = []
-    print("Running tests...")
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    async_cryptosystem = AsyncHybridCryptosystem(chunk_size=256, max_pending=2)
+    hybrid_cryptosystem = async_cryptosystem.cryptosystem
+    for test_string in [
+        "",
+        "Run async test.",
+        "Run async hybrid cryptosystem test. " * 30,
+    ]:
+        encrypted = asyncio.run(async_cryptosystem.encrypt(test_string))
+        if encrypted != hybrid_cryptosystem.encrypt(test_string):
+            return False
+        if asyncio.run(async_cryptosystem.decrypt(encrypted)) != test_string:
+            return False
+    return True
 
-    print("\nStarting DES parser test...")
-    results.append(des_parser_test())
-    print("\nDES parser test completed.")
-    print("Passed DES parser test." if results[-1] else "Failed DES parser test.")
 
-    print("\nStarting DES bit converter test...")
-    results.append(des_bit_converter_test())
-    print("\nDES bit converter test completed.")
-    print(
-        "Passed DES bit converter test."
-        if results[-1]
-        else "Failed DES bit converter test."
+def run_async_stream_test():
+    """Runs a test to check if encrypting and decrypting from an asyncio.StreamReader round-trips.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    async_cryptosystem = AsyncHybridCryptosystem(chunk_size=256, max_pending=2)
+    test_string = "Run async stream test. " * 50
+
+    async def crypt_stream(iter_crypt, text):
+        reader = asyncio.StreamReader()
+        reader.feed_data(text.encode("latin-1"))
+        reader.feed_eof()
+        return "".join([segment async for segment in iter_crypt(reader)])
+
+    encrypted = asyncio.run(crypt_stream(async_cryptosystem.iter_encrypt, test_string))
+    if encrypted != async_cryptosystem.cryptosystem.encrypt(test_string):
+        return False
+    decrypted = asyncio.run(crypt_stream(async_cryptosystem.iter_decrypt, encrypted))
+    return decrypted == test_string
+
+
+def async_hybrid_cryptosystem_test():
+    """Runs tests to check if the async hybrid cryptosystem can encrypt and decrypt strings and streams. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_async_hybrid_cryptosystem_test():
+        print("Async hybrid cryptosystem test failed.")
+        return False
+    print("Async hybrid cryptosystem test passed.")
+
+    if not run_async_stream_test():
+        print("Async stream test failed.")
+        return False
+    print("Async stream test passed.")
+
+    return True
+
+
+def run_crypto_daemon_test(address):
+    """Runs a test to check if a client can encrypt and decrypt through a daemon listening on address.
+
+    Args:
+        address (str | tuple[str, int]): A Unix socket path or a (host, port) tuple.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    daemon = CryptoDaemon(address, max_workers=2)
+    client = CryptoClient(daemon.start(), pool_size=2)
+    try:
+        key_id = client.new_key()
+        test_string = "Run crypto daemon test."
+        encrypted = client.encrypt(key_id, test_string)
+        return (
+            encrypted == client.encrypt(key_id, test_string)
+            and client.decrypt(key_id, encrypted) == test_string
+            and daemon.stats() == {"queued": 0, "engines": 1}
+        )
+    finally:
+        client.close()
+        daemon.stop()
+
+
+def run_crypto_client_many_test():
+    """Runs a test to check if batched and pipelined requests round-trip and keep their order.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    daemon = CryptoDaemon(("127.0.0.1", 0), max_workers=2)
+    client = CryptoClient(daemon.start(), batch_bytes=32)
+    try:
+        key_id = client.new_key()
+        test_strings = ["Run crypto client many test.", "", "x" * 100] * 40
+        encrypted = client.encrypt_many(key_id, test_strings)
+        if encrypted[:3] != [client.encrypt(key_id, text) for text in test_strings[:3]]:
+            return False
+        return client.decrypt_many(key_id, encrypted) == test_strings
+    finally:
+        client.close()
+        daemon.stop()
+
+
+def crypto_daemon_test():
+    """Runs tests to check if the crypto daemon and client work over a Unix socket and TCP. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    with tempfile.TemporaryDirectory() as directory:
+        if not run_crypto_daemon_test(os.path.join(directory, "daemon.sock")):
+            print("Crypto daemon Unix socket test failed.")
+            return False
+    print("Crypto daemon Unix socket test passed.")
+
+    if not run_crypto_daemon_test(("127.0.0.1", 0)):
+        print("Crypto daemon TCP test failed.")
+        return False
+    print("Crypto daemon TCP test passed.")
+
+    if not run_crypto_client_many_test():
+        print("Crypto client many test failed.")
+        return False
+    print("Crypto client many test passed.")
+
+    return True
+
+
+def run_pipelined_hybrid_cryptosystem_test(use_processes):
+    """Runs a test to check if the pipelined stages give the same results as the hybrid cryptosystem.
+
+    Args:
+        use_processes (bool): Whether the stage workers are processes or threads.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    pipelined_cryptosystem = PipelinedHybridCryptosystem(
+        chunk_size=256, max_queue=2, use_processes=use_processes
     )
+    hybrid_cryptosystem = pipelined_cryptosystem.cryptosystem
+    for test_string in ["", "Run pipelined test.", "Run pipelined hybrid test. " * 60]:
+        encrypted = pipelined_cryptosystem.encrypt(test_string)
+        if encrypted != hybrid_cryptosystem.encrypt(test_string):
+            return False
+        if pipelined_cryptosystem.decrypt(encrypted) != test_string:
+            return False
+    stats = pipelined_cryptosystem.stats
+    return stats["des"]["segments"] == stats["rotor"]["segments"] == 6
 
-    print("\nStarting DES permutation test...")
-    results.append(des_permutation_test())
-    print("\nDES permutation test completed.")
-    print(
-        "Passed DES permutation test."
-        if results[-1]
-        else "Failed DES permutation test."
+
+def pipelined_hybrid_cryptosystem_test():
+    """Runs tests to check if the pipelined hybrid cryptosystem works with thread and process stages. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_pipelined_hybrid_cryptosystem_test(use_processes=False):
+        print("Pipelined hybrid cryptosystem thread test failed.")
+        return False
+    print("Pipelined hybrid cryptosystem thread test passed.")
+
+    if not run_pipelined_hybrid_cryptosystem_test(use_processes=True):
+        print("Pipelined hybrid cryptosystem process test failed.")
+        return False
+    print("Pipelined hybrid cryptosystem process test passed.")
+
+    return True
+
+
+def run_hybrid_cryptosystem_pool_test():
+    """Runs a test to check if the pool reuses reset instances per key and evicts the least recently used key.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    prototypes = {}
+
+    def factory(key):
+        if key not in prototypes:
+            prototypes[key] = HybridCryptosystem()
+        return copy.deepcopy(prototypes[key])
+
+    pool = HybridCryptosystemPool(factory, max_size=2)
+    test_string = "Run hybrid cryptosystem pool test."
+    with pool.instance("tenant-a") as hybrid_cryptosystem:
+        encrypted = hybrid_cryptosystem.encrypt(test_string)
+    with pool.instance("tenant-a") as hybrid_cryptosystem:
+        if hybrid_cryptosystem.decrypt(encrypted) != test_string:
+            return False
+    with pool.instance("tenant-b"), pool.instance("tenant-c"):
+        pass
+    stats = pool.stats()
+    return (
+        stats["hits"] == 1
+        and stats["misses"] == 3
+        and stats["evictions"] == 1
+        and stats["size"] == 2
     )
 
-    print("\nStarting DES test...")
-    results.append(des_test())
-    print("\nDES test completed.")
-    print("Passed DES test." if results[-1] else "Failed DES test.")
 
-    print("\nStarting rotor machine test...")
-    results.append(rotor_machine_test())
-    print("\nRotor machine test completed.")
-    print("Passed rotor machine test." if results[-1] else "Failed rotor machine test.")
+def run_hybrid_cryptosystem_pool_timeout_test():
+    """Runs a test to check if checkout times out when every instance is checked out.
 
-    print("\nStarting hybrid cryptosystem test...")
-    results.append(hybrid_cryptosystem_test())
-    print("\nHybrid cryptosystem test completed.")
-    print(
-        "Passed hybrid cryptosystem test."
-        if results[-1]
-        else "Failed hybrid cryptosystem test."
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    pool = HybridCryptosystemPool(lambda key: HybridCryptosystem(), max_size=1)
+    hybrid_cryptosystem = pool.checkout("tenant-a")
+    try:
+        pool.checkout("tenant-b", timeout=0.01)
+        return False
+    except TimeoutError:
+        pass
+    pool.checkin("tenant-a", hybrid_cryptosystem)
+    return (
+        pool.checkout("tenant-a") is hybrid_cryptosystem
+        and pool.stats()["waits"] == 1
+        and pool.stats()["queued"] == 0
+    )
+
+
+def run_hybrid_cryptosystem_pool_error_test():
+    """Runs a test to check if the pool discards an instance after an error and rejects check-ins of instances it did not hand out.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    pool = HybridCryptosystemPool(lambda key: HybridCryptosystem(), max_size=2)
+    for operation in [
+        lambda hybrid_cryptosystem: {}["caller"],
+        lambda hybrid_cryptosystem: hybrid_cryptosystem.decrypt("abc"),
+    ]:
+        try:
+            with pool.instance("tenant-a") as hybrid_cryptosystem:
+                operation(hybrid_cryptosystem)
+            return False
+        except (KeyError, ValueError):
+            pass
+    hybrid_cryptosystem = pool.checkout("tenant-a")
+    pool.checkin("tenant-a", hybrid_cryptosystem)
+    for instance in [hybrid_cryptosystem, HybridCryptosystem()]:
+        try:
+            pool.checkin("tenant-a", instance)
+            return False
+        except ValueError:
+            pass
+    stats = pool.stats()
+    return stats["misses"] == 3 and stats["size"] == 1 and stats["idle"] == 1
+
+
+def hybrid_cryptosystem_pool_test():
+    """Runs tests to check if the hybrid cryptosystem pool hands out, reuses and evicts instances. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_hybrid_cryptosystem_pool_test():
+        print("Hybrid cryptosystem pool test failed.")
+        return False
+    print("Hybrid cryptosystem pool test passed.")
+
+    if not run_hybrid_cryptosystem_pool_timeout_test():
+        print("Hybrid cryptosystem pool timeout test failed.")
+        return False
+    print("Hybrid cryptosystem pool timeout test passed.")
+
+    if not run_hybrid_cryptosystem_pool_error_test():
+        print("Hybrid cryptosystem pool error test failed.")
+        return False
+    print("Hybrid cryptosystem pool error test passed.")
+
+    return True
+
+
+def run_key_bundle_test():
+    """Runs a test to check if an instance rebuilt from its key bundle or pickle encrypts identically.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    test_string = "Run key bundle test."
+    encrypted = hybrid_cryptosystem.encrypt(test_string)
+    bundle = hybrid_cryptosystem.to_key_bundle()
+    rebuilt = HybridCryptosystem.from_key_bundle(bundle)
+    unpickled = pickle.loads(pickle.dumps(hybrid_cryptosystem))
+    return (
+        len(bundle) < 1024
+        and rebuilt.encrypt(test_string) == encrypted
+        and HybridCryptosystem.from_key_bundle(bundle).decrypt(encrypted) == test_string
+        and unpickled.encrypt(test_string) == encrypted
+    )
+
+
+def run_key_bundle_seed_test():
+    """Runs a test to check if seeded instances are reproducible and export their seed until their key is reassigned.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    test_string = "Run key bundle seed test."
+    encrypted = HybridCryptosystem(seed=7).encrypt(test_string)
+    bundle = HybridCryptosystem(seed=7).to_key_bundle()
+    # A reassigned key is no longer described by the seed
+    reseeded = HybridCryptosystem(seed=7)
+    reseeded.des.key_64bits = "01" * 32
+    rebuilt = HybridCryptosystem.from_key_bundle(reseeded.to_key_bundle())
+    return (
+        HybridCryptosystem(seed=7).encrypt(test_string) == encrypted
+        and HybridCryptosystem(seed=8).encrypt(test_string) != encrypted
+        and KeyBundle().unpack(bundle) == {"seed": 7}
+        and HybridCryptosystem.from_key_bundle(bundle).encrypt(test_string) == encrypted
+        and reseeded.seed is None
+        and rebuilt.encrypt(test_string) == reseeded.encrypt(test_string)
+    )
+
+
+def run_key_bundle_clone_test():
+    """Runs a test to check if changing the key of one instance loaded from a bundle leaves its siblings unchanged.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    test_string = "Run key bundle clone test."
+    bundle = HybridCryptosystem().to_key_bundle()
+    first = HybridCryptosystem.from_key_bundle(bundle)
+    second = HybridCryptosystem.from_key_bundle(bundle)
+    encrypted = first.encrypt(test_string)
+    first.des.key_64bits = "01" * 32
+    return (
+        first.des is not second.des
+        and first.encrypt(test_string) != encrypted
+        and second.encrypt(test_string) == encrypted
+        and HybridCryptosystem.from_key_bundle(bundle).encrypt(test_string) == encrypted
+    )
+
+
+def run_key_bundle_version_test():
+    """Runs a test to check if a key bundle of another version is rejected.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    bundle = bytearray(HybridCryptosystem().to_key_bundle())
+    bundle[4] = KeyBundle.VERSION + 1
+    try:
+        KeyBundle().unpack(bytes(bundle))
+        return False
+    except ValueError:
+        return True
+
+
+def key_bundle_test():
+    """Runs tests to check if key bundles export and rebuild instances. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_key_bundle_test():
+        print("Key bundle test failed.")
+        return False
+    print("Key bundle test passed.")
+
+    if not run_key_bundle_seed_test():
+        print("Key bundle seed test failed.")
+        return False
+    print("Key bundle seed test passed.")
+
+    if not run_key_bundle_clone_test():
+        print("Key bundle clone test failed.")
+        return False
+    print("Key bundle clone test passed.")
+
+    if not run_key_bundle_version_test():
+        print("Key bundle version test failed.")
+        return False
+    print("Key bundle version test passed.")
+
+    return True
+
+
+def run_chunked_container_test():
+    """Runs a test to check if a container decrypts whole and by range, in parallel and from a file.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    container = ChunkedContainer(hybrid_cryptosystem, chunk_size=256)
+    test_string = "Run chunked container test. " * 50
+    data = container.encrypt(test_string)
+    header, _ = container.read_index(data)
+    if data[header["body_start"] :] != hybrid_cryptosystem.encrypt(test_string).encode(
+        "latin-1"
+    ):
+        return False
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        if container.decrypt(data, executor) != test_string:
+            return False
+    with tempfile.TemporaryFile() as file:
+        container.write(test_string, file)
+        for start, length in [(0, 1), (250, 20), (700, 600), (1390, 100)]:
+            if (
+                container.read_range(file, start, length)
+                != test_string[start : start + length]
+            ):
+                return False
+    return container.decrypt(container.encrypt("")) == ""
+
+
+def run_chunked_container_checksum_test():
+    """Runs a test to check if a corrupted chunk is detected.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    container = ChunkedContainer(chunk_size=256)
+    data = bytearray(container.encrypt("Run chunked container checksum test. " * 20))
+    data[-1] ^= 1
+    try:
+        container.read_range(bytes(data), 700, 10)
+        return False
+    except ValueError:
+        pass
+    return container.read_range(bytes(data), 0, 10) == "Run chunke"
+
+
+def run_chunked_container_reencrypt_test():
+    """Runs a test to check if re-encrypting an edited message only encrypts the changed chunks.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    container = ChunkedContainer(chunk_size=64, content_defined=True)
+    test_string = "".join(
+        f"Run chunked container reencrypt test, line {i}.\n" for i in range(100)
+    )
+    data = container.encrypt(test_string)
+    edited = test_string[:2000] + "Inserted line.\n" + test_string[2000:]
+    new_data = container.reencrypt(data, edited)
+    stats = container.stats
+    if not (
+        container.decrypt(new_data) == edited
+        and container.read_range(new_data, 1990, 40) == edited[1990:2030]
+        and stats["reused"] > 0
+        and stats["encrypted_characters"] < len(edited) // 4
+    ):
+        return False
+    # Reused chunks get checksums even when the old container had none
+    unchecked = ChunkedContainer(
+        container.cryptosystem, chunk_size=64, checksums=False, content_defined=True
+    )
+    new_data = container.reencrypt(unchecked.encrypt(test_string), edited)
+    return container.decrypt(new_data) == edited and container.stats["reused"] > 0
+
+
+def chunked_container_test():
+    """Runs tests to check if the chunked container encrypts, decrypts and reads ranges. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_chunked_container_test():
+        print("Chunked container test failed.")
+        return False
+    print("Chunked container test passed.")
+
+    if not run_chunked_container_checksum_test():
+        print("Chunked container checksum test failed.")
+        return False
+    print("Chunked container checksum test passed.")
+
+    if not run_chunked_container_reencrypt_test():
+        print("Chunked container reencrypt test failed.")
+        return False
+    print("Chunked container reencrypt test passed.")
+
+    return True
+
+
+def run_ciphertext_cache_test():
+    """Runs a test to check if repeated messages are served from a shared cache per key.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    cache = CiphertextCache()
+    hybrid_cryptosystem = HybridCryptosystem(cache=cache)
+    other = HybridCryptosystem(cache=cache)
+    test_string = "Run ciphertext cache test."
+    encrypted = hybrid_cryptosystem.encrypt(test_string)
+    if (
+        hybrid_cryptosystem.encrypt(test_string) != encrypted
+        or hybrid_cryptosystem.copy().encrypt(test_string) != encrypted
+        or other.encrypt(test_string) == encrypted
+        or hybrid_cryptosystem.decrypt(encrypted) != test_string
+    ):
+        return False
+    stats = cache.stats()
+    if stats["hits"] != 2 or stats["misses"] != 3:
+        return False
+    # A reassigned key gets new cache entries
+    hybrid_cryptosystem.des.key_64bits = "01" * 32
+    uncached = HybridCryptosystem(
+        rotor_machine=hybrid_cryptosystem.rotor_machine, des=hybrid_cryptosystem.des
+    )
+    return hybrid_cryptosystem.encrypt(test_string) == uncached.encrypt(test_string)
+
+
+def run_ciphertext_cache_eviction_test():
+    """Runs a test to check if the cache evicts the least recently used results to stay within max_bytes.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    cache = CiphertextCache(max_bytes=64)
+    hybrid_cryptosystem = HybridCryptosystem(cache=cache)
+    for test_string in ["a" * 24, "b" * 24, "a" * 24, "c" * 24]:
+        hybrid_cryptosystem.encrypt(test_string)
+    hybrid_cryptosystem.encrypt("a" * 24)
+    stats = cache.stats()
+    return stats["evictions"] == 1 and stats["bytes"] <= 64 and stats["hits"] == 2
+
+
+def ciphertext_cache_test():
+    """Runs tests to check if the ciphertext cache memoizes results. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_ciphertext_cache_test():
+        print("Ciphertext cache test failed.")
+        return False
+    print("Ciphertext cache test passed.")
+
+    if not run_ciphertext_cache_eviction_test():
+        print("Ciphertext cache eviction test failed.")
+        return False
+    print("Ciphertext cache eviction test passed.")
+
+    return True
+
+
+def run_key_context_threads_test():
+    """Runs a test to check if one key context gives the reference results from many threads.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    # Seeded: block-aligned messages carry no padding, so with some keys a
+    # trailing padding-like byte of E1 is stripped whatever the thread count
+    hybrid_cryptosystem = HybridCryptosystem(seed="key context threads")
+    key_context = hybrid_cryptosystem.key_context()
+    test_strings = [f"Run key context threads test {i}." * i for i in range(16)]
+    expected = [
+        hybrid_cryptosystem.encrypt(test_string) for test_string in test_strings
+    ]
+    long_string = "".join(test_strings)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        encrypted = list(executor.map(key_context.encrypt, test_strings))
+        decrypted = list(executor.map(key_context.decrypt, encrypted))
+        encrypted_long = key_context.encrypt_parallel(long_string, executor, 256)
+        decrypted_long = key_context.decrypt_parallel(encrypted_long, executor, 256)
+    return (
+        encrypted == expected
+        and decrypted == test_strings
+        and encrypted_long == hybrid_cryptosystem.encrypt(long_string)
+        and decrypted_long == long_string
+    )
+
+
+def run_key_context_immutable_test():
+    """Runs a test to check if a key context cannot be modified, also through its engine.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    key_context = HybridCryptosystem().key_context()
+    try:
+        key_context.block_bytes = 4
+        return False
+    except AttributeError:
+        pass
+    # Key material assigned to the engine does not reach an existing context
+    hybrid_cryptosystem = HybridCryptosystem()
+    key_context = hybrid_cryptosystem.key_context()
+    test_string = "Run key context immutable test."
+    encrypted = key_context.encrypt(test_string)
+    hybrid_cryptosystem.des.key_64bits = "01" * 32
+    return (
+        key_context.encrypt(test_string) == encrypted
+        and hybrid_cryptosystem.key_context().encrypt(test_string)
+        == hybrid_cryptosystem.encrypt(test_string)
+        != encrypted
+    )
+
+
+def key_context_test():
+    """Runs tests to check if key contexts can be shared between threads. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_key_context_threads_test():
+        print("Key context threads test failed.")
+        return False
+    print("Key context threads test passed.")
+
+    if not run_key_context_immutable_test():
+        print("Key context immutable test failed.")
+        return False
+    print("Key context immutable test passed.")
+
+    return True
+
+
+def run_shared_memory_hybrid_cryptosystem_test():
+    """Runs a test to check if the shared memory workers match the reference results for several keys and sizes.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem()
+    other = HybridCryptosystem()
+    test_string = "Run shared memory hybrid cryptosystem test. " * 40
+    with SharedMemoryHybridCryptosystem(
+        hybrid_cryptosystem, processes=2, chunk_size=512
+    ) as shared_memory_hybrid_cryptosystem:
+        other_id = shared_memory_hybrid_cryptosystem.register(other)
+        encrypted = shared_memory_hybrid_cryptosystem.encrypt(test_string)
+        # Calls from several threads take turns with the shared segments
+        test_strings = [test_string[: 100 * i] for i in range(1, 9)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            threaded = list(
+                executor.map(shared_memory_hybrid_cryptosystem.encrypt, test_strings)
+            )
+        return (
+            threaded == [hybrid_cryptosystem.encrypt(text) for text in test_strings]
+            and encrypted == hybrid_cryptosystem.encrypt(test_string)
+            and shared_memory_hybrid_cryptosystem.decrypt(encrypted) == test_string
+            and shared_memory_hybrid_cryptosystem.encrypt("Short.", other_id)
+            == other.encrypt("Short.")
+            and shared_memory_hybrid_cryptosystem.encrypt(test_string * 3)
+            == hybrid_cryptosystem.encrypt(test_string * 3)
+        )
+
+
+def shared_memory_hybrid_cryptosystem_test():
+    """Runs tests to check if the shared memory hybrid cryptosystem encrypts and decrypts in worker processes. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_shared_memory_hybrid_cryptosystem_test():
+        print("Shared memory hybrid cryptosystem test failed.")
+        return False
+    print("Shared memory hybrid cryptosystem test passed.")
+
+    return True
+
+
+def run_compression_stage_test():
+    """Runs a test to check if compressed messages round-trip with both codecs and encrypt to fewer blocks.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    test_string = "Run compression stage test. " * 200
+    plain = HybridCryptosystem()
+    for codec in ["zlib", "lzma"]:
+        hybrid_cryptosystem = plain.copy()
+        hybrid_cryptosystem.compression = CompressionStage(codec, level=9)
+        encrypted = hybrid_cryptosystem.encrypt(test_string)
+        if (
+            len(encrypted) >= len(plain.encrypt(test_string)) // 4
+            or hybrid_cryptosystem.decrypt(encrypted) != test_string
+            or hybrid_cryptosystem.decrypt_many(
+                hybrid_cryptosystem.encrypt_many([test_string, "", "\u00e9\u4e2d"])
+            )
+            != [test_string, "", "\u00e9\u4e2d"]
+        ):
+            return False
+        key_context = hybrid_cryptosystem.key_context()
+        if (
+            key_context.decrypt(key_context.encrypt(test_string)) != test_string
+            or key_context.decrypt_parallel(
+                key_context.encrypt_parallel(test_string, chunk_size=512),
+                chunk_size=512,
+            )
+            != test_string
+        ):
+            return False
+        # The compression settings survive pickling
+        unpickled = pickle.loads(pickle.dumps(hybrid_cryptosystem))
+        if unpickled.decrypt(encrypted) != test_string:
+            return False
+    return True
+
+
+def run_compression_stage_heuristic_test():
+    """Runs a test to check if short and incompressible messages are stored uncompressed and still round-trip.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    compression = CompressionStage()
+    incompressible = os.urandom(20000).decode("latin-1")
+    test_strings = ["Short.", incompressible, "a" * 10000]
+    frames = [compression.compress(test_string) for test_string in test_strings]
+    if [ord(frame[0]) for frame in frames] != [
+        CompressionStage.STORED,
+        CompressionStage.STORED,
+        CompressionStage.ZLIB,
+    ]:
+        return False
+    # Frames whose last block is all padding-like bytes must survive decryption
+    hybrid_cryptosystem = HybridCryptosystem(compression=compression)
+    for test_string in test_strings + ["\x01" * 5]:
+        if hybrid_cryptosystem.decrypt(hybrid_cryptosystem.encrypt(test_string)) != (
+            test_string
+        ):
+            return False
+    try:
+        CompressionStage("brotli")
+        return False
+    except ValueError:
+        return True
+
+
+def run_compression_front_end_test():
+    """Runs a test to check if the async and pipelined front-ends compress like the hybrid cryptosystem and the streaming paths refuse compression.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    test_string = "Run compression front-end test. " * 200
+    hybrid_cryptosystem = HybridCryptosystem(compression=CompressionStage())
+    expected = hybrid_cryptosystem.encrypt(test_string)
+    async_cryptosystem = AsyncHybridCryptosystem(hybrid_cryptosystem, chunk_size=256)
+    encrypted = asyncio.run(async_cryptosystem.encrypt(test_string))
+    if (
+        encrypted != expected
+        or asyncio.run(async_cryptosystem.decrypt(encrypted)) != test_string
+    ):
+        return False
+    pipelined = PipelinedHybridCryptosystem(
+        hybrid_cryptosystem, chunk_size=256, use_processes=False
+    )
+    if (
+        pipelined.encrypt(test_string) != expected
+        or pipelined.decrypt(expected) != test_string
+    ):
+        return False
+    for build in [
+        lambda: async_cryptosystem.iter_encrypt(None),
+        lambda: ChunkedContainer(hybrid_cryptosystem),
+    ]:
+        try:
+            build()
+            return False
+        except ValueError:
+            pass
+    return True
+
+
+def compression_stage_test():
+    """Runs tests to check if the compression stage compresses before encryption. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_compression_stage_test():
+        print("Compression stage test failed.")
+        return False
+    print("Compression stage test passed.")
+
+    if not run_compression_stage_heuristic_test():
+        print("Compression stage heuristic test failed.")
+        return False
+    print("Compression stage heuristic test passed.")
+
+    if not run_compression_front_end_test():
+        print("Compression front-end test failed.")
+        return False
+    print("Compression front-end test passed.")
+
+    return True
+
+
+def run_key_store_test():
+    """Runs a test to check if keys loaded from a key store with shared or copied tables match their originals.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    keys = {
+        "tenant-a": HybridCryptosystem(seed="tenant-a"),
+        "tenant-b": HybridCryptosystem(),
+        "tenant-c": HybridCryptosystem().to_key_bundle(),
+    }
+    test_strings = ["Run key store test.", "", "x" * 300]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keys.hks")
+        KeyStore.build(path, keys)
+        with KeyStore(path) as key_store:
+            if len(key_store) != 3 or key_store.ids() != list(keys):
+                return False
+            for key_id, key in keys.items():
+                if not isinstance(key, HybridCryptosystem):
+                    key = HybridCryptosystem.from_key_bundle(key)
+                expected = key.encrypt_many(test_strings)
+                for shared in [True, False]:
+                    hybrid_cryptosystem = key_store.get(key_id, shared=shared)
+                    if (
+                        hybrid_cryptosystem.encrypt_many(test_strings) != expected
+                        or hybrid_cryptosystem.decrypt(expected[2]) != test_strings[2]
+                    ):
+                        return False
+                    del hybrid_cryptosystem
+        return True
+
+
+def run_key_store_compact_test():
+    """Runs a test to check if compacting a key store drops, adds and keeps keys.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    kept = HybridCryptosystem(seed="kept")
+    added = HybridCryptosystem(seed="added")
+    test_string = "Run key store compact test."
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keys.hks")
+        KeyStore.build(path, {"kept": kept, "dropped": HybridCryptosystem()})
+        KeyStore.compact(path, remove=["dropped"], add={"added": added})
+        with KeyStore(path) as key_store:
+            if "dropped" in key_store or key_store.ids() != ["kept", "added"]:
+                return False
+            if key_store.bundle("added") != added.to_key_bundle():
+                return False
+            if key_store.get("kept").encrypt_many([test_string]) != kept.encrypt_many(
+                [test_string]
+            ):
+                return False
+            try:
+                key_store.get("dropped")
+                return False
+            except KeyError:
+                return True
+
+
+def key_store_test():
+    """Runs tests to check if the key store serves keys with precomputed tables. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_key_store_test():
+        print("Key store test failed.")
+        return False
+    print("Key store test passed.")
+
+    if not run_key_store_compact_test():
+        print("Key store compact test failed.")
+        return False
+    print("Key store compact test passed.")
+
+    return True
+
+
+def run_benchmark_suite_test():
+    """Runs a test to check if the benchmark suite measures every size and flags regressions against a baseline.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    report = BenchmarkSuite(
+        sizes=[8, 64],
+        components=["parser.parse", "des.key_schedule", "key_context.decrypt"],
+        min_time=0.001,
+    ).run()
+    results = report["results"]
+    if [(result["component"], result["size"]) for result in results] != [
+        ("parser.parse", 8),
+        ("parser.parse", 64),
+        ("des.key_schedule", 8),
+        ("key_context.decrypt", 8),
+        ("key_context.decrypt", 64),
+    ]:
+        return False
+    if any(
+        result["ops_per_s"] <= 0 or not result["peak_memory_bytes"]
+        for result in results
+    ):
+        return False
+    if BenchmarkSuite.compare(report, report):
+        return False
+    baseline = copy.deepcopy(report)
+    baseline["results"][0]["ops_per_s"] *= 2
+    baseline["results"][1]["peak_memory_bytes"] //= 2
+    regressions = BenchmarkSuite.compare(report, baseline, threshold=0.1)
+    return [
+        (regression["size"], regression["metric"]) for regression in regressions
+    ] == [
+        (8, "ops_per_s"),
+        (64, "peak_memory_bytes"),
+    ]
+
+
+def benchmark_suite_test():
+    """Runs tests to check if the benchmark suite produces reports and compares them. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_benchmark_suite_test():
+        print("Benchmark suite test failed.")
+        return False
+    print("Benchmark suite test passed.")
+
+    return True
+
+
+def run_stage_timer_test():
+    """Runs a test to check if instrumented stages record calls and bytes and detach restores the original classes.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem(seed="stage timer")
+    test_string = "Run stage timer test."
+    expected = hybrid_cryptosystem.encrypt(test_string)
+    # Copies made before instrumenting stay untimed
+    sibling = hybrid_cryptosystem.copy()
+    with StageTimer() as stage_timer:
+        stage_timer.instrument(hybrid_cryptosystem)
+        encrypted = hybrid_cryptosystem.encrypt(test_string)
+        # Keyword arguments reach the method and the byte count
+        decrypted = hybrid_cryptosystem.decrypt(M=encrypted)
+        calls = stage_timer.stats()["des.encrypt_block"]["calls"]
+        sibling.encrypt(test_string)
+        untimed = stage_timer.stats()["des.encrypt_block"]["calls"] == calls
+    hybrid_cryptosystem.encrypt(test_string)
+    stats = stage_timer.stats()
+    blocks = len(encrypted) // 8
+    return (
+        encrypted == expected
+        and decrypted == test_string
+        and type(hybrid_cryptosystem) is HybridCryptosystem
+        and type(hybrid_cryptosystem.des) is DESEncryption
+        and stats["hybrid.encrypt"]["calls"] == 1
+        and stats["hybrid.encrypt"]["bytes"] == len(test_string)
+        and stats["rotor.encrypt_char"]["calls"] == len(test_string)
+        and stats["des.encrypt_block"]["calls"] == blocks
+        and stats["des.round"]["calls"] == 2 * blocks * 16
+        and stats["hybrid.decrypt"]["seconds"] > 0
+        and stats["hybrid.decrypt"]["bytes"] == len(encrypted)
+        and stats["des.round"]["bytes"] == 0
+        and untimed
+    )
+
+
+def stage_timer_test():
+    """Runs tests to check if the stage timer measures the pipeline stages. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_stage_timer_test():
+        print("Stage timer test failed.")
+        return False
+    print("Stage timer test passed.")
+
+    return True
+
+
+def run_metrics_registry_test():
+    """Runs a test to check if instrumented engines and key contexts count bytes, characters, blocks and calls across threads.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    hybrid_cryptosystem = HybridCryptosystem(seed="metrics registry")
+    key_context = hybrid_cryptosystem.key_context()
+    test_string = "Run metrics registry test."
+    with MetricsRegistry() as metrics_registry:
+        metrics_registry.instrument(hybrid_cryptosystem)
+        metrics_registry.instrument(key_context)
+        encrypted = hybrid_cryptosystem.encrypt(test_string)
+        decrypted = hybrid_cryptosystem.decrypt(encrypted)
+        # Each message of a batch is padded to its own block
+        hybrid_cryptosystem.encrypt_many(["abc", "def"])
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(key_context.encrypt, [test_string] * 8))
+    hybrid_cryptosystem.encrypt(test_string)
+    totals = metrics_registry.collect()
+    exposition = metrics_registry.render()
+    encrypt_labels = (("operation", "encrypt"),)
+    blocks = len(encrypted) // 8
+    return (
+        decrypted == test_string
+        and results == [encrypted] * 8
+        and type(hybrid_cryptosystem) is HybridCryptosystem
+        and totals[
+            (
+                "hybrid_operations_total",
+                (("method", "encrypt_segment"), ("operation", "encrypt")),
+            )
+        ]
+        == 8
+        and totals[("hybrid_rotor_chars_total", encrypt_labels)]
+        == 9 * len(test_string) + 6
+        and totals[("hybrid_des_blocks_total", encrypt_labels)] == 9 * blocks + 2
+        and totals[("hybrid_rotor_chars_total", (("operation", "decrypt"),))]
+        == len(test_string)
+        and totals[
+            ("hybrid_layer_bytes_total", (("layer", "des"), ("operation", "decrypt")))
+        ]
+        == len(encrypted)
+        and "# TYPE hybrid_operation_seconds histogram" in exposition
+        and 'hybrid_operation_seconds_count{method="encrypt",operation="encrypt"} 1'
+        in exposition
+        and 'hybrid_operation_seconds_bucket{method="encrypt_segment",operation="encrypt",le="+Inf"} 8'
+        in exposition
+    )
+
+
+def run_metrics_registry_snapshot_test():
+    """Runs a test to check if collecting while another thread observes sees every histogram whole.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    metrics_registry = MetricsRegistry()
+    key = ("hybrid_operation_seconds", (("method", "encrypt"),))
+
+    def observe():
+        for i in range(20000):
+            metrics_registry.observe(key[0], (i % 100) / 1000, key[1])
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        observing = executor.submit(observe)
+        while not observing.done():
+            counts = metrics_registry.collect().get(key)
+            if counts is not None and sum(counts[:-2]) != counts[-2]:
+                return False
+    return metrics_registry.collect()[key][-2] == 20000
+
+
+def run_metrics_registry_endpoint_test():
+    """Runs a test to check if the HTTP endpoint serves cache hit rates and worker pool queue depths.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    cache = CiphertextCache()
+    hybrid_cryptosystem = HybridCryptosystem(seed="metrics endpoint", cache=cache)
+    hybrid_cryptosystem.encrypt("Run metrics endpoint test.")
+    hybrid_cryptosystem.encrypt("Run metrics endpoint test.")
+    bundle = hybrid_cryptosystem.to_key_bundle()
+    HybridCryptosystem.from_key_bundle(bundle)
+    HybridCryptosystem.from_key_bundle(bundle)
+    pool = HybridCryptosystemPool(lambda key: HybridCryptosystem(), max_size=1)
+    daemon = CryptoDaemon(("127.0.0.1", 0))
+    checked_out = pool.checkout("tenant-a")
+    with ThreadPoolExecutor(
+        max_workers=1
+    ) as executor, MetricsRegistry() as metrics_registry:
+        metrics_registry.watch_cache("ciphertext", cache.stats)
+        metrics_registry.watch_cache("bundle", HybridCryptosystem.bundle_cache_stats)
+        metrics_registry.watch_queue("tenants", pool.stats)
+        metrics_registry.watch_queue("daemon", daemon.stats)
+        waiting = executor.submit(pool.checkout, "tenant-a")
+        while pool.stats()["queued"] == 0:
+            time.sleep(0.001)
+        metrics_registry.inc("custom_total", 2.5, (("path", 'a"b'),))
+        host, port = metrics_registry.serve(port=0).server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            content_type = response.headers["Content-Type"]
+            exposition = response.read().decode("utf-8")
+        try:
+            urllib.request.urlopen(f"http://{host}:{port}/other")
+            missing = False
+        except urllib.error.HTTPError as error:
+            missing = error.code == 404
+        pool.checkin("tenant-a", checked_out)
+        waited = waiting.result() is checked_out
+    daemon.stop()
+    return (
+        waited
+        and pool.stats()["queued"] == 0
+        and content_type.startswith("text/plain; version=0.0.4")
+        and missing
+        and 'hybrid_cache_hits_total{cache="ciphertext"} 1' in exposition
+        and 'hybrid_cache_hit_ratio{cache="ciphertext"} 0.5' in exposition
+        and 'hybrid_cache_hits_total{cache="bundle"}' in exposition
+        and 'hybrid_queue_depth{pool="tenants"} 1' in exposition
+        and 'hybrid_queue_depth{pool="daemon"} 0' in exposition
+        and 'custom_total{path="a\\"b"} 2.5' in exposition
+        and HybridCryptosystem.bundle_cache_stats()["hits"] >= 1
+    )
+
+
+def metrics_registry_test():
+    """Runs tests to check if the metrics registry exports the engine metrics. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_metrics_registry_test():
+        print("Metrics registry test failed.")
+        return False
+    print("Metrics registry test passed.")
+
+    if not run_metrics_registry_snapshot_test():
+        print("Metrics registry snapshot test failed.")
+        return False
+    print("Metrics registry snapshot test passed.")
+
+    if not run_metrics_registry_endpoint_test():
+        print("Metrics registry endpoint test failed.")
+        return False
+    print("Metrics registry endpoint test passed.")
+
+    return True
+
+
+def run_stage_memory_profiler_test():
+    """Runs a test to check if the stage memory profiler traces every stage in pipeline order.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    profiler = StageMemoryProfiler(seed="stage memory")
+    size = 512
+    encrypt = profiler.profile(size, "encrypt")
+    decrypt = profiler.profile(size, "decrypt")
+    stages = {result["component"]: result for result in encrypt}
+    bit_conversion = stages["memory.encrypt.bit_conversion"]
+    pipeline = stages["memory.encrypt.pipeline"]
+    fused = stages["memory.encrypt.fused"]
+    try:
+        profiler.profile(size, "sign")
+        rejected = False
+    except ValueError:
+        rejected = True
+    return (
+        [result["component"] for result in encrypt][0] == "memory.encrypt.rotor"
+        and [result["component"] for result in decrypt][-3] == "memory.decrypt.rotor"
+        and len(encrypt) == len(decrypt) == 8
+        and decrypt[-1]["component"] == "memory.decrypt.fused"
+        and fused["path"] == "fused"
+        and pipeline["path"] == "reference"
+        # The fused path does not hold the bit strings of the reference
+        and 0 < fused["peak_memory_bytes"] < pipeline["peak_memory_bytes"]
+        # A bit string holds 8 characters per byte
+        and bit_conversion["retained_memory_bytes"] >= 8 * size
+        and bit_conversion["retained_bytes_per_input_byte"] >= 8
+        and pipeline["peak_memory_bytes"]
+        >= max(result["peak_memory_bytes"] for result in encrypt[:-2])
+        and pipeline["retained_memory_bytes"]
+        >= sum(result["retained_memory_bytes"] for result in encrypt[:-2]) // 2
+        and rejected
+    )
+
+
+def run_stage_memory_benchmark_test():
+    """Runs a test to check if stage memory results are added to benchmark reports and memory growth is flagged.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    report = BenchmarkSuite(sizes=[64], components=[], stage_memory=True).run()
+    components = {result["component"] for result in report["results"]}
+    baseline = copy.deepcopy(report)
+    for result in baseline["results"]:
+        if result["component"] == "memory.encrypt.parsing":
+            result["retained_memory_bytes"] //= 4
+    regressions = BenchmarkSuite.compare(report, baseline)
+    return (
+        "memory.encrypt.des_rounds" in components
+        and "memory.decrypt.pipeline" in components
+        and "memory.decrypt.fused" in components
+        and [
+            (regression["component"], regression["metric"])
+            for regression in regressions
+        ]
+        == [("memory.encrypt.parsing", "retained_memory_bytes")]
+    )
+
+
+def stage_memory_profiler_test():
+    """Runs tests to check if the stage memory profiler reports the memory of each stage. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_stage_memory_profiler_test():
+        print("Stage memory profiler test failed.")
+        return False
+    print("Stage memory profiler test passed.")
+
+    if not run_stage_memory_benchmark_test():
+        print("Stage memory benchmark test failed.")
+        return False
+    print("Stage memory benchmark test passed.")
+
+    return True
+
+
+def run_sampling_profiler_test():
+    """Runs a test to check if the sampling profiler collects collapsed stacks and ranks the DES helpers by self time.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    operation = SamplingProfiler.workload("des", 64, seed="sampling profiler")
+    handler = signal.getsignal(signal.SIGPROF)
+    sampling_profiler = SamplingProfiler(interval=0.001)
+    runs = sampling_profiler.profile(operation, seconds=0.3)
+    lines = sampling_profiler.collapsed().splitlines()
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    top = sampling_profiler.top(5)
+    try:
+        SamplingProfiler.workload("bitsliced", 64)
+        rejected = False
+    except ValueError:
+        rejected = True
+    return (
+        runs >= 1
+        and signal.getsignal(signal.SIGPROF) == handler
+        and sum(counts) == sampling_profiler.samples() > 0
+        and any("des_encryption:DESEncryption.encrypt_block" in line for line in lines)
+        and top[0]["function"].startswith(("des_encryption:", "des_permutation:"))
+        and top[0]["self_samples"] >= top[-1]["self_samples"]
+        and rejected
+    )
+
+
+def sampling_profiler_test():
+    """Runs tests to check if the sampling profiler profiles the workloads. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_sampling_profiler_test():
+        print("Sampling profiler test failed.")
+        return False
+    print("Sampling profiler test passed.")
+
+    return True
+
+
+def run_load_generator_test():
+    """Runs a test to check if closed and open loads drive every target and report percentiles, resources and frames.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    closed = LoadGenerator(
+        "key_context",
+        "choice:64,1024",
+        concurrency=2,
+        duration=0.4,
+        operation="roundtrip",
+        sample_interval=0.1,
+    ).run()
+    opened = LoadGenerator(
+        "async", "uniform:1:512", rate=100, duration=0.3, max_size=4096
+    ).run()
+    daemon = LoadGenerator("daemon", "fixed:256", concurrency=2, duration=0.3).run()
+    summary = closed["summary"]
+    frames = LoadGenerator.to_dataframes(closed)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = LoadGenerator.write_csv(opened, os.path.join(directory, "load"))
+        with open(paths[0]) as file:
+            rows = file.read().splitlines()
+    try:
+        LoadGenerator(sizes="pareto:2")
+        rejected = False
+    except ValueError:
+        rejected = True
+    return (
+        summary["requests"] > 0
+        and summary["errors"] == 0
+        and summary["latency_p50"] <= summary["latency_p99"] <= summary["latency_p999"]
+        and summary["rss_max_bytes"] > 0
+        and {request["size"] for request in closed["requests"]} <= {64, 1024}
+        and len(frames["requests"]) == summary["requests"]
+        and list(frames["resources"].columns)
+        == ["offset", "cpu_percent", "rss_bytes", "threads", "completed"]
+        and opened["summary"]["errors"] == 0
+        and all(1 <= request["size"] <= 512 for request in opened["requests"])
+        and rows[0] == "offset,size,latency,ok"
+        and len(rows) == opened["summary"]["requests"] + 1
+        and daemon["summary"]["requests"] > 0
+        and daemon["summary"]["errors"] == 0
+        and rejected
+    )
+
+
+def load_generator_test():
+    """Runs tests to check if the load generator drives the engines and records latency and resources. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_load_generator_test():
+        print("Load generator test failed.")
+        return False
+    print("Load generator test passed.")
+
+    return True
+
+
+def run_differential_harness_test():
+    """Runs a test to check if every built-in engine matches the reference implementation on random cases.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    report = DifferentialHarness(cases=2, payloads=4, max_size=300, seed=1).run()
+    results = {result["engine"]: result for result in report["results"]}
+    return (
+        report["first_divergence"] is None
+        and all(result["divergence"] is None for result in results.values())
+        and all(result["checks"] == 2 * 2 * 4 for result in results.values())
+        and results["rotor.encrypt_into"]["mb_per_s"] > 0
+        and "async.encrypt" in results
+    )
+
+
+def run_differential_harness_divergence_test():
+    """Runs a test to check if a diverging engine is reported with a minimized, reproducible plaintext.
+
+    Returns:
+        bool: True if the test passes, False otherwise."""
+    harness = DifferentialHarness(engines=[], cases=2, payloads=6, seed=2)
+
+    # Drops the characters outside the rotor alphabet
+    def broken_encrypt(engine, M):
+        return engine.rotor_machine.encrypt_segment(
+            "".join(char for char in M if ord(char) < 128), 0
+        )
+
+    harness.register(
+        "rotor.broken",
+        "rotor",
+        broken_encrypt,
+        lambda engine, M: engine.rotor_machine.decrypt_segment(M, 0),
+    )
+    report = harness.run()
+    divergence = report["first_divergence"]
+    try:
+        harness.register("bitsliced", "aes", broken_encrypt, broken_encrypt)
+        rejected = False
+    except ValueError:
+        rejected = True
+    return (
+        divergence is not None
+        and divergence["engine"] == "rotor.broken"
+        and divergence["operation"] == "encrypt"
+        and divergence["minimized_size"] == 1
+        and ord(divergence["plaintext"]) >= 128
+        and divergence["size"] >= divergence["minimized_size"]
+        and harness.check(
+            "rotor.broken",
+            harness.case(divergence["case"]),
+            "encrypt",
+            divergence["plaintext"],
+        )
+        == {"expected": divergence["expected"], "actual": divergence["actual"]}
+        and "# Register 'rotor.broken'" in divergence["reproducer"]
+        and rejected
+    )
+
+
+def differential_harness_test():
+    """Runs tests to check if the differential harness compares the engines with the reference. Prints the result of each test.
+
+    Returns:
+        bool: True if all tests pass, False otherwise."""
+    if not run_differential_harness_test():
+        print("Differential harness test failed.")
+        return False
+    print("Differential harness test passed.")
+
+    if not run_differential_harness_divergence_test():
+        print("Differential harness divergence test failed.")
+        return False
+    print("Differential harness divergence test passed.")
+
+    return True
+
+
+def run_all_tests():
+    """Main entry point for the program. Runs all tests and prints the results of each test."""
+
+    results = []
+    print("Running tests...")
+
+    print("\nStarting DES parser test...")
+    results.append(des_parser_test())
+    print("\nDES parser test completed.")
+    print("Passed DES parser test." if results[-1] else "Failed DES parser test.")
+
+    print("\nStarting DES bit converter test...")
+    results.append(des_bit_converter_test())
+    print("\nDES bit converter test completed.")
+    print(
+        "Passed DES bit converter test."
+        if results[-1]
+        else "Failed DES bit converter test."
+    )
+
+    print("\nStarting DES permutation test...")
+    results.append(des_permutation_test())
+    print("\nDES permutation test completed.")
+    print(
+        "Passed DES permutation test."
+        if results[-1]
+        else "Failed DES permutation test."
+    )
+
+    print("\nStarting DES test...")
+    results.append(des_test())
+    print("\nDES test completed.")
+    print("Passed DES test." if results[-1] else "Failed DES test.")
+
+    print("\nStarting rotor machine test...")
+    results.append(rotor_machine_test())
+    print("\nRotor machine test completed.")
+    print("Passed rotor machine test." if results[-1] else "Failed rotor machine test.")
+
+    print("\nStarting hybrid cryptosystem test...")
+    results.append(hybrid_cryptosystem_test())
+    print("\nHybrid cryptosystem test completed.")
+    print(
+        "Passed hybrid cryptosystem test."
+        if results[-1]
+        else "Failed hybrid cryptosystem test."
+    )
+
+    print("\nStarting async hybrid cryptosystem test...")
+    results.append(async_hybrid_cryptosystem_test())
+    print("\nAsync hybrid cryptosystem test completed.")
+    print(
+        "Passed async hybrid cryptosystem test."
+        if results[-1]
+        else "Failed async hybrid cryptosystem test."
+    )
+
+    print("\nStarting crypto daemon test...")
+    results.append(crypto_daemon_test())
+    print("\nCrypto daemon test completed.")
+    print("Passed crypto daemon test." if results[-1] else "Failed crypto daemon test.")
+
+    print("\nStarting pipelined hybrid cryptosystem test...")
+    results.append(pipelined_hybrid_cryptosystem_test())
+    print("\nPipelined hybrid cryptosystem test completed.")
+    print(
+        "Passed pipelined hybrid cryptosystem test."
+        if results[-1]
+        else "Failed pipelined hybrid cryptosystem test."
+    )
+
+    print("\nStarting hybrid cryptosystem pool test...")
+    results.append(hybrid_cryptosystem_pool_test())
+    print("\nHybrid cryptosystem pool test completed.")
+    print(
+        "Passed hybrid cryptosystem pool test."
+        if results[-1]
+        else "Failed hybrid cryptosystem pool test."
+    )
+
+    print("\nStarting key bundle test...")
+    results.append(key_bundle_test())
+    print("\nKey bundle test completed.")
+    print("Passed key bundle test." if results[-1] else "Failed key bundle test.")
+
+    print("\nStarting chunked container test...")
+    results.append(chunked_container_test())
+    print("\nChunked container test completed.")
+    print(
+        "Passed chunked container test."
+        if results[-1]
+        else "Failed chunked container test."
+    )
+
+    print("\nStarting ciphertext cache test...")
+    results.append(ciphertext_cache_test())
+    print("\nCiphertext cache test completed.")
+    print(
+        "Passed ciphertext cache test."
+        if results[-1]
+        else "Failed ciphertext cache test."
+    )
+
+    print("\nStarting key context test...")
+    results.append(key_context_test())
+    print("\nKey context test completed.")
+    print("Passed key context test." if results[-1] else "Failed key context test.")
+
+    print("\nStarting shared memory hybrid cryptosystem test...")
+    results.append(shared_memory_hybrid_cryptosystem_test())
+    print("\nShared memory hybrid cryptosystem test completed.")
+    print(
+        "Passed shared memory hybrid cryptosystem test."
+        if results[-1]
+        else "Failed shared memory hybrid cryptosystem test."
+    )
+
+    print("\nStarting compression stage test...")
+    results.append(compression_stage_test())
+    print("\nCompression stage test completed.")
+    print(
+        "Passed compression stage test."
+        if results[-1]
+        else "Failed compression stage test."
+    )
+
+    print("\nStarting key store test...")
+    results.append(key_store_test())
+    print("\nKey store test completed.")
+    print("Passed key store test." if results[-1] else "Failed key store test.")
+
+    print("\nStarting benchmark suite test...")
+    results.append(benchmark_suite_test())
+    print("\nBenchmark suite test completed.")
+    print(
+        "Passed benchmark suite test."
+        if results[-1]
+        else "Failed benchmark suite test."
+    )
+
+    print("\nStarting stage timer test...")
+    results.append(stage_timer_test())
+    print("\nStage timer test completed.")
+    print("Passed stage timer test." if results[-1] else "Failed stage timer test.")
+
+    print("\nStarting metrics registry test...")
+    results.append(metrics_registry_test())
+    print("\nMetrics registry test completed.")
+    print(
+        "Passed metrics registry test."
+        if results[-1]
+        else "Failed metrics registry test."
+    )
+
+    print("\nStarting stage memory profiler test...")
+    results.append(stage_memory_profiler_test())
+    print("\nStage memory profiler test completed.")
+    print(
+        "Passed stage memory profiler test."
+        if results[-1]
+        else "Failed stage memory profiler test."
+    )
+
+    print("\nStarting sampling profiler test...")
+    results.append(sampling_profiler_test())
+    print("\nSampling profiler test completed.")
+    print(
+        "Passed sampling profiler test."
+        if results[-1]
+        else "Failed sampling profiler test."
+    )
+
+    print("\nStarting load generator test...")
+    results.append(load_generator_test())
+    print("\nLoad generator test completed.")
+    print(
+        "Passed load generator test." if results[-1] else "Failed load generator test."
+    )
+
+    print("\nStarting differential harness test...")
+    results.append(differential_harness_test())
+    print("\nDifferential harness test completed.")
+    print(
+        "Passed differential harness test."
+        if results[-1]
+        else "Failed differential harness test."
     )
 
     print("\nAll tests completed.")
@@ -0,0 +1,100 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hybrid_cryptosystem import HybridCryptosystem
+
+
+class ThreadScalingBenchmark:
+    """
+    Measures how KeyContext.encrypt_parallel scales with the number of threads.
+
+    Run it once with a regular CPython and once with a free-threaded build
+    (python3.13t or later) to compare: with the GIL, extra threads add little or
+    nothing, while without it the segments are encrypted in parallel.
+    """
+
+    def __init__(
+        self,
+        size: int = 1024 * 1024,
+        threads: list[int] = None,
+        repeat: int = 3,
+        chunk_size: int = 65536,
+        seed: int = 0,
+    ):
+        self.size = size
+        self.threads = threads if threads is not None else [1, 2, 4, 8]
+        self.repeat = repeat
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+    def run(self) -> dict:
+        """Encrypts the same random message with each thread count, keeping the best of repeat runs.
+
+        Returns:
+            dict: The build (Python version, GIL enabled) and one result per thread count
+            with its best time, throughput in MB/s and speedup over the first thread count.
+        """
+        rng = random.Random(self.seed)
+        M = "".join(chr(rng.randrange(128)) for _ in range(self.size))
+        context = HybridCryptosystem(seed=self.seed).key_context()
+        # Warm up the lookups and the rotor schedule
+        context.encrypt(M[: self.chunk_size])
+
+        results = []
+        for threads in self.threads:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                best = float("inf")
+                for _ in range(self.repeat):
+                    began = time.perf_counter()
+                    context.encrypt_parallel(M, executor, self.chunk_size)
+                    best = min(best, time.perf_counter() - began)
+            results.append(
+                {
+                    "threads": threads,
+                    "seconds": best,
+                    "mb_per_s": self.size / best / 1e6,
+                    "speedup": results[0]["seconds"] / best if results else 1.0,
+                }
+            )
+        return {
+            "python": platform.python_version(),
+            "gil_enabled": getattr(sys, "_is_gil_enabled", lambda: True)(),
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "results": results,
+        }
+
+
+def main():
+    """Command-line entry point: prints the scaling table and optionally writes it as JSON."""
+    parser = argparse.ArgumentParser(description="Thread scaling benchmark.")
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="Message size.")
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="Thread counts."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per thread count.")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Segment size.")
+    parser.add_argument("--output", help="JSON file to write the results to.")
+    args = parser.parse_args()
+
+    report = ThreadScalingBenchmark(
+        args.size, args.threads, args.repeat, args.chunk_size
+    ).run()
+    print(f"Python {report['python']}, GIL enabled: {report['gil_enabled']}")
+    print(f"{'threads':>8} {'seconds':>10} {'MB/s':>8} {'speedup':>8}")
+    for result in report["results"]:
+        print(
+            f"{result['threads']:>8} {result['seconds']:>10.3f} {result['mb_per_s']:>8.3f} {result['speedup']:>8.2f}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()